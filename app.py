@@ -1,17 +1,37 @@
 import streamlit as st
 import pandas as pd
 import os
-import json
 from datetime import datetime
 import plotly.express as px
 import gspread
 from google.oauth2.service_account import Credentials
-import base64
+from rotation import BenchLedger, EligibilityIndex, MIN_PLAYERS, POOL_PLAYER, RotationError, solve_rotation
+from season import plan_season, season_totals
+from game_store import summarize
+from game_archive import team_archive
+from charts import downsample
+from lineup_sim import optimize_order
+from strategies import STRATEGIES, build_order
+from registry import PlayerRegistry
+from data_access import cached, file_signature, load_games, memoize, store_paths
+from lineup_card import card_logos, render_card, render_cards, zip_cards
+from roster_sync import ROSTER_COLS, RosterSync, normalize_roster, team_worksheet
+from write_queue import WriteQueue
+from team_store import DEFAULT_TEAM, TeamStore, team_slug
+from gc_import import merge_gc_files
+from derived_stats import derive, position_innings
+from workload import DEFAULT_RULES, RULES, lookback, resting, rolling_totals, workload
+import profiling
+from profiling import Instrumented
+import threading
+import time
 
 DATA_DIR = "data"
 os.makedirs(DATA_DIR, exist_ok=True)
 
-GAMES_FILE = os.path.join(DATA_DIR, "games.xlsx")
+JOURNAL_DB = os.path.join(DATA_DIR, "write_journal.sqlite")
+TEAMS_DB = os.path.join(DATA_DIR, "teams.sqlite")
+# Pre-team global files, imported once into the default team
 STATS_FILE = os.path.join(DATA_DIR, "season_stats.xlsx")
 ROTATION_FILE = os.path.join(DATA_DIR, "current_rotation.json")
 AVAILABLE_FILE = os.path.join(DATA_DIR, "available_today.json")
@@ -19,77 +39,330 @@ CURRENT_LINEUP_FILE = os.path.join(DATA_DIR, "current_lineup.json")
 
 st.set_page_config(page_title="Lineup Manager", layout="wide", initial_sidebar_state="expanded")
 
+# Spans and I/O counters for this rerun; memory is only traced with the debug panel open
+prof = profiling.begin(memory=st.session_state.get("debug_panel", False))
+prof.section("startup")
+
 st.title("⚾ Lineup Manager - v1.0")
 
 # ====================== GOOGLE SHEETS ROSTER ======================
-def get_roster():
+ROSTER_TTL = 60          # seconds a cached roster is served as fresh
+ROSTER_STALE_TTL = 600   # past ROSTER_TTL, serve the stale copy while refreshing in the background
+
+@st.cache_resource
+def get_spreadsheet():
+    # One authorized gspread client per process, shared by every session
+    creds = Credentials.from_service_account_info(
+        st.secrets["gcp_service_account"],
+        scopes=["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+    )
+    client = gspread.authorize(creds)
+    book = profiling.traced("gspread.open", "gspread", counter="gspread.calls")(client.open)("LittleLeague Roster")
+    return Instrumented(book, "gspread")
+
+@st.cache_resource
+def get_sheet(team, create=False):
+    # Each team keeps its roster on its own tab, made by the team's first roster save
+    # RosterSync batch-updates through worksheet.spreadsheet, so count those calls as well
+    return Instrumented(team_worksheet(get_spreadsheet(), team, create=create), "gspread", nested=("spreadsheet",))
+
+@st.cache_resource
+def roster_sync(team):
+    return RosterSync(get_sheet(team, create=True), max_age=ROSTER_TTL)
+
+@st.cache_resource
+def roster_cache(team):
+    return {"df": None, "loaded_at": 0.0, "generation": 0, "refreshing": False,
+            "hits": 0, "misses": 0, "lock": threading.Lock()}
+
+def fetch_roster(team):
+    try:
+        sheet = get_sheet(team)
+    except ValueError:  # no tab yet, so no players until the first save
+        return pd.DataFrame(columns=ROSTER_COLS)
+    return normalize_roster(pd.DataFrame(sheet.get_all_records()))
+
+def store_roster(cache, df, generation):
+    with cache["lock"]:
+        # An invalidation since the fetch started means df may predate the latest save
+        if cache["generation"] == generation:
+            cache["df"], cache["loaded_at"] = df, time.time()
+
+def refresh_roster_in_background(team, cache, generation):
+    try:
+        store_roster(cache, fetch_roster(team), generation)
+    except Exception:
+        pass  # keep serving the stale copy; the next rerun past ROSTER_TTL retries
+    finally:
+        cache["refreshing"] = False
+
+def invalidate_roster(team):
+    cache = roster_cache(team)
+    with cache["lock"]:
+        cache["df"], cache["loaded_at"] = None, 0.0
+        cache["generation"] += 1
+
+def prime_roster(team, df):
+    # Show a queued save right away; the sheet catches up when the write queue flushes
+    cache = roster_cache(team)
+    with cache["lock"]:
+        cache["df"], cache["loaded_at"] = df.reset_index(drop=True), time.time()
+        cache["generation"] += 1
+
+def get_roster(team):
     if "gcp_service_account" not in st.secrets:
         st.error("Google Sheets not configured yet.")
-        return pd.DataFrame(columns=["ID", "name", "jersey", "b_t", "age", "positions"])
+        return pd.DataFrame(columns=ROSTER_COLS)
+    cache = roster_cache(team)
+    # While the team's roster writes are queued the sheet is behind our copy, so don't re-read it;
+    # once they start failing, past ROSTER_STALE_TTL the sheet is what's real
+    sync = write_queue().status(sheets_lane(team))
+    writes_pending = sync["pending"] > 0 and not sync["retrying"]
+    with cache["lock"]:
+        age = time.time() - cache["loaded_at"]
+        generation = cache["generation"]
+        if cache["df"] is not None and (age < ROSTER_STALE_TTL or writes_pending):
+            cache["hits"] += 1
+            if age >= ROSTER_TTL and not cache["refreshing"] and not writes_pending:
+                cache["refreshing"] = True
+                threading.Thread(target=refresh_roster_in_background, args=(team, cache, generation), daemon=True).start()
+            return cache["df"].copy()
+        cache["misses"] += 1
     try:
-        creds = Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"],
-            scopes=["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-        )
-        client = gspread.authorize(creds)
-        sheet = client.open("LittleLeague Roster").sheet1
-        data = sheet.get_all_records()
-        roster = pd.DataFrame(data)
-        cols = ["ID", "name", "jersey", "b_t", "age", "positions"]
-        for col in cols:
-            if col not in roster.columns:
-                roster[col] = ""
-        roster = roster[cols].fillna("")
-        roster['age'] = roster['age'].astype(str).str.split('.').str[0]
-        return roster
+        roster = fetch_roster(team)
     except Exception as e:
         st.error(f"Google Sheets connection error: {str(e)}")
         st.info("Service account email: streamlit-roster-fresh@lineup-manager-fresh.iam.gserviceaccount.com")
-        return pd.DataFrame(columns=["ID", "name", "jersey", "b_t", "age", "positions"])
-
-roster = get_roster()
-games = pd.read_excel(GAMES_FILE) if os.path.exists(GAMES_FILE) else pd.DataFrame()
-season_stats = pd.read_excel(STATS_FILE) if os.path.exists(STATS_FILE) else pd.DataFrame()
+        return pd.DataFrame(columns=ROSTER_COLS)
+    store_roster(cache, roster, generation)
+    return roster.copy()
+
+# ====================== TEAM STORAGE ======================
+@st.cache_resource
+def team_store():
+    store = TeamStore(TEAMS_DB)
+    store.import_legacy_json(DEFAULT_TEAM, "rotation", ROTATION_FILE)
+    store.import_legacy_json(DEFAULT_TEAM, "available", AVAILABLE_FILE)
+    store.import_legacy_json(DEFAULT_TEAM, "lineup", CURRENT_LINEUP_FILE)
+    if not store.version(DEFAULT_TEAM, "season_stats") and os.path.exists(STATS_FILE):
+        store.put(DEFAULT_TEAM, "season_stats", pd.read_excel(STATS_FILE).to_dict("records"))
+    return Instrumented(store, "sqlite")
+
+@st.cache_resource
+def game_store(team):
+    return Instrumented(team_archive(DATA_DIR, team), "sqlite")
+
+def load_doc(name, default=None):
+    return team_store().get(team, name, default)
+
+def save_doc(name, value):
+    team_store().put(team, name, value)
+
+# ====================== WRITE-BEHIND QUEUE ======================
+def sheets_lane(team):
+    # Each team's roster writes flush in order, and one team's failing tab doesn't hold up another's
+    return f"sheets:{team}"
+
+# Jobs journaled before rosters were per team carry a bare list and belong to the default team
+def flush_roster(payload):
+    team, records = (payload["team"], payload["records"]) if isinstance(payload, dict) else (DEFAULT_TEAM, payload)
+    sync = roster_sync(team)
+    sync.refresh()  # diff against the sheet as it is now; anyone may have edited it since our last read
+    sync.sync(pd.DataFrame(records, columns=ROSTER_COLS))
+    invalidate_roster(team)
+
+def flush_new_players(payload):
+    team, rows = (payload["team"], payload["rows"]) if isinstance(payload, dict) else (DEFAULT_TEAM, payload)
+    sync = roster_sync(team)
+    existing = {row[0] for row in sync.refresh()[1:] if row}
+    # A retry after a dropped response must not append the same players twice
+    sync.add_players([row for row in rows if str(row[0]) not in existing])
+    invalidate_roster(team)
+
+def flush_legacy_season_stats(records):
+    # Stats saves journaled while they still went to season_stats.xlsx: the default team's
+    team_store().put(DEFAULT_TEAM, "season_stats", records)
+
+@st.cache_resource
+def write_queue():
+    queue = WriteQueue(JOURNAL_DB)
+    queue.register("roster_sync", flush_roster, lane=sheets_lane(DEFAULT_TEAM))
+    queue.register("add_players", flush_new_players, lane=sheets_lane(DEFAULT_TEAM))
+    queue.register("season_stats", flush_legacy_season_stats, lane="disk")
+    return queue.start()
+
+# ====================== TEAM ======================
+prof.section("sidebar")
+team = team_slug(st.sidebar.text_input("Team", value=st.query_params.get("team", DEFAULT_TEAM)))
+st.query_params["team"] = team
+# Picks, benches, lineups and rotations in session state belong to one team; drop them on a switch
+TEAM_STATE = ("available_", "bench_", "pitcher_", "catcher_", "pos_", "batting_", "rotation_", "season_",
+              "lineup_doc_sig", "num_innings", "gc_file_id", "roster_df", "rest_table_", "max_table_")
+if st.session_state.get("active_team") != team:
+    for key in [k for k in st.session_state.keys() if k.startswith(TEAM_STATE)]:
+        del st.session_state[key]
+    st.session_state.active_team = team
+
+prof.section("roster")
+roster = get_roster(team)
 
 page = st.sidebar.selectbox("Menu", [
     "Roster & Stats", "Available Players Today", "Defense Rotation Planner",
     "Create Lineup", "Log Game", "Pitcher Workload", "Reports"
 ])
+# Streamlit drops a page's widget state once another page renders
+page_changed = st.session_state.get("last_page") != page
+st.session_state.last_page = page
+prof.label = page
+prof.section(f"page: {page}")
+
+# Data is read only by the pages that need it, and again only once it changes
+def team_games():
+    # Games logged before rows carried roster IDs are matched to today's labels, once per roster version
+    archive = game_store(team)
+    ids = player_registry().ids_by_label()
+    memoize(("game_ids", archive.path), tuple(ids.items()), lambda: archive.assign_ids(ids))
+    return archive
+
+def cached_season_totals():
+    # Playing time is balanced against the current season; earlier seasons stay in the archive.
+    # Totals are kept by roster ID and handed to the solver under today's labels
+    store = team_games().partition(datetime.today().year)
+    if store is None:
+        return {}
+    return player_registry().relabel(
+        cached(("season_totals", store.path), store_paths(store), lambda: season_totals(load_games(store))))
+
+def load_season_stats():
+    # BABIP/FIP/K% are derived once per imported-stats version
+    version = team_store().version(team, "season_stats")
+    return memoize(("season_stats", team), version, lambda: derive(pd.DataFrame(load_doc("season_stats", [])))).copy()
+
+def season_fielding():
+    # Per-position innings from the season partition's materialized sums, which each logged game bumps
+    store = team_games().partition(datetime.today().year)
+    if store is None:
+        return {}
+    return cached(("fielding", store.path), store_paths(store), lambda: position_innings(store.summary()))
+
+def player_registry():
+    # Built once per roster and stats version; pages look players up by label or ID instead of scanning the roster
+    sig = (tuple(roster.itertuples(index=False, name=None)), team_store().version(team, "season_stats"))
+    return memoize(("players", team), sig, lambda: PlayerRegistry(roster, load_season_stats()))
+
+def apply_saved_rotation(rows):
+    for row in rows:
+        inning = row["Inning"]
+        st.session_state[f"bench_{inning}"] = row.get("Bench", "").split(", ") if row.get("Bench") != "—" else []
+        st.session_state[f"pitcher_{inning}"] = row.get("P", "")
+        st.session_state[f"catcher_{inning}"] = row.get("C", "")
+        for pos in ["1B", "SS", "2B", "CF", "3B", "LF", "RF"]:
+            st.session_state[f"pos_{inning}_{pos}"] = row.get(pos, "")
+
+def pitch_rules():
+    return load_doc("pitch_rules") or {"name": DEFAULT_RULES, **RULES[DEFAULT_RULES]}
+
+def pitcher_workload(as_of):
+    # Reads only the days that can still matter; recomputed when games are logged, the rules change or the roster ages do
+    store, rules = team_games(), pitch_rules()
+    as_of = pd.Timestamp(as_of).normalize()
+    ages = tuple(player_registry().ages().items())
+    sig = (file_signature(*store_paths(store)), as_of, team_store().version(team, "pitch_rules"), ages)
+    return memoize(("workload", store.path), sig, lambda: workload(
+        store.pitches_by_game(start=as_of - pd.Timedelta(days=lookback(rules)), end=as_of), as_of, rules, dict(ages)))
+
+@st.cache_resource
+def eligibility_index(players):
+    # Keyed on the (name, positions) pairs, so it rebuilds only when the roster changes
+    return EligibilityIndex(players)
+
+def rotation_ledger(team_players, num_innings):
+    # Lives across reruns; syncing is a no-op for innings whose bench didn't change
+    ledger = st.session_state.get("rotation_ledger")
+    if ledger is None or ledger.team_players != list(team_players):
+        ledger = st.session_state.rotation_ledger = BenchLedger(team_players)
+    for i in range(1, num_innings + 1):
+        ledger.set_bench(i, st.session_state.get(f"bench_{i}", []))
+    return ledger
+
+@st.fragment
+def planner_inning(inning_num, num_innings, team_players, base_on_field, required_bench, elig, pitch_elig, on_rest):
+    # A pick here reruns only this inning. A bench change that alters a later inning's
+    # bench options reruns the app so those innings redraw; picks never affect other innings.
+    other_positions = ["1B", "SS", "2B", "CF", "3B", "LF", "RF"]
+    ledger = st.session_state.rotation_ledger
+    options = ledger.options(inning_num)
+
+    # Picks the auto-rotation made under relaxed rules stay selectable, and are flagged below
+    eligible_bench = options + [p for p in st.session_state.get(f"bench_{inning_num}", []) if p in team_players and p not in options]
+    # A saved pick for a player who left the roster or was relabelled can't stay selected
+    st.session_state[f"bench_{inning_num}"] = [p for p in st.session_state.get(f"bench_{inning_num}", []) if p in eligible_bench]
+
+    st.subheader(f"Bench (select exactly {required_bench} players)")
+    # The picks live under the widget key (set just above), so no default= as well
+    bench = st.multiselect("Select players to bench", eligible_bench, key=f"bench_{inning_num}")
+    back_to_back = [p for p in bench if p in ledger.benches.get(inning_num - 1, [])]
+    if back_to_back:
+        st.error(f"{', '.join(back_to_back)} sat last inning too")
+    elif [p for p in bench if p not in options]:
+        st.warning(f"{', '.join(p for p in bench if p not in options)} would sit a second time before everyone has sat once")
+    if bench != ledger.benches.get(inning_num, []):
+        later = range(inning_num + 1, num_innings + 1)
+        before = [ledger.options(i) for i in later]
+        ledger.set_bench(inning_num, bench)
+        if [ledger.options(i) for i in later] != before:
+            st.rerun()
 
-def can_play(positions, position):
-    if not positions or pd.isna(positions): return False
-    prefs = [p.strip().upper() for p in str(positions).split(',')]
-    pos = position.upper()
-    if pos in ["P","PITCHER"] and any(x in prefs for x in ["P","PITCHER"]): return True
-    if pos in ["C","CATCHER"] and any(x in prefs for x in ["C","CATCHER"]): return True
-    if pos == "1B" and "1B" in prefs: return True
-    if pos in ["2B","3B","SS"] and ("INF" in prefs or pos in prefs): return True
-    if pos in ["LF","CF","RF"] and ("OF" in prefs or pos in prefs): return True
-    return False
+    available = [p for p in base_on_field if p not in bench]
+
+    st.subheader("Pitcher & Catcher")
+    pitcher_options = [""] + pitch_elig.options(available, "P")
+    # A saved pick stays selectable so it can be flagged instead of silently dropped
+    picked = st.session_state.get(f"pitcher_{inning_num}")
+    if picked in on_rest and picked in available and picked not in pitcher_options:
+        pitcher_options.append(picked)
+    pitcher = st.selectbox("Pitcher", pitcher_options, index=0, key=f"pitcher_{inning_num}")
+    if pitcher in on_rest:
+        st.error(f"{pitcher} needs rest until {on_rest[pitcher]:%a %m/%d}")
+
+    catcher_options = [""] + elig.options(available, "C", exclude={pitcher})
+    catcher = st.selectbox("Catcher", catcher_options, index=0, key=f"catcher_{inning_num}")
+
+    st.subheader("Remaining Defense")
+    assigned = {pitcher, catcher}
+    for pos in other_positions:
+        pos_options = [""] + elig.options(available, pos, exclude=assigned)
+        selected = st.selectbox(f"{pos}", pos_options, index=0, key=f"pos_{inning_num}_{pos}")
+        assigned.add(selected)
+
+    # ===== FIXED SINGLE INNING CLEAR =====
+    if st.button("🗑️ Clear All Positions (this inning only)", key=f"clear_pos_{inning_num}"):
+        for k in [f"bench_{inning_num}", f"pitcher_{inning_num}", f"catcher_{inning_num}"] + [f"pos_{inning_num}_{pos}" for pos in other_positions]:
+            if k in st.session_state:
+                del st.session_state[k]
+        st.success(f"Inning {inning_num} cleared!")
+        st.rerun()
 
 # ====================== ADD NEW PLAYER MODAL ======================
-@st.dialog("Add New Player")
+@st.dialog("Add New Players")
 def add_player_dialog():
-    id_val = st.text_input("ID (unique number) *")
-    name = st.text_input("Full Name *")
-    jersey = st.text_input("Jersey Number")
-    b_t = st.text_input("Bats/Throws (e.g. R/R)")
-    age = st.text_input("Age")
-    positions = st.text_input("Positions (comma separated, e.g. P, C, 1B, OF)")
-
-    if st.button("Add Player", type="primary"):
-        if id_val.strip() and name.strip():
-            creds = Credentials.from_service_account_info(
-                st.secrets["gcp_service_account"],
-                scopes=["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-            )
-            client = gspread.authorize(creds)
-            sheet = client.open("LittleLeague Roster").sheet1
-            sheet.append_row([id_val.strip(), name.strip(), jersey.strip(), b_t.strip(), age.strip(), positions.strip()])
-            st.success(f"✅ {name.strip()} (ID: {id_val}) added!")
-            st.rerun()
-        else:
+    st.caption("One row per player • ID and Player are required • Positions comma separated, e.g. P, C, 1B, OF")
+    new_players = st.data_editor(
+        pd.DataFrame([{col: "" for col in ROSTER_COLS}]), num_rows="dynamic", hide_index=True, use_container_width=True,
+        column_config={"ID": "ID *", "name": "Player *", "jersey": "Number", "b_t": "B/T", "age": "Age", "positions": "Positions"}
+    )
+
+    if st.button("Add Players", type="primary"):
+        rows = new_players.fillna("").astype(str).apply(lambda col: col.str.strip())
+        rows = rows[(rows != "").any(axis=1)]
+        if rows.empty or ((rows["ID"] == "") | (rows["name"] == "")).any():
             st.error("ID and Player name are required")
+        else:
+            write_queue().enqueue("add_players", {"team": team, "rows": rows[ROSTER_COLS].values.tolist()},
+                                  lane=sheets_lane(team))
+            prime_roster(team, pd.concat([roster, rows[ROSTER_COLS]], ignore_index=True))
+            st.success(f"✅ Added {', '.join(rows['name'])}!")
+            st.rerun()
 
 # ====================== ROSTER & STATS ======================
 if page == "Roster & Stats":
@@ -120,39 +393,40 @@ if page == "Roster & Stats":
 
     with col2:
         if st.button("💾 Save Roster"):
-            creds = Credentials.from_service_account_info(
-                st.secrets["gcp_service_account"],
-                scopes=["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-            )
-            client = gspread.authorize(creds)
-            sheet = client.open("LittleLeague Roster").sheet1
-            clean = edited.drop(columns=["Delete"])[["ID","name","jersey","b_t","age","positions"]]
-            sheet.clear()
-            sheet.update([clean.columns.values.tolist()] + clean.values.tolist())
+            clean = edited[~edited["Delete"].fillna(False).astype(bool)][ROSTER_COLS]
+            write_queue().enqueue("roster_sync", {"team": team, "records": clean.to_dict("records")},
+                                  coalesce_key=f"roster:{team}", lane=sheets_lane(team))
+            prime_roster(team, clean)
             st.session_state.roster_df = clean
-            st.success("✅ Roster saved!")
+            st.success("✅ Roster saved! Syncing to Google Sheets in the background.")
 
     st.header("Import GameChanger Season Stats CSV")
-    gc_file = st.file_uploader("Upload GC CSV", type="csv")
-    if gc_file:
-        gc = pd.read_csv(gc_file)
-        if 'Player' in gc.columns:
-            gc['Player_lower'] = gc['Player'].str.lower().str.strip()
-            roster['name_lower'] = roster['name'].str.lower().str.strip()
-            keep = [c for c in ['H', 'AB', 'K', 'AVG', 'OBP', 'SLG', 'OPS', 'IP', 'ERA'] if c in gc.columns]
-            merged = roster.merge(gc[['Player_lower'] + keep], left_on='name_lower', right_on='Player_lower', how='left')
-            season_stats = merged[['name'] + keep].copy()
-            season_stats.to_excel(STATS_FILE, index=False)
+    st.caption("Several files (e.g. batting and pitching exports) are combined per player.")
+    gc_files = st.file_uploader("Upload GC CSV", type="csv", accept_multiple_files=True)
+    if gc_files:
+        try:
+            season_stats, unmatched, guessed = merge_gc_files(player_registry(), gc_files)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            upload_id = (team, tuple(f.file_id for f in gc_files))
+            if st.session_state.get("gc_file_id") != upload_id:
+                st.session_state.gc_file_id = upload_id
+                save_doc("season_stats", season_stats.to_dict("records"))
             st.success("✅ GC stats merged!")
-            st.dataframe(season_stats, use_container_width=True)
+            if guessed:
+                st.info("Matched by spelling: " + ", ".join(f"{gc_name} → {label}" for gc_name, label in guessed.items()))
+            if unmatched:
+                st.warning("Not on the roster (or ambiguous): " + ", ".join(unmatched))
+            st.dataframe(derive(season_stats), use_container_width=True)
 
 # ====================== AVAILABLE PLAYERS TODAY ======================
 if page == "Available Players Today":
     st.header("Available Players Today")
-    all_players = sorted(roster['name'].tolist()) if not roster.empty else []
+    all_players = sorted(player_registry().labels())
     if 'available_df' not in st.session_state or len(st.session_state.available_df) != len(all_players):
         current_available = st.session_state.get('available_today', all_players)
-        df = pd.DataFrame({"Player": all_players, "Available Today": [player in current_available for player in all_players]})
+        df = pd.DataFrame({"Player": all_players, "Available Today": pd.Series([player in current_available for player in all_players], dtype=bool)})
         st.session_state.available_df = df
     edited_df = st.data_editor(
         st.session_state.available_df,
@@ -165,8 +439,7 @@ if page == "Available Players Today":
     if st.button("💾 Save Available Players"):
         selected = edited_df[edited_df["Available Today"] == True]["Player"].tolist()
         st.session_state.available_today = selected
-        with open(AVAILABLE_FILE, "w") as f:
-            json.dump(selected, f)
+        save_doc("available", selected)
         st.success("✅ Saved!")
 
 # ====================== DEFENSE ROTATION PLANNER ======================
@@ -174,25 +447,12 @@ if page == "Defense Rotation Planner":
     st.header("Defense Rotation Planner")
     st.caption("Starts completely empty • Fully manual • Strict rules enforced • Orioles ⚾")
 
-    # Auto-load last saved rotation
-    if os.path.exists(ROTATION_FILE):
-        try:
-            with open(ROTATION_FILE, "r") as f:
-                saved = json.load(f)
-            for row in saved:
-                inning = row["Inning"]
-                st.session_state[f"bench_{inning}"] = row.get("Bench", "").split(", ") if row.get("Bench") != "—" else []
-                st.session_state[f"pitcher_{inning}"] = row.get("P", "")
-                st.session_state[f"catcher_{inning}"] = row.get("C", "")
-                for pos in ["1B", "SS", "2B", "CF", "3B", "LF", "RF"]:
-                    st.session_state[f"pos_{inning}_{pos}"] = row.get(pos, "")
-        except:
-            pass
-
-    available_today = st.session_state.get('available_today', roster['name'].tolist())
+    available_today = st.session_state.get('available_today', player_registry().labels())
 
     num_innings = st.number_input("Number of Innings", min_value=4, max_value=9, value=6)
-    num_team = st.number_input("Number of Team Players Available Today (min 8)", min_value=8, max_value=30, value=len(available_today))
+    game_day = st.date_input("Game Date", datetime.today(), key="planner_game_date")
+    num_team = st.number_input(f"Number of Team Players Available Today (min {MIN_PLAYERS})", min_value=MIN_PLAYERS, max_value=30,
+                               value=min(max(len(available_today), MIN_PLAYERS), 30))
 
     team_players = st.multiselect("Team Players", available_today, default=available_today[:num_team])
 
@@ -202,8 +462,8 @@ if page == "Defense Rotation Planner":
     if pool_needed > 0:
         st.info(f"✅ Using {pool_needed} Pool Player(s)")
 
-    if len(team_players) < 8:
-        st.error("Minimum 8 team players required")
+    if len(team_players) < MIN_PLAYERS:
+        st.error(f"Minimum {MIN_PLAYERS} team players required")
     else:
         if 'num_innings' not in st.session_state or st.session_state.num_innings != num_innings:
             st.session_state.num_innings = num_innings
@@ -214,62 +474,57 @@ if page == "Defense Rotation Planner":
                 for pos in ["1B", "SS", "2B", "CF", "3B", "LF", "RF"]:
                     st.session_state[f"pos_{i}_{pos}"] = ""
 
-        tabs = st.tabs([f"Inning {i}" for i in range(1, num_innings + 1)])
+        # Load the saved rotation when it changes or the page is reopened,
+        # not on every rerun, so it doesn't overwrite picks in progress
+        rotation_sig = (team, team_store().version(team, "rotation"))
+        if st.session_state.get("rotation_doc_sig") != rotation_sig or page_changed:
+            st.session_state.rotation_doc_sig = rotation_sig
+            apply_saved_rotation(load_doc("rotation", []))
+
+        elig = eligibility_index(player_registry().eligibility())
         other_positions = ["1B", "SS", "2B", "CF", "3B", "LF", "RF"]
 
-        for idx, tab in enumerate(tabs):
-            inning_num = idx + 1
+        registry = player_registry()
+        on_rest = registry.relabel(resting(pitcher_workload(game_day), [registry.by_label(p).id for p in team_players if p in registry]))
+        if on_rest:
+            st.warning("Pitchers on required rest: " + ", ".join(f"{p} (eligible {d:%a %m/%d})" for p, d in on_rest.items()))
+        hide_rested = st.checkbox("Leave pitchers on rest out of the P dropdown", value=True)
+        pitch_elig = elig.without("P", on_rest) if hide_rested else elig
+
+        if st.button("🤖 Auto-generate Rotation", help="Fills every empty spot and keeps the picks already made"):
+            pinned = {
+                i: {
+                    "Bench": st.session_state.get(f"bench_{i}", []),
+                    "P": st.session_state.get(f"pitcher_{i}", ""),
+                    "C": st.session_state.get(f"catcher_{i}", ""),
+                    **{pos: st.session_state.get(f"pos_{i}_{pos}", "") for pos in other_positions}
+                }
+                for i in range(1, num_innings + 1)
+            }
+            for picks in pinned.values():
+                if hide_rested and picks["P"] in on_rest:
+                    picks["P"] = ""
+            try:
+                rows, notes = solve_rotation(team_players, pitch_elig, num_innings, required_bench, pinned, season=cached_season_totals())
+            except RotationError as e:
+                st.error(f"Couldn't build a rotation: {e}")
+            else:
+                save_doc("rotation", rows)
+                st.session_state.rotation_notes = notes
+                st.rerun()
+        for note in st.session_state.pop("rotation_notes", []):
+            st.warning(note)
+
+        prof.section("planner: innings")
+        tabs = st.tabs([f"Inning {i}" for i in range(1, num_innings + 1)])
+
+        base_on_field = team_players + [POOL_PLAYER] * pool_needed
+        rotation_ledger(team_players, num_innings)
+        for inning_num, tab in enumerate(tabs, start=1):
             with tab:
-                if pool_needed > 0:
-                    base_on_field = team_players + ["Pool Player"] * pool_needed
-                else:
-                    base_on_field = team_players
-
-                bench_history = {p: 0 for p in team_players}
-                for prev_inning in range(1, inning_num):
-                    prev_bench = st.session_state.get(f"bench_{prev_inning}", [])
-                    for p in prev_bench:
-                        if p in bench_history:
-                            bench_history[p] += 1
-
-                all_have_sat_once = all(count >= 1 for count in bench_history.values())
-
-                eligible_bench = []
-                for p in team_players:
-                    was_benched_last = (inning_num > 1 and p in st.session_state.get(f"bench_{inning_num-1}", []))
-                    if not was_benched_last and (bench_history[p] == 0 or all_have_sat_once):
-                        eligible_bench.append(p)
-
-                st.subheader(f"Bench (select exactly {required_bench} players)")
-                bench = st.multiselect("Select players to bench", 
-                                       eligible_bench, 
-                                       default=st.session_state.get(f"bench_{inning_num}", []), 
-                                       key=f"bench_{inning_num}")
-
-                available = [p for p in base_on_field if p not in bench]
-
-                st.subheader("Pitcher & Catcher")
-                pitcher_options = [""] + [p for p in available if p == "Pool Player" or can_play(roster.loc[roster['name']==p, 'positions'].iloc[0] if len(roster.loc[roster['name']==p]) > 0 else "", "P")]
-                pitcher = st.selectbox("Pitcher", pitcher_options, index=0, key=f"pitcher_{inning_num}")
-
-                catcher_options = [""] + [p for p in available if p != pitcher and (p == "Pool Player" or can_play(roster.loc[roster['name']==p, 'positions'].iloc[0] if len(roster.loc[roster['name']==p]) > 0 else "", "C"))]
-                catcher = st.selectbox("Catcher", catcher_options, index=0, key=f"catcher_{inning_num}")
-
-                st.subheader("Remaining Defense")
-                assigned = {pitcher, catcher}
-                for pos in other_positions:
-                    pos_options = [""] + [p for p in available if p not in assigned and (p == "Pool Player" or can_play(roster.loc[roster['name']==p, 'positions'].iloc[0] if len(roster.loc[roster['name']==p]) > 0 else "", pos))]
-                    selected = st.selectbox(f"{pos}", pos_options, index=0, key=f"pos_{inning_num}_{pos}")
-                    assigned.add(selected)
-
-                # ===== FIXED SINGLE INNING CLEAR =====
-                if st.button("🗑️ Clear All Positions (this inning only)", key=f"clear_pos_{inning_num}"):
-                    for k in [f"bench_{inning_num}", f"pitcher_{inning_num}", f"catcher_{inning_num}"] + [f"pos_{inning_num}_{pos}" for pos in other_positions]:
-                        if k in st.session_state:
-                            del st.session_state[k]
-                    st.success(f"Inning {inning_num} cleared!")
-                    st.rerun()
+                planner_inning(inning_num, num_innings, team_players, base_on_field, required_bench, elig, pitch_elig, on_rest)
 
+        prof.section("planner: save & season")
         st.divider()
         # ===== FIXED ALL INNINGS CLEAR =====
         if st.button("🗑️ Clear All Innings"):
@@ -293,78 +548,101 @@ if page == "Defense Rotation Planner":
                         **{pos: st.session_state.get(f"pos_{i}_{pos}", "") for pos in other_positions}
                     }
                     full_plan_rows.append(row)
-                with open(ROTATION_FILE, "w") as f:
-                    json.dump(full_plan_rows, f)
+                save_doc("rotation", full_plan_rows)
                 st.success("✅ Rotation saved!")
 
         with col2:
             if st.button("✅ Validate All Innings & Download Full Plan"):
-                st.success("✅ All innings validated!")
+                problems, last_bench, pitchers = [], [], []
+                for i in range(1, num_innings + 1):
+                    bench = st.session_state.get(f"bench_{i}", [])
+                    row = {"P": st.session_state.get(f"pitcher_{i}", ""), "C": st.session_state.get(f"catcher_{i}", ""),
+                           **{pos: st.session_state.get(f"pos_{i}_{pos}", "") for pos in other_positions}}
+                    if len(bench) != required_bench:
+                        problems.append(f"Inning {i}: {len(bench)} on the bench but {required_bench} need to sit")
+                    problems += [f"Inning {i}: {p} sat in inning {i - 1} too" for p in bench if p in last_bench]
+                    problems += [f"Inning {i}: {player} is not tagged for {pos}" for pos, player in elig.invalid_assignments(row)]
+                    if row["P"] in on_rest:
+                        problems.append(f"Inning {i}: {row['P']} needs rest until {on_rest[row['P']]:%a %m/%d}")
+                    if row["P"] and row["P"] != POOL_PLAYER:
+                        if row["P"] in pitchers[:-1] and row["P"] != pitchers[-1]:
+                            problems.append(f"Inning {i}: {row['P']} already left the mound and can't pitch again")
+                        if not pitchers or pitchers[-1] != row["P"]:
+                            pitchers.append(row["P"])
+                    last_bench = bench
+                if problems:
+                    st.error("\n\n".join(problems))
+                else:
+                    st.success("✅ All innings validated!")
+
+        with st.expander("📅 Season Planner – upcoming games"):
+            st.caption("Plans the next games with today's team and evens out bench, infield, outfield and catcher innings against the logged season.")
+            num_games = st.number_input("Upcoming games", min_value=1, max_value=20, value=5)
+            if st.button("Plan Upcoming Games"):
+                upcoming = [{"players": team_players, "innings": num_innings, "required_bench": required_bench}] * num_games
+                try:
+                    # Game 1 can become today's rotation, so pitchers on rest stay off the mound here too
+                    plans, projected = plan_season(upcoming, pitch_elig, cached_season_totals())
+                except RotationError as e:
+                    st.error(f"Couldn't plan the season: {e}")
+                else:
+                    st.session_state.season_plan = [rows for rows, _ in plans]
+                    st.session_state.season_projection = projected
+            if st.session_state.get("season_plan"):
+                for g, rows in enumerate(st.session_state.season_plan, start=1):
+                    st.markdown(f"**Game {g}**")
+                    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+                projection = pd.DataFrame.from_dict(st.session_state.season_projection, orient="index")
+                st.markdown("**Projected season innings**")
+                st.dataframe(projection.loc[[p for p in team_players if p in projection.index]], use_container_width=True)
+                if st.button("Use Game 1 as Today's Rotation"):
+                    save_doc("rotation", st.session_state.season_plan[0])
+                    st.rerun()
 
 # ====================== CREATE LINEUP ======================
 if page == "Create Lineup":
     st.header("Create Today’s Batting Order")
 
-    # Auto-load last lineup
-    if os.path.exists(CURRENT_LINEUP_FILE):
-        try:
-            with open(CURRENT_LINEUP_FILE, "r") as f:
-                st.session_state.batting_order = json.load(f)
-        except:
-            pass
+    # Auto-load last lineup when the saved file changes
+    lineup_sig = (team, team_store().version(team, "lineup"))
+    if st.session_state.get("lineup_doc_sig") != lineup_sig:
+        st.session_state.lineup_doc_sig = lineup_sig
+        saved_lineup = load_doc("lineup")
+        if saved_lineup is not None:
+            st.session_state.batting_order = saved_lineup
+    registry = player_registry()
 
     game_date = st.date_input("Game Date", datetime.today())
-    available_today = st.session_state.get('available_today', roster['name'].tolist())
+    available_today = st.session_state.get('available_today', registry.labels())
     
     st.subheader("Batting Order")
 
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        if st.button("Auto-Fill Batting Order - Value Strategy"):
-            if season_stats.empty:
-                st.error("Import GameChanger stats first!")
-            else:
-                stats_map = {row['name']: {'H': float(row.get('H',0) or 0), 'OBP': float(row.get('OBP',0) or 0), 'OPS': float(row.get('OPS',0) or 0), 'SLG': float(row.get('SLG',0) or 0)} for _, row in season_stats.iterrows()}
-                remaining = available_today[:]
-                order = []
-                candidates = [p for p in remaining if stats_map.get(p, {}).get('H', 0) >= 1]
-                if candidates:
-                    candidates.sort(key=lambda p: stats_map.get(p, {}).get('OBP', 0), reverse=True)
-                    order.append(candidates[0])
-                    remaining.remove(candidates[0])
-                for _ in range(3):
-                    if remaining:
-                        remaining.sort(key=lambda p: stats_map.get(p, {}).get('OPS', 0), reverse=True)
-                        order.append(remaining[0])
-                        remaining.pop(0)
-                if remaining:
-                    remaining.sort(key=lambda p: stats_map.get(p, {}).get('SLG', 0), reverse=True)
-                    order.append(remaining[0])
-                    remaining.pop(0)
-                while remaining:
-                    remaining.sort(key=lambda p: stats_map.get(p, {}).get('OPS', 0), reverse=True)
-                    order.append(remaining[0])
-                    remaining.pop(0)
-                st.session_state.batting_order = order
-                st.success("✅ Auto-filled with Value Strategy!")
-
-    with col2:
-        if st.button("Auto-Fill Batting Order - OPS"):
-            if season_stats.empty:
-                st.error("Import GameChanger stats first!")
-            else:
-                order = sorted(available_today, key=lambda p: float(season_stats[season_stats['name'] == p]['OPS'].iloc[0]) if not season_stats[season_stats['name'] == p].empty else 0, reverse=True)
-                st.session_state.batting_order = order
-                st.success("✅ Auto-filled by OPS!")
-
-    with col3:
-        if st.button("Auto-Fill Batting Order - BA"):
-            if season_stats.empty:
+    strategy_cols = st.columns(3)
+    for i, (key, (label, _)) in enumerate(STRATEGIES.items()):
+        with strategy_cols[i % 3]:
+            if st.button(f"Auto-Fill Batting Order - {label}"):
+                if not registry.has_stats:
+                    st.error("Import GameChanger stats first!")
+                else:
+                    st.session_state.batting_order = build_order(key, available_today, registry)
+                    st.success(f"✅ Auto-filled by {label}!")
+
+    with st.expander("🎲 Simulated Runs Optimizer"):
+        st.caption("Simulates thousands of games from each player's H/AB/K/OBP/SLG and searches for the order that scores the most runs.")
+        sim_budget = st.slider("Time budget (seconds)", min_value=1, max_value=30, value=5)
+        sim_innings = st.number_input("Innings per game", min_value=4, max_value=9, value=6, key="sim_innings")
+        if st.button("Auto-Fill Batting Order - Most Expected Runs"):
+            if not registry.has_stats:
                 st.error("Import GameChanger stats first!")
-            else:
-                order = sorted(available_today, key=lambda p: float(season_stats[season_stats['name'] == p]['AVG'].iloc[0]) if not season_stats[season_stats['name'] == p].empty else 0, reverse=True)
-                st.session_state.batting_order = order
-                st.success("✅ Auto-filled by BA!")
+            elif available_today:
+                stats = [registry.stats(p) for p in available_today]
+                ops_first = sorted(range(len(available_today)), key=lambda i: registry.get(available_today[i], "OPS"), reverse=True)
+                with st.spinner("Simulating..."), profiling.span("optimize_order", "compute"):
+                    result = optimize_order(stats, n_innings=sim_innings, time_budget=sim_budget, starts=[ops_first])
+                st.session_state.batting_order = [available_today[i] for i in result["order"]]
+                lo, hi = result["ci"]
+                st.success(f"✅ Auto-filled by simulation: {result['expected_runs']:.2f} expected runs per game "
+                           f"(95% CI {lo:.2f}–{hi:.2f}, {result['evaluated']} orders tried)")
 
     n = len(available_today)
     if 'batting_order' not in st.session_state or len(st.session_state.batting_order) != n:
@@ -389,8 +667,7 @@ if page == "Create Lineup":
         st.rerun()
 
     if st.button("💾 Save Current Lineup"):
-        with open(CURRENT_LINEUP_FILE, "w") as f:
-            json.dump(st.session_state.batting_order, f)
+        save_doc("lineup", st.session_state.batting_order)
         st.success("✅ Lineup saved!")
 
     if st.button("📥 Download Batting Order CSV"):
@@ -398,85 +675,34 @@ if page == "Create Lineup":
         st.download_button("Download", csv, f"batting_order_{game_date}.csv", "text/csv")
 
     if st.button("🖨️ Printable Game Day Card"):
-        position_fills = {}
-        if os.path.exists(ROTATION_FILE):
-            try:
-                with open(ROTATION_FILE, "r") as f:
-                    saved = json.load(f)
-                for row in saved:
-                    inning = row["Inning"] - 1
-                    for key, value in row.items():
-                        if key not in ["Inning", "Bench"] and value and value not in ["—"]:
-                            player = value
-                            pos = key
-                            if player not in position_fills:
-                                position_fills[player] = [""] * 6
-                            if inning < 6:
-                                position_fills[player][inning] = pos
-                        elif key == "Bench" and value and value not in ["—"]:
-                            for player in [p.strip() for p in str(value).split(',') if p.strip()]:
-                                if player not in position_fills:
-                                    position_fills[player] = [""] * 6
-                                if inning < 6:
-                                    position_fills[player][inning] = "BN"
-            except:
-                pass
-
-        orioles_b64 = ""
-        cll_b64 = ""
-        logo_files = ["orioles_logo.png", "CLL Orioles logo.jpg", "CLL Orioles logo.png"]
-        cll_files = ["cll_logo.png", "CLL Logo.png"]
-        for f in logo_files:
-            path = os.path.join(DATA_DIR, f)
-            if os.path.exists(path):
-                with open(path, "rb") as img:
-                    orioles_b64 = base64.b64encode(img.read()).decode()
-                break
-        for f in cll_files:
-            path = os.path.join(DATA_DIR, f)
-            if os.path.exists(path):
-                with open(path, "rb") as img:
-                    cll_b64 = base64.b64encode(img.read()).decode()
-                break
-
-        batting_html = """<h2>Batting Order</h2><table border="1" cellpadding="8" cellspacing="0" style="width:75%; border-collapse:collapse; font-size:15px;"><tr><th style="width:6%; text-align:center;">#</th><th style="width:6%; text-align:center;">#</th><th style="width:28%;">Player</th><th style="width:8%; text-align:center;">1</th><th style="width:8%; text-align:center;">2</th><th style="width:8%; text-align:center;">3</th><th style="width:8%; text-align:center;">4</th><th style="width:8%; text-align:center;">5</th><th style="width:8%; text-align:center;">6</th></tr>"""
-        for i, player in enumerate(new_order):
-            jersey = roster.loc[roster['name'] == player, 'jersey'].iloc[0] if not roster[roster['name'] == player].empty else "—"
-            jersey = str(jersey) if pd.notna(jersey) else "—"
-            pos_list = position_fills.get(player, [""]*6)
-            batting_html += f"""<tr><td style="text-align:center; font-weight:bold;">{i+1}</td><td style="text-align:center;">{jersey}</td><td>{player}</td><td style="text-align:center;">{pos_list[0]}</td><td style="text-align:center;">{pos_list[1]}</td><td style="text-align:center;">{pos_list[2]}</td><td style="text-align:center;">{pos_list[3]}</td><td style="text-align:center;">{pos_list[4]}</td><td style="text-align:center;">{pos_list[5]}</td></tr>"""
-        batting_html += "</table>"
-
-        season_html = """<br><br><br><h2>Season Stats</h2><table border="1" cellpadding="5" cellspacing="0" style="width:100%; border-collapse:collapse; font-size:6.8px;"><tr><th>Player</th><th>OBP</th><th>OPS</th><th>BABIP</th><th>C</th><th>1B</th><th>2B</th><th>3B</th><th>SS</th><th>LF</th><th>CF</th><th>RF</th><th>IP</th><th>FIP</th></tr>"""
-        for _, row in roster.iterrows():
-            name = row['name']
-            stat_row = season_stats[season_stats['name'] == name] if not season_stats.empty and 'name' in season_stats.columns else pd.DataFrame()
-            obp = round(stat_row['OBP'].iloc[0], 3) if not stat_row.empty and 'OBP' in stat_row.columns else "—"
-            ops = round(stat_row['OPS'].iloc[0], 3) if not stat_row.empty and 'OPS' in stat_row.columns else "—"
-            babip = "—"
-            c_inn = "—"
-            ip = round(stat_row['IP'].iloc[0], 1) if not stat_row.empty and 'IP' in stat_row.columns else "—"
-            fip = "—"
-            season_html += f"""<tr><td>{name}</td><td>{obp}</td><td>{ops}</td><td>{babip}</td><td>{c_inn}</td><td>—</td><td>—</td><td>—</td><td>—</td><td>—</td><td>—</td><td>—</td><td>{ip}</td><td>{fip}</td></tr>"""
-        season_html += "</table>"
-
-        full_html = f"""
-        <html><head><title>Lineup Card - {game_date}</title>
-        <style>body{{font-family:Arial,sans-serif;margin:25px;color:#000;background:white;}} h1{{text-align:center;color:#fc4c02;font-size:32px;}} table{{width:100%;border-collapse:collapse;}} th,td{{border:1px solid #333;padding:8px;}} th{{background:#fc4c02;color:white;}} @page{{margin:15mm;}}</style></head><body>
-        <div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:20px;">
-            <img src="data:image/png;base64,{orioles_b64}" style="height:80px;">
-            <img src="data:image/png;base64,{cll_b64}" style="height:80px;">
-        </div>
-        <h1>Lineup Card</h1>
-        <p style="text-align:center;font-size:18px;"><strong>Date:</strong> {game_date.strftime('%B %d, %Y')} &nbsp;&nbsp; <strong>Opponent:</strong> ________________________</p>
-        <div>{batting_html}</div>
-        <div style="margin-top:25px;">{season_html}</div>
-        </body></html>
-        """
-
+        with profiling.span("render_card", "render"):
+            full_html = render_card(new_order, registry, load_doc("rotation", []), game_date, card_logos(DATA_DIR),
+                                    fielding=season_fielding())
         st.download_button("📥 Download HTML (open & print)", full_html, f"lineup_card_{game_date}.html", "text/html")
         st.success("✅ Printable card ready!")
 
+    with st.expander("🗂️ Batch Game Day Cards"):
+        st.caption("One card per line as `YYYY-MM-DD, Opponent`, using the saved lineup and rotation.")
+        schedule = st.text_area("Schedule", placeholder="2026-05-02, Cardinals\n2026-05-03, Cubs")
+        card_format = st.radio("Format", ["html", "pdf"], horizontal=True)
+        if st.button("Build Cards"):
+            logos = card_logos(DATA_DIR)
+            rotation_rows = load_doc("rotation", [])
+            fielding = season_fielding()
+            jobs = []
+            for line in schedule.splitlines():
+                if line.strip():
+                    date_str, _, opp = line.partition(",")
+                    jobs.append({"batting_order": new_order, "registry": registry, "rotation_rows": rotation_rows,
+                                 "game_date": date_str.strip(), "logos": logos, "opponent": opp.strip(), "fielding": fielding})
+            try:
+                with profiling.span("render_cards", "render", cards=len(jobs)):
+                    cards = render_cards(jobs, fmt=card_format)
+            except (RuntimeError, ValueError) as e:
+                st.error(str(e))
+            else:
+                st.download_button(f"📥 Download {len(cards)} Cards (zip)", zip_cards(cards), f"lineup_cards_{game_date}.zip", "application/zip")
+
 # ====================== LOG GAME ======================
 if page == "Log Game":
     st.header("Log Completed Game")
@@ -484,7 +710,8 @@ if page == "Log Game":
     opponent = st.text_input("Opponent")
     if not roster.empty:
         positions = ["P", "C", "1B", "2B", "3B", "SS", "LF", "CF", "RF", "DH"]
-        pt_template = pd.DataFrame({"Player": roster["name"].tolist()})
+        registry = player_registry()
+        pt_template = pd.DataFrame({"Player": registry.labels()})
         for pos in positions:
             pt_template[f"{pos}_innings"] = 0.0
         pt_template["Bench_innings"] = 0.0
@@ -495,43 +722,134 @@ if page == "Log Game":
             mask = (edited_pt[innings_cols].sum(axis=1) > 0) | (edited_pt["Pitches_Thrown"] > 0)
             played = edited_pt[mask].copy()
             if not played.empty:
+                # Stored under the roster ID, so the history survives a relabel
+                played["ID"] = [registry.by_label(p).id if p in registry else "" for p in played["Player"]]
                 played["date"] = date
                 played["opponent"] = opponent
-                games = pd.concat([games, played], ignore_index=True)
-                games.to_excel(GAMES_FILE, index=False)
+                team_games().append(played)
                 st.success("Game saved!")
                 st.rerun()
 
 # ====================== PITCHER WORKLOAD ======================
 if page == "Pitcher Workload":
     st.header("Pitcher Workload & Rest")
-    if not games.empty and "Pitches_Thrown" in games.columns:
-        fig = px.bar(games[games["Pitches_Thrown"] > 0], x="date", y="Pitches_Thrown", color="Player", title="Pitches by Game")
+    rules = pitch_rules()
+    with st.expander(f"⚙️ Pitch count rules: {rules.get('name', 'Custom')}"):
+        names = list(RULES) + ["Custom"]
+        current = rules.get("name", "Custom")
+        choice = st.selectbox("Rules", names, index=names.index(current) if current in names else len(names) - 1)
+        base = RULES.get(choice, rules)
+        rest_table = st.data_editor(pd.DataFrame(base["rest"], columns=["Pitches (at least)", "Days of rest"]),
+                                    num_rows="dynamic", hide_index=True, disabled=choice != "Custom", key=f"rest_table_{choice}")
+        max_table = st.data_editor(pd.DataFrame(base["daily_max"], columns=["Age (at least)", "Daily max pitches"]),
+                                   num_rows="dynamic", hide_index=True, disabled=choice != "Custom", key=f"max_table_{choice}")
+        if st.button("💾 Save Rules"):
+            save_doc("pitch_rules", {"name": choice,
+                                     "rest": rest_table.dropna().astype(int).values.tolist(),
+                                     "daily_max": max_table.dropna().astype(int).values.tolist()})
+            st.success("✅ Rules saved!")
+            st.rerun()
+
+    as_of = st.date_input("Status as of", datetime.today())
+    registry = player_registry()
+    report = pitcher_workload(as_of)
+    if not report.empty:
+        report = report.rename(index=registry.label).rename_axis("Player")
+        status = report.assign(Status=report["available"].map({True: "✅ Available", False: "⛔ Resting"}))
+        st.dataframe(status.drop(columns="available").rename(columns={
+            "last_pitched": "Last Pitched", "last_pitches": "Pitches", "rest_days": "Rest Days",
+            "next_eligible": "Next Eligible", "daily_max": "Daily Max", "pitches_7d": "Last 7 Days", "pitches_30d": "Last 30 Days"}),
+            use_container_width=True, column_config={"Last Pitched": st.column_config.DateColumn(), "Next Eligible": st.column_config.DateColumn()})
+
+    archive = team_games()
+    seasons_logged = archive.seasons()
+    chart_seasons = st.multiselect("Chart seasons", seasons_logged, default=seasons_logged[-1:])
+    pitches = archive.pitches_by_game(seasons=chart_seasons)
+    if not pitches.empty:
+        pitches["Player"] = pitches["ID"].map(registry.label)
+        # Multi-season spans are bucketed by week/month so Plotly gets a few hundred points, not every game
+        per_bucket, bucket = downsample(pitches, "Pitches_Thrown", by="Player")
+        title = "Pitches by Game" if bucket == "day" else f"Pitches per {bucket}"
+        fig = px.bar(per_bucket, x="date", y="Pitches_Thrown", color="Player", title=title)
+        st.plotly_chart(fig, use_container_width=True)
+        rolling = rolling_totals(pitches)
+        peaks, bucket = downsample(rolling.assign(Player=rolling["ID"].map(registry.label)), "pitches_7d", by="Player", how="max")
+        title = "Rolling 7-Day Pitches" if bucket == "day" else f"Peak Rolling 7-Day Pitches per {bucket}"
+        fig = px.line(peaks, x="date", y="pitches_7d", color="Player", markers=True, title=title)
         st.plotly_chart(fig, use_container_width=True)
 
 # ====================== REPORTS ======================
 if page == "Reports":
     st.header("Season Reports")
-    if not games.empty:
-        innings_cols = [col for col in games.columns if col.endswith("_innings")]
-        agg = {col: "sum" for col in innings_cols}
-        if "Pitches_Thrown" in games.columns:
-            agg["Pitches_Thrown"] = "sum"
-        summary = games.groupby("Player").agg(agg).round(1).reset_index()
-        summary["Total_Field_Innings"] = summary[[c for c in innings_cols if c != "Bench_innings"]].sum(axis=1)
+    archive = team_games()
+    seasons_logged = archive.seasons()
+    col1, col2 = st.columns(2)
+    seasons = col1.multiselect("Seasons", seasons_logged, default=seasons_logged)
+    opponent = col2.selectbox("Opponent", ["All opponents"] + archive.opponents(seasons))
+    if opponent == "All opponents":
+        summary = archive.summary(seasons)  # summed from each season's materialized totals
+    else:
+        summary = summarize(archive.read(opponent=opponent, seasons=seasons))
+    if not summary.empty:
+        # Today's label for players still on the roster, the last logged one for the rest
+        summary["Player"] = [player_registry().label(pid, label) for pid, label in zip(summary["ID"], summary["Player"])]
         st.dataframe(summary, use_container_width=True)
         fig = px.bar(summary, x="Player", y="Total_Field_Innings", title="Total Field Innings")
         st.plotly_chart(fig, use_container_width=True)
+        if st.button("📥 Export Game Log to Excel"):
+            st.download_button("Download", archive.export_xlsx(seasons), "games.xlsx",
+                               "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
     else:
         st.info("No games logged yet.")
 
     st.divider()
     st.subheader("🗑️ Danger Zone")
-    if st.checkbox("I understand this cannot be undone"):
-        if st.button("🗑️ Permanently Clear ALL Game Data", type="primary"):
-            if os.path.exists(GAMES_FILE):
-                os.remove(GAMES_FILE)
-            st.success("✅ All game data deleted!")
+    doomed = st.multiselect("Seasons to delete", seasons_logged)
+    if doomed and st.checkbox("I understand this cannot be undone"):
+        if st.button(f"🗑️ Permanently Delete {', '.join(map(str, doomed))} Game Data", type="primary"):
+            archive.clear(doomed)
+            st.success("✅ Game data deleted! Other seasons are untouched.")
             st.rerun()
 
+prof.section("status")
+roster_cache_stats = roster_cache(team)
+st.sidebar.caption(f"Roster cache: {roster_cache_stats['hits']} hits • {roster_cache_stats['misses']} misses")
+sync_status = write_queue().status()
+if sync_status["pending"]:
+    retrying = f" ({sync_status['retrying']} retrying)" if sync_status["retrying"] else ""
+    st.sidebar.caption(f"⏳ Sync: {sync_status['pending']} save(s) pending{retrying}")
+    if sync_status["last_error"]:
+        st.sidebar.caption(f"Last sync error: {sync_status['last_error']}")
+elif sync_status["last_flushed"] and not sync_status["failed"]:
+    st.sidebar.caption(f"✅ All saves synced • last at {datetime.fromtimestamp(sync_status['last_flushed']):%H:%M:%S}")
+if sync_status["failed"]:
+    with st.sidebar.expander(f"⚠️ {sync_status['failed']} save(s) failed", expanded=True):
+        for job in write_queue().failed():
+            st.caption(f"{job['kind']} ({job['lane']}) • {datetime.fromtimestamp(job['created']):%b %d %H:%M} • "
+                       f"{job['attempts']} tries • {job['error']}")
+            retry_col, discard_col = st.columns(2)
+            if retry_col.button("🔁 Retry", key=f"retry_job_{job['id']}"):
+                write_queue().retry(job["id"])
+                st.rerun()
+            if discard_col.button("🗑️ Discard", key=f"discard_job_{job['id']}"):
+                write_queue().discard(job["id"])
+                st.rerun()
 st.sidebar.caption("v1.0 • Fixed Clearing • P+C Infield Rule • Auto-Save • Orioles ⚾")
+
+# ====================== DEBUG PANEL ======================
+if st.sidebar.checkbox("🛠️ Debug panel", key="debug_panel", help="Times every section and I/O call of each rerun. Tracing memory slows reruns down."):
+    prof.finish()
+    history = st.session_state.setdefault("profile_history", [])
+    history.append(prof.as_dict())
+    del history[:-20]
+    peaks = [r["peak_bytes"] for r in history if r["peak_bytes"]]
+    with st.sidebar.expander("⏱️ This rerun", expanded=True):
+        memory = f" • heap peak {peaks[-1] / 1e6:.1f} MB, session max {max(peaks) / 1e6:.1f} MB" if peaks else ""
+        rss = history[-1]["max_rss_kb"]
+        st.caption(f"{prof.label}: {prof.elapsed * 1000:.0f} ms{memory}" + (f" • process RSS max {rss / 1024:.0f} MB" if rss else ""))
+        st.dataframe(pd.DataFrame(prof.table()).round(2), hide_index=True, use_container_width=True)
+        st.caption(" • ".join(f"{k}: {v}" for k, v in sorted(prof.counters.items())) or "No I/O this rerun")
+        st.caption("Since server start: " + " • ".join(f"{k}: {v}" for k, v in sorted(profiling.totals.items())))
+        st.download_button("📥 Last 20 reruns (JSON)", profiling.to_json(history), "profile.json", "application/json")
+        st.download_button("📥 Chrome trace", profiling.chrome_trace(history), "trace.json", "application/json",
+                           help="Open in chrome://tracing or ui.perfetto.dev")
@@ -0,0 +1,560 @@
+"""Benchmarks for the hot paths behind app.py.
+
+    python benchmarks.py                          # run the suite, print a table
+    python benchmarks.py --json out.json          # ...and save machine-readable results
+    python benchmarks.py --baseline base.json     # ...and fail on cases slower than the baseline
+    python benchmarks.py --legacy                 # before/after comparisons for past optimizations
+
+The suite times each case over a grid of synthetic inputs (8-40 players, 4-9 innings,
+10-2,000 logged games), so results from two commits line up case by case.
+Needs the app's requirements (pandas, numpy) installed.
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from charts import downsample
+from game_archive import GameArchive
+from game_store import GAME_COLS, INNINGS_COLS, GameStore, summarize
+from derived_stats import derive, position_innings
+from gc_import import merge_gc_files, merge_gc_stats
+from lineup_card import render_card
+from rotation import POOL_PLAYER, POSITIONS, BenchLedger, EligibilityIndex, bench_options, can_play, solve_rotation
+from season import plan_season, season_totals
+from registry import PlayerRegistry
+from strategies import STRATEGIES, build_order
+from roster_sync import FakeWorksheet, RosterSync, frame_to_grid
+from team_store import TeamStore
+from workload import LITTLE_LEAGUE_REST, rest_days, workload
+
+TAGS = ["P", "C", "1B", "INF", "OF", "2B", "SS", "3B", "LF", "CF", "RF"]
+
+
+# ====================== SYNTHETIC DATA ======================
+def make_roster(n_players, seed=0, battery=0, pitchers=0):
+    """`battery` players get every tag, so a rotation can always cover P and C. The first `pitchers`
+    also get P: when half the team sits, each pitcher throws one inning."""
+    rng = random.Random(seed)
+    positions = [", ".join(rng.sample(TAGS, rng.randint(1, 4))) for _ in range(n_players)]
+    positions[:pitchers] = [p if "P" in p.split(", ") else p + ", P" for p in positions[:pitchers]]
+    positions[:battery] = ["P, C, 1B, INF, OF"] * min(battery, n_players)
+    return pd.DataFrame({
+        "ID": range(1, n_players + 1),
+        "name": [f"Player {i}" for i in range(1, n_players + 1)],
+        "jersey": [str(rng.randint(0, 99)) for _ in range(n_players)],
+        "b_t": [rng.choice(["R/R", "L/L", "R/L", "S/R"]) for _ in range(n_players)],
+        "age": [str(rng.randint(7, 14)) for _ in range(n_players)],
+        "positions": positions,
+    })
+
+
+def make_stats(roster, seed=0):
+    """Season stats in the shape the GC import saves (name + STAT_COLS)."""
+    rng = random.Random(seed)
+    rows = []
+    for name in roster["name"]:
+        ab = rng.randint(10, 80)
+        h = rng.randint(0, ab // 2)
+        walks = rng.randint(0, 12)
+        extra = rng.randint(0, h)
+        obp = (h + walks) / (ab + walks)
+        slg = (h + extra) / ab
+        ip = rng.randint(0, 30) / 3
+        rows.append({"name": name, "H": h, "AB": ab, "K": rng.randint(0, ab - h), "AVG": round(h / ab, 3),
+                     "OBP": round(obp, 3), "SLG": round(slg, 3), "OPS": round(obp + slg, 3),
+                     "IP": round(ip, 1), "ERA": round(rng.uniform(0, 12), 2) if ip else None})
+    return pd.DataFrame(rows)
+
+
+def make_gc_csv(roster, seed=0):
+    """A GameChanger export as CSV text: names in arbitrary case/spacing, extra columns, a few strangers."""
+    rng = random.Random(seed)
+    stats = make_stats(roster, seed).rename(columns={"name": "Player"})
+    stats["Player"] = [f" {n.upper()} " if rng.random() < 0.3 else n for n in stats["Player"]]
+    stats["GP"] = [rng.randint(1, 20) for _ in range(len(stats))]
+    strangers = make_stats(pd.DataFrame({"name": [f"Guest {i}" for i in range(3)]}), seed + 1)
+    gc = pd.concat([stats, strangers.rename(columns={"name": "Player"})], ignore_index=True)
+    return gc.sample(frac=1, random_state=seed).to_csv(index=False)
+
+
+def make_games(roster, n_games, n_innings=6, seed=0):
+    """A game log (GAME_COLS) for `n_games` games, one row per player who played."""
+    rng = random.Random(seed)
+    names = roster["name"].tolist()
+    ids = dict(zip(names, roster["ID"]))
+    start = pd.Timestamp("2024-03-01")
+    rows = []
+    for g in range(n_games):
+        date = start + pd.Timedelta(days=g * 2)
+        lineup = rng.sample(names, min(len(names), rng.randint(9, 13)))
+        innings = {p: dict.fromkeys(INNINGS_COLS, 0) for p in lineup}
+        for _ in range(n_innings):
+            rng.shuffle(lineup)
+            for pos, p in zip(POSITIONS, lineup):
+                innings[p][f"{pos}_innings"] += 1
+            for p in lineup[len(POSITIONS):]:
+                innings[p]["Bench_innings"] += 1
+        for p in lineup:
+            pitches = innings[p]["P_innings"] * rng.randint(10, 20)
+            rows.append({"ID": ids[p], "Player": p, **innings[p], "Pitches_Thrown": pitches, "date": date, "opponent": f"Team {g % 9}"})
+    return pd.DataFrame(rows, columns=GAME_COLS)
+
+
+def make_plan(players, n_innings, seed=0):
+    """Bench picks for every inning that follow the planner's rules."""
+    rng = random.Random(seed)
+    n_bench = max(0, len(players) - 9)
+    benches = {}
+    for i in range(1, n_innings + 1):
+        options = bench_options(players, benches, i)
+        benches[i] = rng.sample(options, min(n_bench, len(options)))
+    return benches
+
+
+def legacy_options(roster, available, pos):
+    # The per-dropdown scan the planner did before the eligibility index
+    return [p for p in available if p == POOL_PLAYER or can_play(roster.loc[roster['name']==p, 'positions'].iloc[0] if len(roster.loc[roster['name']==p]) > 0 else "", pos)]
+
+
+def bench_eligibility(n_players=24, n_innings=9, repeat=5):
+    roster = make_roster(n_players)
+    available = roster["name"].tolist() + [POOL_PLAYER]
+
+    def legacy():
+        for _ in range(n_innings):
+            for pos in POSITIONS:
+                legacy_options(roster, available, pos)
+
+    def indexed():
+        elig = EligibilityIndex(zip(roster["name"], roster["positions"]))  # includes the per-version build
+        for _ in range(n_innings):
+            for pos in POSITIONS:
+                elig.options(available, pos)
+
+    elig = EligibilityIndex(zip(roster["name"], roster["positions"]))
+    for pos in POSITIONS:
+        assert legacy_options(roster, available, pos) == elig.options(available, pos)
+
+    legacy_s = min(timeit.repeat(legacy, number=1, repeat=repeat))
+    indexed_s = min(timeit.repeat(indexed, number=1, repeat=repeat))
+    return {"players": n_players, "innings": n_innings, "legacy_s": legacy_s, "indexed_s": indexed_s,
+            "speedup": legacy_s / indexed_s if indexed_s else float("inf")}
+
+
+def bench_rotation_solver(n_players=18, n_innings=9, repeat=5):
+    roster = make_roster(n_players, pitchers=n_innings)
+    roster.loc[:3, "positions"] = "P, C, 1B, INF, OF"  # make sure the battery can be covered
+    elig = EligibilityIndex(zip(roster["name"], roster["positions"]))
+    team = roster["name"].tolist()
+    solve_s = min(timeit.repeat(lambda: solve_rotation(team, elig, n_innings), number=1, repeat=repeat))
+    return {"players": n_players, "innings": n_innings, "solve_s": solve_s}
+
+
+def bench_season_planner(n_players=15, n_games=20, n_innings=6, repeat=3):
+    rng = random.Random(0)
+    roster = make_roster(n_players)
+    roster.loc[:3, "positions"] = "P, C, 1B, INF, OF"
+    elig = EligibilityIndex(zip(roster["name"], roster["positions"]))
+    team = roster["name"].tolist()
+    upcoming = [{"players": rng.sample(team, rng.randint(10, n_players)), "innings": n_innings} for _ in range(n_games)]
+    plan_s = min(timeit.repeat(lambda: plan_season(upcoming, elig), number=1, repeat=repeat))
+    return {"players": n_players, "games": n_games, "plan_s": plan_s}
+
+
+def bench_roster_sync(n_players=30, repeat=5):
+    roster = make_roster(n_players)
+    for col in ("jersey", "b_t", "age"):
+        roster[col] = ""
+    edited = roster.copy()
+    edited.loc[3, "positions"] = "P, C"  # a one-cell edit
+
+    def legacy():
+        ws = FakeWorksheet(frame_to_grid(roster))
+        clean = edited[["ID", "name", "jersey", "b_t", "age", "positions"]]
+        ws.clear()
+        ws.update([clean.columns.values.tolist()] + clean.values.tolist())
+        return ws
+
+    def diffed():
+        ws = FakeWorksheet(frame_to_grid(roster))
+        RosterSync(ws).sync(edited)
+        return ws
+
+    legacy_ws, diffed_ws = legacy(), diffed()
+    assert legacy_ws.values == diffed_ws.values
+    return {"players": n_players,
+            "legacy_requests": legacy_ws.requests, "legacy_cells": legacy_ws.cells_written,
+            "diff_requests": diffed_ws.requests, "diff_cells": diffed_ws.cells_written,
+            "legacy_s": min(timeit.repeat(legacy, number=1, repeat=repeat)),
+            "diff_s": min(timeit.repeat(diffed, number=1, repeat=repeat))}
+
+
+def _team_saves(args):
+    path, team, n_saves = args
+    store = TeamStore(path)
+    latencies = []
+    for seq in range(n_saves):
+        rows = [{"Inning": i, "Bench": f"{team}-{seq}", "P": team, "C": str(seq)} for i in range(1, 10)]
+        start = time.perf_counter()
+        store.put(team, "rotation", rows)
+        latencies.append(time.perf_counter() - start)
+    return team, latencies
+
+
+def bench_team_store(n_teams=40, saves_per_team=50, workers=8):
+    """Load test: many teams saving concurrently from separate processes into one store."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "teams.sqlite")
+        TeamStore(path).close()
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_team_saves, [(path, f"team-{t}", saves_per_team) for t in range(n_teams)]))
+        elapsed = time.perf_counter() - start
+        store = TeamStore(path)
+        for team, _ in results:
+            doc = store.get(team, "rotation")
+            # Last write wins per team, and no team ever sees another team's data
+            assert doc[0]["Bench"] == f"{team}-{saves_per_team - 1}" and all(r["P"] == team for r in doc)
+            assert store.version(team, "rotation") == saves_per_team
+    latencies = sorted(l for _, ls in results for l in ls)
+    return {"teams": n_teams, "saves": len(latencies), "workers": workers, "elapsed_s": elapsed,
+            "saves_per_s": len(latencies) / elapsed, "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000}
+
+
+def make_pitch_log(n_pitchers=12, seasons=5, games_per_season=40, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for season in range(seasons):
+        opener = pd.Timestamp(2021 + season, 4, 1)
+        for g in range(games_per_season):
+            day = opener + pd.Timedelta(days=g * 3)
+            for p in rng.sample(range(n_pitchers), 3):
+                rows.append({"ID": f"P{p}", "date": day, "Pitches_Thrown": rng.randint(5, 85)})
+    return pd.DataFrame(rows)
+
+
+def legacy_workload(pitches, as_of):
+    # Row-at-a-time: walk each pitcher's games, the obvious way to write it
+    out = {}
+    for player in pitches["ID"].unique():
+        games = pitches[(pitches["ID"] == player) & (pitches["date"] <= as_of)]
+        next_ok, week, month = None, 0, 0
+        for _, g in games.iterrows():
+            rest = 0
+            for threshold, days in LITTLE_LEAGUE_REST:
+                if g["Pitches_Thrown"] >= threshold:
+                    rest = days
+            ok = g["date"] + pd.Timedelta(days=rest + 1)
+            next_ok = ok if next_ok is None else max(next_ok, ok)
+            age = (as_of - g["date"]).days
+            week += g["Pitches_Thrown"] if age < 7 else 0
+            month += g["Pitches_Thrown"] if age < 30 else 0
+        if next_ok is not None:
+            out[player] = (next_ok, week, month)
+    return out
+
+
+def bench_workload(seasons=5, repeat=3):
+    pitches = make_pitch_log(seasons=seasons)
+    as_of = pitches["date"].max()
+    fast = workload(pitches, as_of)
+    slow = legacy_workload(pitches, as_of)
+    assert {p: (r.next_eligible, r.pitches_7d, r.pitches_30d) for p, r in fast.iterrows()} == slow
+    assert list(rest_days([0, 20, 21, 50, 66, 120])) == [0, 0, 1, 2, 4, 4]
+    legacy_s = min(timeit.repeat(lambda: legacy_workload(pitches, as_of), number=1, repeat=repeat))
+    vector_s = min(timeit.repeat(lambda: workload(pitches, as_of), number=1, repeat=repeat))
+    return {"seasons": seasons, "pitching_days": len(pitches), "legacy_s": legacy_s, "vector_s": vector_s,
+            "speedup": legacy_s / vector_s}
+
+
+# ====================== SUITE ======================
+CASES = []
+_scratch = []
+
+
+def scratch_dir():
+    # One temp directory for cases that need files; removed when the interpreter exits
+    if not _scratch:
+        _scratch.append(tempfile.TemporaryDirectory())
+    return _scratch[0].name
+
+
+def case(name, **grid):
+    """Register `setup(**params) -> zero-arg callable` for every point in the parameter grid."""
+    def wrap(setup):
+        keys = list(grid)
+        for values in itertools.product(*grid.values()):
+            CASES.append((name, dict(zip(keys, values)), setup))
+        return setup
+    return wrap
+
+
+def measure(fn, repeat=5, min_time=0.02):
+    # Loop tiny cases until one timing run takes min_time, then report per-call seconds
+    number = 1
+    while True:
+        elapsed = timeit.timeit(fn, number=number)
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    times = [t / number for t in timeit.repeat(fn, number=number, repeat=repeat)]
+    return {"best_s": min(times), "median_s": statistics.median(times), "number": number, "repeat": repeat}
+
+
+@case("eligibility.options", players=(8, 18, 40), innings=(4, 6, 9))
+def _options_case(players, innings):
+    # Every dropdown the planner fills on one rerun
+    roster = make_roster(players)
+    elig = EligibilityIndex(zip(roster["name"], roster["positions"]))
+    available = roster["name"].tolist() + [POOL_PLAYER]
+    return lambda: [elig.options(available, pos) for _ in range(innings) for pos in POSITIONS]
+
+
+@case("rotation.bench_options", players=(8, 18, 40), innings=(4, 6, 9))
+def _bench_case(players, innings):
+    team = make_roster(players)["name"].tolist()
+    benches = make_plan(team, innings)
+    return lambda: [bench_options(team, benches, i) for i in range(1, innings + 1)]
+
+
+@case("rotation.ledger_edit", players=(8, 18, 40), innings=(4, 6, 9))
+def _ledger_case(players, innings):
+    # One bench edit in the last inning, as the planner fragment sees it: only that inning recomputes
+    team = make_roster(players)["name"].tolist()
+    ledger = BenchLedger(team)
+    for i, bench in make_plan(team, innings).items():
+        ledger.set_bench(i, bench)
+    picks = [ledger.benches.get(innings, []), ledger.options(innings)[:1]]
+    state = {"flip": 0}
+
+    def edit():
+        state["flip"] ^= 1
+        ledger.set_bench(innings, picks[state["flip"]])
+        return ledger.options(innings)
+    return edit
+
+
+@case("rotation.solve", players=(9, 12, 18), innings=(4, 6, 9))
+def _solve_case(players, innings):
+    roster = make_roster(players, battery=4, pitchers=innings)
+    elig = EligibilityIndex(zip(roster["name"], roster["positions"]))
+    team = roster["name"].tolist()
+    return lambda: solve_rotation(team, elig, innings)
+
+
+@case("strategies.build_order", strategy=tuple(STRATEGIES), players=(8, 18, 40))
+def _strategy_case(strategy, players):
+    roster = make_roster(players)
+    registry = PlayerRegistry(roster, make_stats(roster))
+    team = registry.labels()
+    return lambda: build_order(strategy, team, registry)
+
+
+@case("gc_import.merge", players=(8, 18, 40))
+def _gc_case(players):
+    roster = make_roster(players)
+    registry = PlayerRegistry(roster)
+    csv = make_gc_csv(roster)
+    return lambda: merge_gc_stats(registry, pd.read_csv(io.StringIO(csv)))
+
+
+@case("registry.build", players=(8, 18, 40))
+def _registry_case(players):
+    roster = make_roster(players)
+    stats = make_stats(roster)
+    return lambda: PlayerRegistry(roster, stats)
+
+
+@case("registry.resolve", players=(8, 18, 40))
+def _resolve_case(players):
+    registry = PlayerRegistry(make_roster(players))
+    # Exact, reordered, misspelled and unknown names, as a GC export mixes them
+    names = [f"PLAYER {i}" for i in range(1, players + 1)] + [f"{i} player" for i in range(1, players + 1)] + \
+            [f"Plyer {i}" for i in range(1, players + 1)] + [f"Guest {i}" for i in range(3)]
+    return lambda: [registry.resolve(n) for n in names]
+
+
+@case("lineup_card.render", players=(8, 18, 40), innings=(4, 9))
+def _card_case(players, innings):
+    roster = make_roster(players, battery=4, pitchers=innings)
+    elig = EligibilityIndex(zip(roster["name"], roster["positions"]))
+    team = roster["name"].tolist()[:18]
+    rows, _ = solve_rotation(team, elig, innings)
+    registry = PlayerRegistry(roster, derive(make_stats(roster)))
+    fielding = position_innings(summarize(make_games(roster, 20)))
+    logos = {"left_logo": "", "right_logo": ""}
+    return lambda: render_card(team, registry, rows, "2025-05-01", logos, "Tigers", fielding)
+
+
+@case("derived_stats.derive", players=(8, 18, 40))
+def _derive_case(players):
+    stats = make_stats(make_roster(players))
+    return lambda: derive(stats)
+
+
+@case("gc_import.merge_files", players=(8, 18, 40), files=(1, 4))
+def _gc_files_case(players, files):
+    roster = make_roster(players)
+    registry = PlayerRegistry(roster)
+    csvs = [make_gc_csv(roster, seed) for seed in range(files)]
+    return lambda: merge_gc_files(registry, [io.StringIO(csv) for csv in csvs])
+
+
+@case("reports.summarize", games=(10, 100, 500, 2000))
+def _summarize_case(games):
+    log = make_games(make_roster(15), games)
+    return lambda: summarize(log)
+
+
+@case("reports.store_summary", games=(10, 100, 500, 2000))
+def _store_summary_case(games):
+    # The Reports page reads the materialized table, so this should stay flat as games grow
+    store = GameStore(os.path.join(scratch_dir(), f"games_{games}.sqlite"))
+    store.append(make_games(make_roster(15), games))
+    return store.summary
+
+
+def _archive(games):
+    # make_games spaces games two days apart, so 2,000 games span about eleven seasons
+    archive = GameArchive(os.path.join(scratch_dir(), f"archive_{games}"))
+    if not archive.seasons():
+        archive.append(make_games(make_roster(15), games))
+    return archive
+
+
+@case("archive.read_month", games=(10, 100, 500, 2000))
+def _archive_month_case(games):
+    # One month of the latest season: the other seasons' files are never opened
+    archive = _archive(games)
+    end = archive.read(seasons=archive.seasons()[-1:])["date"].max()
+    return lambda: archive.read(start=end - pd.Timedelta(days=30), end=end)
+
+
+@case("archive.summary", games=(10, 100, 500, 2000))
+def _archive_summary_case(games):
+    return _archive(games).summary
+
+
+@case("charts.downsample", games=(10, 100, 500, 2000))
+def _downsample_case(games):
+    pitches = _archive(games).pitches_by_game()
+    return lambda: downsample(pitches, "Pitches_Thrown", by="ID")
+
+
+@case("season.season_totals", games=(10, 100, 500, 2000))
+def _season_totals_case(games):
+    log = make_games(make_roster(15), games)
+    return lambda: season_totals(log)
+
+
+@case("workload.workload", games=(10, 100, 500, 2000))
+def _workload_case(games):
+    log = make_games(make_roster(15), games)
+    pitches = log[log["Pitches_Thrown"] > 0][["ID", "date", "Pitches_Thrown"]]
+    as_of = log["date"].max()
+    return lambda: workload(pitches, as_of)
+
+
+def case_id(name, params):
+    return name + "[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+
+def git_revision():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return rev + ("-dirty" if dirty else "")
+
+
+def run_suite(match=None, repeat=5, min_time=0.02):
+    results = []
+    for name, params, setup in CASES:
+        cid = case_id(name, params)
+        if match and match not in cid:
+            continue
+        results.append({"id": cid, "name": name, "params": params, **measure(setup(**params), repeat, min_time)})
+    return {"meta": {"revision": git_revision(), "python": platform.python_version(), "pandas": pd.__version__,
+                     "platform": platform.platform(), "timestamp": datetime.now().isoformat(timespec="seconds")},
+            "results": results}
+
+
+def compare(current, baseline, tolerance=0.25):
+    """(id, baseline_s, current_s, ratio) per case found in both runs, and the ids slower than 1 + tolerance."""
+    before = {r["id"]: r["best_s"] for r in baseline["results"]}
+    rows = [(r["id"], before[r["id"]], r["best_s"], r["best_s"] / before[r["id"]])
+            for r in current["results"] if before.get(r["id"])]
+    return rows, [cid for cid, _, _, ratio in rows if ratio > 1 + tolerance]
+
+
+def run_legacy():
+    for n in (12, 24, 40):
+        r = bench_eligibility(n_players=n)
+        print(f"eligibility  players={r['players']:>2} innings={r['innings']}  "
+              f"legacy={r['legacy_s'] * 1000:8.2f} ms  indexed={r['indexed_s'] * 1000:6.3f} ms  x{r['speedup']:.0f}")
+    for n in (9, 12, 18):
+        r = bench_rotation_solver(n_players=n)
+        print(f"solver       players={r['players']:>2} innings={r['innings']}  solve={r['solve_s'] * 1000:6.2f} ms")
+    r = bench_season_planner()
+    print(f"season       players={r['players']:>2} games={r['games']}  plan={r['plan_s'] * 1000:6.1f} ms")
+    r = bench_roster_sync()
+    print(f"roster sync  players={r['players']:>2}  legacy={r['legacy_requests']} requests/{r['legacy_cells']} cells  "
+          f"diff={r['diff_requests']} requests/{r['diff_cells']} cells (one read, one batch_update)")
+    r = bench_team_store()
+    print(f"team store   teams={r['teams']} saves={r['saves']} workers={r['workers']}  {r['saves_per_s']:.0f} saves/s  "
+          f"p50={r['p50_ms']:.2f} ms  p99={r['p99_ms']:.2f} ms  (no lost or mixed-up writes)")
+    for n in (1, 5, 20):
+        r = bench_workload(seasons=n)
+        print(f"workload     seasons={r['seasons']:>2} pitching days={r['pitching_days']:>5}  "
+              f"legacy={r['legacy_s'] * 1000:8.1f} ms  vectorized={r['vector_s'] * 1000:6.2f} ms  x{r['speedup']:.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a JSON file from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs the baseline (0.25 = 25%%)")
+    parser.add_argument("-k", dest="match", help="only run cases whose id contains this text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--legacy", action="store_true", help="run the before/after comparisons instead")
+    args = parser.parse_args(argv)
+    if args.legacy:
+        run_legacy()
+        return 0
+
+    current = run_suite(args.match, args.repeat)
+    for r in current["results"]:
+        print(f"{r['id']:<62} {r['best_s'] * 1000:10.3f} ms  (median {r['median_s'] * 1000:.3f})")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(current, f, indent=2)
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows, slower = compare(current, baseline, args.tolerance)
+    print(f"\nvs {baseline['meta'].get('revision')}:")
+    for cid, before, after, ratio in rows:
+        flag = "  SLOWER" if cid in slower else ""
+        print(f"{cid:<62} {before * 1000:10.3f} -> {after * 1000:10.3f} ms  x{ratio:.2f}{flag}")
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+"""Pre-aggregation for Plotly: long histories are bucketed before they reach the browser."""
+import pandas as pd
+
+# (pandas frequency, label, approximate days per bucket), finest first
+BUCKETS = [("D", "day", 1), ("W", "week", 7), ("MS", "month", 30.4), ("QS", "quarter", 91.3), ("YS", "year", 365.25)]
+
+
+def bucket_for(start, end, max_buckets=120):
+    """The finest bucket that keeps a [start, end] span to at most max_buckets points per series."""
+    span = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+    for freq, label, days in BUCKETS:
+        if span / days <= max_buckets:
+            return freq, label
+    return BUCKETS[-1][:2]
+
+
+def downsample(df, values, by=None, date_col="date", how="sum", max_buckets=120):
+    """(frame, bucket label): df aggregated per `by` series into time buckets; daily data passes through."""
+    if df.empty:
+        return df, "day"
+    freq, label = bucket_for(df[date_col].min(), df[date_col].max(), max_buckets)
+    if freq == "D":
+        return df, label
+    keys = ([by] if by else []) + [pd.Grouper(key=date_col, freq=freq)]
+    return df.groupby(keys)[values].agg(how).reset_index(), label
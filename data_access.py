@@ -0,0 +1,54 @@
+"""Lazy, process-wide cache for on-disk artifacts, keyed by path, mtime and size.
+
+A rerun on an unchanged file costs one os.stat per path and no reads.
+"""
+import os
+import threading
+
+from profiling import count
+
+_cache = {}
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+
+def file_signature(*paths):
+    sig = []
+    for path in paths:
+        try:
+            info = os.stat(path)
+        except FileNotFoundError:
+            sig.append(None)
+        else:
+            sig.append((info.st_mtime_ns, info.st_size))
+    return tuple(sig)
+
+
+def cached(key, paths, compute):
+    """compute() once per signature of `paths`; callers must not mutate the result."""
+    return memoize(key, file_signature(*paths), compute)
+
+
+def memoize(key, sig, compute):
+    """compute() once per value of `sig` (any version marker); callers must not mutate the result."""
+    with _lock:
+        hit = _cache.get(key)
+        if hit and hit[0] == sig:
+            stats["hits"] += 1
+            count("cache.hits")
+            return hit[1]
+        stats["misses"] += 1
+    count("cache.misses")
+    value = compute()
+    with _lock:
+        _cache[key] = (sig, value)
+    return value
+
+
+def store_paths(store):
+    # Every file whose change means the store's contents changed (GameStore, GameArchive)
+    return store.files()
+
+
+def load_games(store):
+    return cached(("games", store.path), store_paths(store), store.read).copy()
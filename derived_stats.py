@@ -0,0 +1,68 @@
+"""Derived season metrics (BABIP, FIP, K%) and per-position innings for the lineup card.
+
+One vectorized pass over the imported stats frame; the app caches the result per
+season_stats version, and position innings come from the archive's materialized sums.
+"""
+import numpy as np
+import pandas as pd
+
+from game_store import LOG_POSITIONS
+
+DERIVED_COLS = ["BABIP", "FIP", "K%"]
+FIP_CONSTANT = 3.10  # puts FIP on the ERA scale; a league-wide average, so one constant for every team
+CARD_POSITIONS = ["C", "1B", "2B", "3B", "SS", "LF", "CF", "RF"]
+
+
+def ip_to_outs(ip):
+    """Baseball innings notation (5.2 = five and two-thirds) to outs; 4.33 or 4.5 are read as decimal innings."""
+    ip = pd.to_numeric(ip, errors="coerce")
+    whole = np.floor(ip)
+    tenths = np.round((ip - whole) * 10, 6)
+    return whole * 3 + np.where(np.isin(tenths, (0, 1, 2)), tenths, np.round((ip - whole) * 3))
+
+
+def outs_to_ip(outs):
+    return np.floor(outs / 3) + (outs % 3) / 10
+
+
+def _col(stats, name, default=np.nan):
+    if name in stats.columns:
+        return pd.to_numeric(stats[name], errors="coerce").to_numpy(dtype=float)
+    return np.full(len(stats), default)
+
+
+def _ratio(num, den):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def derive(stats):
+    """stats plus BABIP, FIP and K%; a metric is NaN where its inputs weren't imported.
+
+    Batting: H, AB, K, and optionally HR, BB, HBP, SF, PA. Pitching: IP, K_P, BB_P, HR_P, HBP_P.
+    """
+    out = stats.copy()
+    h, ab, k = _col(stats, "H"), _col(stats, "AB"), _col(stats, "K")
+    hr, sf, bb, hbp = (_col(stats, c, 0.0) for c in ("HR", "SF", "BB", "HBP"))
+    hr, sf, bb, hbp = (np.nan_to_num(c) for c in (hr, sf, bb, hbp))  # minor terms: missing counts as none
+    out["BABIP"] = _ratio(h - hr, ab - k - hr + sf).round(3)
+
+    pa = _col(stats, "PA")
+    pa = np.where(np.isnan(pa), ab + bb + hbp + sf, pa)
+    out["K%"] = (_ratio(k, pa) * 100).round(1)
+
+    innings = ip_to_outs(_col(stats, "IP")) / 3
+    hbp_p = np.nan_to_num(_col(stats, "HBP_P", 0.0))
+    fip = _ratio(13 * _col(stats, "HR_P") + 3 * (_col(stats, "BB_P") + hbp_p) - 2 * _col(stats, "K_P"), innings)
+    out["FIP"] = (fip + FIP_CONSTANT).round(2)
+    return out
+
+
+def position_innings(summary):
+    """{player ID: {position: innings}} for the card's fielding columns, from a game-archive summary."""
+    if summary.empty:
+        return {}
+    cols = [f"{pos}_innings" for pos in CARD_POSITIONS if pos in LOG_POSITIONS]
+    table = summary.set_index("ID")[cols]
+    table.columns = [c.removesuffix("_innings") for c in cols]
+    return table.to_dict("index")
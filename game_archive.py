@@ -0,0 +1,156 @@
+"""Game logs partitioned by season: one GameStore file per season under a team's directory.
+
+Range, opponent and season queries open only the partitions they overlap, and report totals
+come from each partition's materialized summary, so years of history cost about as much as
+the seasons actually asked for. Old seasons stay on disk until cleared one season at a time.
+"""
+import io
+import os
+import re
+import threading
+from contextlib import closing
+
+import pandas as pd
+
+from data_access import cached
+from game_store import GAME_COLS, SUM_COLS, GameStore, with_totals
+from team_store import DEFAULT_TEAM
+
+PARTITION = re.compile(r"(\d{4})\.sqlite")
+
+
+def season_of(date):
+    return pd.Timestamp(date).year
+
+
+def team_archive(data_dir, team):
+    """A team's archive under data_dir, after the one-time import of its pre-archive game files.
+
+    The default team keeps the original layout (data/games.xlsx -> data/games.sqlite -> data/games/);
+    other teams live under data/teams/<team>/.
+    """
+    if team == DEFAULT_TEAM:
+        archive = GameArchive(os.path.join(data_dir, "games"))
+        games_db, games_xlsx = os.path.join(data_dir, "games.sqlite"), os.path.join(data_dir, "games.xlsx")
+        if os.path.exists(games_xlsx) or os.path.exists(games_db):
+            GameStore(games_db).migrate_from_xlsx(games_xlsx)
+            archive.import_store(games_db)
+        return archive
+    archive = GameArchive(os.path.join(data_dir, "teams", team, "games"))
+    archive.import_store(os.path.join(data_dir, "teams", team, "games.sqlite"))
+    return archive
+
+
+class GameArchive:
+    def __init__(self, path):
+        self.path = path  # made by the first append, so a team that never logs a game leaves no trace
+        self._parts = {}
+        self._lock = threading.Lock()
+
+    def seasons(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(int(m.group(1)) for m in map(PARTITION.fullmatch, os.listdir(self.path)) if m)
+
+    def partition(self, season, create=False):
+        """The season's GameStore, or None if nothing was logged that season (unless create)."""
+        path = os.path.join(self.path, f"{season}.sqlite")
+        with self._lock:
+            if season not in self._parts or not os.path.exists(path):
+                if not create and not os.path.exists(path):
+                    return None
+                os.makedirs(self.path, exist_ok=True)
+                self._parts[season] = GameStore(path)
+            return self._parts[season]
+
+    def partitions(self, start=None, end=None, seasons=None):
+        # Partition pruning: only seasons that overlap [start, end] and the requested list
+        lo = season_of(start) if start is not None else None
+        hi = season_of(end) if end is not None else None
+        picked = [s for s in self.seasons()
+                  if (lo is None or s >= lo) and (hi is None or s <= hi) and (seasons is None or s in seasons)]
+        return [p for p in map(self.partition, picked) if p is not None]
+
+    def files(self):
+        # The directory's mtime moves when a season is added or cleared
+        return [self.path] + [f for p in self.partitions() for f in p.files()]
+
+    def append(self, played):
+        """Route one logged game's rows to their seasons' partitions; returns rows written."""
+        if played.empty:
+            return 0
+        seasons = pd.to_datetime(played["date"]).dt.year
+        return sum(self.partition(int(season), create=True).append(rows) for season, rows in played.groupby(seasons))
+
+    def read(self, player_id=None, start=None, end=None, opponent=None, seasons=None):
+        frames = [p.read(player_id, start, end, opponent) for p in self.partitions(start, end, seasons)]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=GAME_COLS).astype({"date": "datetime64[ns]"})
+        return pd.concat(frames, ignore_index=True)
+
+    def count(self, seasons=None):
+        return sum(p.count() for p in self.partitions(seasons=seasons))
+
+    def opponents(self, seasons=None):
+        return sorted({o for p in self.partitions(seasons=seasons) for o in p.opponents()})
+
+    def summary(self, seasons=None):
+        """Per-player totals over the chosen seasons, from the partitions' materialized sums."""
+        # Closed seasons never change, so their summaries are read once per file version
+        parts = [cached(("season_summary", p.path), p.files(), p.summary) for p in self.partitions(seasons=seasons)]
+        parts = [s for s in parts if not s.empty]
+        if not parts:
+            return with_totals(pd.DataFrame(columns=["ID", "Player"] + SUM_COLS))
+        by_id = pd.concat(parts, ignore_index=True).groupby("ID", sort=True)  # partitions come oldest first
+        combined = pd.concat([by_id["Player"].last(), by_id[SUM_COLS].sum()], axis=1).reset_index()
+        return with_totals(combined.sort_values("Player", kind="stable", ignore_index=True))
+
+    def pitches_by_game(self, start=None, end=None, seasons=None):
+        frames = [p.pitches_by_game(start, end) for p in self.partitions(start, end, seasons)]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame({"ID": pd.Series(dtype=str), "date": pd.Series(dtype="datetime64[ns]"),
+                                 "Pitches_Thrown": pd.Series(dtype=int)})
+        return pd.concat(frames, ignore_index=True)
+
+    def assign_ids(self, ids):
+        """GameStore.assign_ids over every season; returns labels matched."""
+        return sum(p.assign_ids(ids) for p in self.partitions())
+
+    def clear(self, seasons=None):
+        """Delete the given seasons' partitions (every season if None); others are untouched."""
+        for season in self.seasons() if seasons is None else seasons:
+            with self._lock:
+                self._parts.pop(season, None)
+            base = os.path.join(self.path, f"{season}.sqlite")
+            for path in (base, base + "-wal", base + "-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def export_xlsx(self, seasons=None):
+        buf = io.BytesIO()
+        self.read(seasons=seasons).to_excel(buf, index=False)
+        return buf.getvalue()
+
+    def import_store(self, path):
+        """One-time copy of a single-file GameStore into season partitions; returns rows imported.
+
+        The source file is left in place and marked, so later calls are no-ops. The check, copy and
+        mark run under an exclusive lock on the source, so concurrent callers import it once.
+        """
+        if not os.path.exists(path):
+            return 0
+        legacy = GameStore(path)
+        with closing(legacy.connect()) as conn:
+            conn.execute("BEGIN EXCLUSIVE")
+            try:
+                if conn.execute("SELECT 1 FROM meta WHERE key = 'archived'").fetchone():
+                    return 0
+                imported = self.append(legacy.read())  # WAL: other connections can still read
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('archived', ?)", (self.path,))
+                conn.commit()
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+        return imported
@@ -0,0 +1,231 @@
+"""Append-only SQLite store for logged games (replaces rewriting games.xlsx).
+
+Rows carry the player's roster ID as well as the label shown when the game was logged; totals and
+pitch counts are keyed by ID, so renaming a player (or telling two Sam Smiths apart) keeps their history.
+"""
+import io
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+LOG_POSITIONS = ["P", "C", "1B", "2B", "3B", "SS", "LF", "CF", "RF", "DH"]
+INNINGS_COLS = [f"{pos}_innings" for pos in LOG_POSITIONS] + ["Bench_innings"]
+GAME_COLS = ["ID", "Player"] + INNINGS_COLS + ["Pitches_Thrown", "date", "opponent"]
+SUM_COLS = INNINGS_COLS + ["Pitches_Thrown"]
+# Rows logged before IDs were stored, and not yet matched by assign_ids(), are keyed by their label
+PLAYER_KEY = """COALESCE(NULLIF(player_id, ''), "Player")"""
+
+
+def _sql_name(col):
+    # 1B_innings etc. aren't valid bare identifiers; SQLite names are case-blind, so "ID" would clash with the row id
+    return "player_id" if col == "ID" else f'"{col}"'
+
+
+def with_totals(summary):
+    summary[INNINGS_COLS] = summary[INNINGS_COLS].round(1)
+    summary["Total_Field_Innings"] = summary[[c for c in INNINGS_COLS if c != "Bench_innings"]].sum(axis=1)
+    return summary
+
+
+def player_ids(games):
+    """Each game-log row's player key: its roster ID, or its label if it was logged without one."""
+    if "ID" not in games.columns:
+        return games["Player"]
+    ids = games["ID"]
+    blank = ids.isna() | (ids == "")
+    return ids.mask(blank, games["Player"]) if blank.any() else ids
+
+
+def summarize(games):
+    """GameStore.summary() computed from a game-log frame rather than the materialized table."""
+    ids = player_ids(games).to_numpy()
+    summary = games[SUM_COLS].groupby(ids, sort=True).sum().astype(float)
+    newest = ~pd.Series(ids).duplicated(keep="last").to_numpy()  # rows come oldest first; keep each ID's latest label
+    summary.insert(0, "Player", pd.Series(games["Player"].to_numpy()[newest], index=ids[newest]))
+    return with_totals(summary.rename_axis("ID").reset_index().sort_values("Player", kind="stable", ignore_index=True))
+
+
+class GameStore:
+    def __init__(self, path):
+        self.path = path
+        with closing(self.connect()) as conn, conn:
+            cols = ", ".join(f"{_sql_name(c)} REAL NOT NULL DEFAULT 0" for c in INNINGS_COLS)
+            conn.execute(f"""CREATE TABLE IF NOT EXISTS game_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                player_id TEXT NOT NULL DEFAULT '', "Player" TEXT NOT NULL, {cols},
+                "Pitches_Thrown" INTEGER NOT NULL DEFAULT 0,
+                date TEXT NOT NULL, opponent TEXT NOT NULL DEFAULT '')""")
+            self._migrate_ids(conn)
+            conn.execute('CREATE INDEX IF NOT EXISTS game_logs_id_date ON game_logs (player_id, date)')
+            conn.execute("CREATE INDEX IF NOT EXISTS game_logs_date ON game_logs (date)")
+            conn.execute("CREATE INDEX IF NOT EXISTS game_logs_opponent_date ON game_logs (opponent, date)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            # Materialized aggregates, kept current by append() so reports never scan game_logs
+            sums = ", ".join(f"{_sql_name(c)} REAL NOT NULL DEFAULT 0" for c in SUM_COLS)
+            conn.execute(f'CREATE TABLE IF NOT EXISTS player_summary (player_id TEXT PRIMARY KEY, "Player" TEXT NOT NULL, {sums})')
+            conn.execute("""CREATE TABLE IF NOT EXISTS daily_pitches (
+                player_id TEXT NOT NULL, date TEXT NOT NULL, "Pitches_Thrown" INTEGER NOT NULL,
+                PRIMARY KEY (player_id, date))""")
+            conn.execute("CREATE INDEX IF NOT EXISTS daily_pitches_date ON daily_pitches (date)")
+            built = conn.execute("SELECT 1 FROM meta WHERE key = 'summary_built'").fetchone()
+        if not built:
+            self.rebuild_summary()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _migrate_ids(self, conn):
+        # Stores from before roster IDs: add the column and rebuild the label-keyed aggregates by ID
+        if "player_id" not in {row[1] for row in conn.execute("PRAGMA table_info(game_logs)")}:
+            conn.execute("""ALTER TABLE game_logs ADD COLUMN player_id TEXT NOT NULL DEFAULT ''""")
+            conn.execute("DROP INDEX IF EXISTS game_logs_player_date")
+        if "Player" in {row[1] for row in conn.execute("PRAGMA table_info(daily_pitches)")}:
+            conn.execute("DROP TABLE player_summary")
+            conn.execute("DROP TABLE daily_pitches")
+            conn.execute("DELETE FROM meta WHERE key = 'summary_built'")
+
+    def files(self):
+        # WAL mode lands writes in the -wal file before checkpointing into the main file
+        return [self.path, self.path + "-wal"]
+
+    def append(self, played):
+        """Insert the rows of one logged game; returns how many were written."""
+        if played.empty:
+            return 0
+        # Blank cells (the log editor, a legacy sheet) arrive as NaN, which `or 0` lets through
+        counts = played.reindex(columns=SUM_COLS).apply(pd.to_numeric, errors="coerce").fillna(0)
+        text = played.reindex(columns=["ID", "Player", "opponent"]).fillna("").astype(str)
+        rows = [[pid, player] + innings + [int(pitches), pd.Timestamp(day).date().isoformat(), opponent]
+                for pid, player, innings, pitches, day, opponent in zip(
+                    text["ID"], text["Player"], counts[INNINGS_COLS].to_numpy(dtype=float).tolist(),
+                    counts["Pitches_Thrown"].tolist(), played["date"], text["opponent"])]
+        cols = ", ".join(_sql_name(c) for c in GAME_COLS)
+        marks = ", ".join("?" * len(GAME_COLS))
+        sum_cols = ", ".join(_sql_name(c) for c in SUM_COLS)
+        bump = ", ".join(f"{_sql_name(c)} = {_sql_name(c)} + excluded.{_sql_name(c)}" for c in SUM_COLS)
+        with closing(self.connect()) as conn, conn:
+            conn.executemany(f"INSERT INTO game_logs ({cols}) VALUES ({marks})", rows)
+            # The summary keeps the latest label for players no longer on the roster
+            conn.executemany(
+                f'INSERT INTO player_summary (player_id, "Player", {sum_cols}) VALUES (?, ?, {", ".join("?" * len(SUM_COLS))}) '
+                f'ON CONFLICT (player_id) DO UPDATE SET "Player" = excluded."Player", {bump}',
+                [[row[0] or row[1]] + row[1:len(SUM_COLS) + 2] for row in rows])
+            conn.executemany(
+                'INSERT INTO daily_pitches VALUES (?, ?, ?) ON CONFLICT (player_id, date) '
+                'DO UPDATE SET "Pitches_Thrown" = "Pitches_Thrown" + excluded."Pitches_Thrown"',
+                [(row[0] or row[1], row[-2], row[-3]) for row in rows if row[-3] > 0])
+        return len(rows)
+
+    def read(self, player_id=None, start=None, end=None, opponent=None):
+        """Game log rows, optionally filtered by roster ID, opponent and an inclusive date range (indexed)."""
+        where, args = [], []
+        if player_id is not None:
+            where.append('player_id = ?')
+            args.append(player_id)
+        if opponent is not None:
+            where.append("opponent = ?")
+            args.append(opponent)
+        if start is not None:
+            where.append("date >= ?")
+            args.append(pd.Timestamp(start).date().isoformat())
+        if end is not None:
+            where.append("date <= ?")
+            args.append(pd.Timestamp(end).date().isoformat())
+        sql = f"SELECT {', '.join(_sql_name(c) for c in GAME_COLS)} FROM game_logs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with closing(self.connect()) as conn:
+            games = pd.read_sql_query(sql + " ORDER BY date, id", conn, params=args).rename(columns={"player_id": "ID"})
+        games["date"] = pd.to_datetime(games["date"])
+        return games
+
+    def count(self):
+        with closing(self.connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM game_logs").fetchone()[0]
+
+    def opponents(self):
+        with closing(self.connect()) as conn:
+            return [r[0] for r in conn.execute("SELECT DISTINCT opponent FROM game_logs WHERE opponent != '' ORDER BY opponent")]
+
+    def clear(self):
+        with closing(self.connect()) as conn, conn:
+            conn.execute("DELETE FROM game_logs")
+        self.rebuild_summary()
+
+    def rebuild_summary(self):
+        """Recompute the materialized tables from game_logs. Call after editing or deleting logs."""
+        sums = ", ".join(f"SUM({_sql_name(c)}) AS {_sql_name(c)}" for c in SUM_COLS)
+        sum_cols = ", ".join(_sql_name(c) for c in SUM_COLS)
+        with closing(self.connect()) as conn, conn:
+            conn.execute("DELETE FROM player_summary")
+            conn.execute("DELETE FROM daily_pitches")
+            # The newest row's label per ID (SQLite takes bare columns from the MAX(id) row)
+            conn.execute(f'INSERT INTO player_summary SELECT player_id, "Player", {sum_cols} FROM ('
+                         f'SELECT {PLAYER_KEY} AS player_id, "Player", MAX(id), {sums} FROM game_logs GROUP BY 1)')
+            conn.execute(f'INSERT INTO daily_pitches SELECT {PLAYER_KEY}, date, SUM("Pitches_Thrown") FROM game_logs '
+                         'WHERE "Pitches_Thrown" > 0 GROUP BY 1, date')
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('summary_built', '1')")
+
+    def assign_ids(self, ids):
+        """Give rows logged without a roster ID the ID now behind their label ({label: ID}); returns labels matched.
+
+        A one-time match for logs from before IDs were stored: once a row has its ID, relabeling
+        the player no longer moves its history.
+        """
+        with closing(self.connect()) as conn, conn:
+            labels = [row[0] for row in conn.execute("""SELECT DISTINCT "Player" FROM game_logs WHERE player_id = ''""")]
+            matched = [(ids[label], label) for label in labels if label in ids]
+            for pid, label in matched:
+                conn.execute("""UPDATE game_logs SET player_id = ? WHERE player_id = '' AND "Player" = ?""", (pid, label))
+        if matched:
+            self.rebuild_summary()
+        return len(matched)
+
+    def summary(self):
+        """Per-player season totals in the shape the Reports page shows."""
+        with closing(self.connect()) as conn:
+            summary = pd.read_sql_query('SELECT * FROM player_summary ORDER BY "Player"', conn)
+        return with_totals(summary.rename(columns={"player_id": "ID"}))
+
+    def pitches_by_game(self, start=None, end=None):
+        """Pitches per player ID per day, optionally within an inclusive date range (indexed)."""
+        where, args = [], []
+        if start is not None:
+            where.append("date >= ?")
+            args.append(pd.Timestamp(start).date().isoformat())
+        if end is not None:
+            where.append("date <= ?")
+            args.append(pd.Timestamp(end).date().isoformat())
+        sql = "SELECT * FROM daily_pitches" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY date"
+        with closing(self.connect()) as conn:
+            pitches = pd.read_sql_query(sql, conn, params=args).rename(columns={"player_id": "ID"})
+        pitches["date"] = pd.to_datetime(pitches["date"])
+        return pitches
+
+    def migrate_from_xlsx(self, xlsx_path):
+        """One-time import of a legacy games.xlsx; later calls are no-ops. Returns rows imported."""
+        with closing(self.connect()) as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'xlsx_migrated'").fetchone():
+                return 0
+        imported = 0
+        if os.path.exists(xlsx_path):
+            legacy = pd.read_excel(xlsx_path)
+            if not legacy.empty and "Player" in legacy.columns:
+                legacy = legacy.copy()
+                if "date" not in legacy.columns:
+                    legacy["date"] = pd.Timestamp.today()
+                legacy["date"] = pd.to_datetime(legacy["date"]).fillna(pd.Timestamp.today())
+                imported = self.append(legacy)
+        with closing(self.connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('xlsx_migrated', ?)", (xlsx_path,))
+        return imported
+
+    def export_xlsx(self):
+        """The whole log as .xlsx bytes, for coaches who still want the spreadsheet."""
+        buf = io.BytesIO()
+        self.read().to_excel(buf, index=False)
+        return buf.getvalue()
@@ -0,0 +1,94 @@
+"""GameChanger season-stats CSV import.
+
+Several exports (e.g. separate batting and pitching files, or one per tournament) fold into
+one row per roster player: counts add up, rates are averaged weighted by AB (ERA by innings).
+GC repeats batting column names in the pitching section, which pandas reads as "SO.1" etc.
+"""
+import numpy as np
+import pandas as pd
+
+from derived_stats import ip_to_outs, outs_to_ip
+from registry import name_key
+
+STAT_COLS = ["H", "AB", "K", "AVG", "OBP", "SLG", "OPS", "IP", "ERA"]
+GC_ALIASES = {"SO": "K", "SO.1": "K_P", "BB.1": "BB_P", "HR.1": "HR_P", "HBP.1": "HBP_P"}
+PITCHING_ALIASES = {"SO": "K_P", "K": "K_P", "BB": "BB_P", "HR": "HR_P", "HBP": "HBP_P"}  # pitching-only export
+COUNT_COLS = ["PA", "AB", "H", "HR", "BB", "HBP", "SF", "K", "IP", "ER", "K_P", "BB_P", "HR_P", "HBP_P"]
+RATE_WEIGHTS = {"AVG": "AB", "OBP": "AB", "SLG": "AB", "OPS": "AB", "ERA": "IP"}
+IMPORT_COLS = STAT_COLS + [c for c in COUNT_COLS if c not in STAT_COLS]
+_WANTED = set(IMPORT_COLS) | set(GC_ALIASES) | set(PITCHING_ALIASES) | {"Player", "First", "Last", "Number"}
+
+
+def read_gc(source):
+    """One export (path, upload or frame) with only the columns the import uses, under their import names."""
+    gc = source if isinstance(source, pd.DataFrame) else pd.read_csv(source, usecols=lambda c: c in _WANTED)
+    aliases = PITCHING_ALIASES if "IP" in gc.columns and "AB" not in gc.columns else GC_ALIASES
+    gc = gc.rename(columns={a: c for a, c in aliases.items() if a in gc.columns and c not in gc.columns})
+    if "Player" not in gc.columns:
+        if not {"First", "Last"} <= set(gc.columns):
+            raise ValueError("GC export needs a Player column (or First and Last)")
+        gc = gc.assign(Player=gc["First"].fillna("").astype(str) + " " + gc["Last"].fillna("").astype(str))
+    return gc
+
+
+def _fold(gc, ids):
+    # Per-ID partial sums for one export: counts, IP as outs, and weighted sums for the rates
+    gc = gc.assign(ID=ids).dropna(subset=["ID"]).drop_duplicates("ID")
+    num = {c: pd.to_numeric(gc[c], errors="coerce").to_numpy(dtype=float) for c in IMPORT_COLS if c in gc.columns}
+    part = {c: v for c, v in num.items() if c not in RATE_WEIGHTS}
+    if "IP" in num:
+        part["IP:n"] = np.where(np.isnan(num["IP"]), np.nan, 1.0)
+        part["IP:sum"] = num["IP"]
+        part["IP"] = num["IP"] = ip_to_outs(num["IP"])
+    for rate, weight in RATE_WEIGHTS.items():
+        if rate in num:
+            has = ~np.isnan(num[rate])
+            w = num.get(weight, np.full(len(gc), np.nan))
+            w = np.where(has & (w > 0), w, np.nan)
+            part[f"{rate}:w"], part[f"{rate}:rw"] = w, num[rate] * w
+            part[f"{rate}:n"], part[f"{rate}:sum"] = np.where(has, 1.0, np.nan), num[rate]
+    return pd.DataFrame(part, index=gc["ID"].to_numpy())
+
+
+def merge_gc_files(registry, sources):
+    """(stats, unmatched, guessed) for one or more GC exports, read and folded one at a time.
+
+    stats has one row per roster player (ID, name label, IMPORT_COLS present in any export;
+    NaN if the player isn't in them). unmatched lists export names that resolved to no roster
+    ID; guessed maps names matched by spelling rather than exactly to their roster label.
+    """
+    totals, unmatched, guessed, resolved = None, [], {}, {}
+    for source in sources:
+        gc = read_gc(source)
+        jerseys = gc["Number"] if "Number" in gc.columns else [None] * len(gc)
+        ids = [resolved.setdefault((name, jersey), registry.resolve(name, jersey))
+               for name, jersey in zip(gc["Player"], jerseys)]
+        for name, pid in zip(gc["Player"], ids):
+            name = str(name).strip()
+            if pid is None:
+                unmatched.append(name)
+            elif sorted(name_key(name).split()) != sorted(name_key(registry[pid].name).split()):
+                guessed[name] = registry[pid].label
+        part = _fold(gc, ids)
+        totals = part if totals is None else totals.add(part, fill_value=0)  # NaN only where neither has a value
+
+    players = pd.DataFrame({"ID": registry.ids(), "name": registry.labels()})
+    if totals is None or totals.empty:
+        return players, unmatched, guessed
+    t = {c: totals[c].to_numpy() for c in totals.columns}
+    stats = {"ID": totals.index.to_numpy()}
+    for col in IMPORT_COLS:
+        if col in RATE_WEIGHTS and f"{col}:n" in t:
+            # A value from a single export is kept as GC reported it
+            with np.errstate(divide="ignore", invalid="ignore"):
+                weighted = np.round(t[f"{col}:rw"] / t[f"{col}:w"], 2 if col == "ERA" else 3)
+            stats[col] = np.where(t[f"{col}:n"] == 1, t[f"{col}:sum"], weighted)
+        elif col == "IP" and col in t:
+            stats[col] = np.where(t["IP:n"] == 1, t["IP:sum"], outs_to_ip(t["IP"]))
+        elif col in t:
+            stats[col] = t[col]
+    return players.merge(pd.DataFrame(stats), on="ID", how="left"), unmatched, guessed
+
+
+def merge_gc_stats(registry, gc):
+    return merge_gc_files(registry, [gc])
@@ -0,0 +1,371 @@
+"""Game-day planning without Streamlit: plain functions, a CLI and a small local HTTP API.
+
+    python headless.py plan --roster roster.csv --team orioles --date 2026-05-02 --opponent Cubs --out cards
+    python headless.py batch schedule.csv --roster roster.csv --workers 8 --out cards
+    python headless.py available --team orioles "Player A" "Player B"
+    python headless.py serve --roster roster.csv --port 8765
+
+Each game is planned with its own team's roster: the rows of a CSV/xlsx export whose team column
+names it (an export without that column is every team's roster) or, with --credentials, the team's
+tab of the Google Sheet.
+Availability, season stats, pitch rules and game logs come from the same data directory the app
+uses, so a batch run plans exactly what a coach would see on the pages.
+"""
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import gspread
+import pandas as pd
+
+from derived_stats import derive, position_innings
+from game_archive import team_archive
+from lineup_card import card_filename, card_logos, html_to_pdf, render_card
+from rotation import MIN_PLAYERS, EligibilityIndex, RotationError, solve_rotation
+from roster_sync import ROSTER_COLS, normalize_roster, team_worksheet
+from season import season_totals
+from registry import PlayerRegistry
+from strategies import STRATEGIES, build_order
+from team_store import DEFAULT_TEAM, TeamStore, team_slug
+from workload import DEFAULT_RULES, RULES, lookback, resting, workload
+
+DATA_DIR = "data"
+SHEET_NAME = "LittleLeague Roster"
+
+
+# ====================== OPERATIONS ======================
+def load_roster(path=None, credentials=None, sheet=SHEET_NAME, team=DEFAULT_TEAM):
+    """A team's roster from a CSV/xlsx export, or from its tab of the Google Sheet given a service-account key file.
+
+    An export with a team column holds several teams (a blank team is the default team's player).
+    """
+    if path:
+        raw = pd.read_excel(path, dtype=str) if path.endswith((".xlsx", ".xls")) else pd.read_csv(path, dtype=str)
+        if "team" in raw.columns:
+            raw = raw[raw["team"].fillna("").map(team_slug) == team_slug(team)].reset_index(drop=True)
+    elif credentials:
+        book = gspread.service_account(filename=credentials).open(sheet)
+        raw = pd.DataFrame(team_worksheet(book, team_slug(team), create=False).get_all_records())
+    else:
+        raise ValueError("Pass a roster file or a service-account credentials file")
+    return normalize_roster(raw).reset_index(drop=True)
+
+
+def roster_source(path=None, credentials=None, sheet=SHEET_NAME):
+    """team -> roster records, each team's roster read once; raises ValueError for a team with no roster tab."""
+    rosters = {}
+
+    def roster(team):
+        team = team_slug(team or DEFAULT_TEAM)
+        if team not in rosters:
+            rosters[team] = load_roster(path, credentials, sheet, team).to_dict("records")
+        return rosters[team]
+    return roster
+
+
+def with_rosters(jobs, roster):
+    # Each job gets its own team's roster; a team that has none fails alone instead of the whole batch
+    out = []
+    for job in jobs:
+        try:
+            out.append({**job, "roster": roster(job.get("team"))})
+        except ValueError as e:
+            out.append({**job, "roster": [], "roster_error": str(e)})
+    return out
+
+
+def open_store(data_dir=DATA_DIR):
+    os.makedirs(data_dir, exist_ok=True)
+    return TeamStore(os.path.join(data_dir, "teams.sqlite"))
+
+
+def set_availability(team, players, data_dir=DATA_DIR):
+    store = open_store(data_dir)
+    try:
+        store.put(team_slug(team), "available", list(players))
+    finally:
+        store.close()
+
+
+def make_rotation(players, registry, innings=6, game_date=None, team=DEFAULT_TEAM, data_dir=DATA_DIR, rules=None):
+    """solve_rotation with the planner's inputs: roster tags, pitchers on rest, this season's innings.
+
+    Returns (rows, notes, {pitcher on rest: next eligible date}).
+    """
+    date = pd.Timestamp(game_date if game_date is not None else pd.Timestamp.today()).normalize()
+    rules = rules or {"name": DEFAULT_RULES, **RULES[DEFAULT_RULES]}
+    archive = team_archive(data_dir, team)
+    archive.assign_ids(registry.ids_by_label())  # games logged before IDs were stored
+    history = archive.pitches_by_game(start=date - pd.Timedelta(days=lookback(rules)), end=date)
+    # History is keyed by roster ID; the solver works on today's labels
+    on_rest = registry.relabel(resting(workload(history, date, rules, registry.ages()),
+                                       [registry.by_label(p).id for p in players if p in registry]))
+    season = archive.partition(date.year)
+    elig = EligibilityIndex(registry.eligibility()).without("P", on_rest)
+    totals = registry.relabel(season_totals(season.read())) if season else None
+    rows, notes = solve_rotation(players, elig, innings, season=totals)
+    return rows, notes, on_rest
+
+
+def make_order(players, registry, strategy="value"):
+    return build_order(strategy, players, registry)
+
+
+def plan_game(job):
+    """Rotation, batting order and lineup card for one game.
+
+    `job` has roster (the team's records), date and optionally team, opponent, players (defaults to
+    the team's saved availability, then the whole roster), innings, strategy, card ("html", "pdf" or
+    None), save (store the rotation and lineup for the team's pages) and data_dir. Runs in pool
+    workers, so it opens and closes its own stores. A game with fewer than MIN_PLAYERS of the team's
+    players, or whose rotation can't be built, comes back as "error".
+    """
+    data_dir = job.get("data_dir", DATA_DIR)
+    team = team_slug(job.get("team") or DEFAULT_TEAM)
+    roster = pd.DataFrame(job["roster"], columns=ROSTER_COLS)
+    result = {"team": team, "date": pd.Timestamp(job["date"]).date().isoformat(), "opponent": job.get("opponent", "")}
+    if job.get("roster_error"):
+        return {**result, "players": [], "error": job["roster_error"]}
+    store = open_store(data_dir)
+    try:
+        available, stats, rules = (store.get(team, name) for name in ("available", "season_stats", "pitch_rules"))
+        registry = PlayerRegistry(roster, derive(pd.DataFrame(stats or [])))
+        players = [p for p in job.get("players") or available or registry.labels() if p in registry]
+        if len(players) < MIN_PLAYERS:
+            return {**result, "players": players,
+                    "error": f"{len(players)} of {team}'s players available; a game needs at least {MIN_PLAYERS}"}
+        try:
+            rows, notes, on_rest = make_rotation(players, registry, job.get("innings", 6), job["date"], team, data_dir, rules)
+        except RotationError as e:
+            return {**result, "players": players, "error": str(e)}
+        order = make_order(players, registry, job.get("strategy", "value"))
+        if job.get("save"):
+            store.put(team, "rotation", rows)
+            store.put(team, "lineup", order)
+    finally:
+        store.close()
+    result.update(players=players, rotation=rows, notes=notes, batting_order=order,
+                  resting={p: d.date().isoformat() for p, d in on_rest.items()})
+    fmt = job.get("card", "html")
+    if fmt:
+        season = team_archive(data_dir, team).partition(pd.Timestamp(job["date"]).year)
+        card_job = {"batting_order": order, "registry": registry, "rotation_rows": rows, "game_date": job["date"],
+                    "logos": card_logos(data_dir), "opponent": result["opponent"],
+                    "fielding": position_innings(season.summary()) if season else {}}
+        card = render_card(**card_job)
+        result["card_name"] = card_filename(card_job, fmt)
+        result["card"] = html_to_pdf(card) if fmt == "pdf" else card
+    return result
+
+
+def run_batch(jobs, workers=None):
+    """plan_game over many teams/games on a process pool; results come back in job order."""
+    jobs = list(jobs)
+    if workers == 1 or len(jobs) < 2:
+        return list(map(plan_game, jobs))
+    workers = workers or os.cpu_count() or 1
+    # Each team's one-time archive import runs here, before any worker can race another to it
+    for data_dir, team in {(job.get("data_dir", DATA_DIR), team_slug(job.get("team") or DEFAULT_TEAM)) for job in jobs}:
+        team_archive(data_dir, team)
+    # Spawned, not forked: the API server calls this from one of its request threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(plan_game, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def write_results(results, out_dir):
+    """Cards into out_dir (one file per game, per-team subfolders) plus plans.json with everything else.
+
+    Cards left by an earlier run into the same out_dir are overwritten.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    plans, written = [], set()
+    for result in results:
+        plan = {k: v for k, v in result.items() if k != "card"}
+        if "card" in result:
+            folder = os.path.join(out_dir, result["team"])
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, result["card_name"])
+            stem, ext = os.path.splitext(path)
+            n = 1
+            while path in written:  # doubleheaders
+                n += 1
+                path = f"{stem}_{n}{ext}"
+            written.add(path)
+            data = result["card"]
+            with open(path, "wb") as f:
+                f.write(data.encode() if isinstance(data, str) else data)
+            plan["card_path"] = path
+        plans.append(plan)
+    with open(os.path.join(out_dir, "plans.json"), "w") as f:
+        json.dump(plans, f, indent=2)
+    return plans
+
+
+def read_schedule(path):
+    """Jobs from a CSV with team, date, opponent and optional innings, strategy, players ("A; B; C")."""
+    schedule = pd.read_csv(path, dtype=str).fillna("")
+    jobs = []
+    for row in schedule.to_dict("records"):
+        job = {"team": row.get("team", ""), "date": row["date"], "opponent": row.get("opponent", "")}
+        if row.get("innings"):
+            job["innings"] = int(row["innings"])
+        if row.get("strategy"):
+            job["strategy"] = row["strategy"]
+        if row.get("players"):
+            job["players"] = [p.strip() for p in row["players"].split(";") if p.strip()]
+        jobs.append(job)
+    return jobs
+
+
+# ====================== HTTP API ======================
+class ApiHandler(BaseHTTPRequestHandler):
+    """GET /roster?team=, GET /strategies, POST /availability, POST /plan, POST /batch (JSON in, JSON out)."""
+    roster = None  # roster_source(): team -> roster records
+    data_dir = DATA_DIR
+    workers = None
+
+    def _send(self, status, body):
+        data = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job(self, body):
+        job = {**with_rosters([body], self.roster)[0], "data_dir": self.data_dir}
+        job.setdefault("date", pd.Timestamp.today().date().isoformat())
+        return job
+
+    @staticmethod
+    def _jsonable(result):
+        if isinstance(result.get("card"), bytes):
+            return {**result, "card": base64.b64encode(result["card"]).decode(), "card_encoding": "base64"}
+        return result
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path
+        if path == "/roster":
+            try:
+                self._send(200, self.roster(parse_qs(url.query).get("team", [DEFAULT_TEAM])[0]))
+            except ValueError as e:
+                self._send(404, {"error": str(e)})
+        elif path == "/strategies":
+            self._send(200, {key: label for key, (label, _) in STRATEGIES.items()})
+        else:
+            self._send(404, {"error": f"no route {path}"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            if path == "/availability":
+                set_availability(body.get("team") or DEFAULT_TEAM, body["players"], self.data_dir)
+                self._send(200, {"ok": True})
+            elif path == "/plan":
+                self._send(200, self._jsonable(plan_game(self._job(body))))
+            elif path == "/batch":
+                results = run_batch([self._job(job) for job in body["jobs"]], body.get("workers", self.workers))
+                self._send(200, [self._jsonable(r) for r in results])
+            else:
+                self._send(404, {"error": f"no route {path}"})
+        except (KeyError, TypeError, ValueError) as e:
+            self._send(400, {"error": str(e)})
+        except RuntimeError as e:  # e.g. PDF cards without weasyprint
+            self._send(500, {"error": str(e)})
+
+
+def serve(roster, host="127.0.0.1", port=8765, data_dir=DATA_DIR, workers=None):
+    """`roster` is a roster_source(), or one roster frame used for every team."""
+    if isinstance(roster, pd.DataFrame):
+        records = roster.to_dict("records")
+        roster = lambda team: records  # noqa: E731
+    handler = type("Handler", (ApiHandler,), {"roster": staticmethod(roster), "data_dir": data_dir, "workers": workers})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving on http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ====================== CLI ======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--roster", help="roster CSV/xlsx export")
+    parser.add_argument("--credentials", help="service-account JSON key, to read the roster from the Google Sheet")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_plan_options(cmd):
+        cmd.add_argument("--format", choices=["html", "pdf", "none"], default="html", help="lineup card format")
+        cmd.add_argument("--out", help="directory for cards and plans.json (default: print JSON)")
+        cmd.add_argument("--save", action="store_true", help="store rotation and lineup for the team's pages")
+
+    plan = commands.add_parser("plan", help="plan one game")
+    plan.add_argument("--team", default=DEFAULT_TEAM)
+    plan.add_argument("--date", default=pd.Timestamp.today().date().isoformat())
+    plan.add_argument("--opponent", default="")
+    plan.add_argument("--players", help="comma-separated; default: the team's saved availability")
+    plan.add_argument("--innings", type=int, default=6)
+    plan.add_argument("--strategy", choices=list(STRATEGIES), default="value")
+    add_plan_options(plan)
+
+    batch = commands.add_parser("batch", help="plan every game in a schedule CSV on a process pool")
+    batch.add_argument("schedule", help="CSV with team, date, opponent[, innings, strategy, players]")
+    batch.add_argument("--workers", type=int)
+    add_plan_options(batch)
+
+    available = commands.add_parser("available", help="set a team's available players")
+    available.add_argument("--team", default=DEFAULT_TEAM)
+    available.add_argument("players", nargs="+")
+
+    api = commands.add_parser("serve", help="local HTTP API")
+    api.add_argument("--host", default="127.0.0.1")
+    api.add_argument("--port", type=int, default=8765)
+    api.add_argument("--workers", type=int)
+
+    args = parser.parse_args(argv)
+    if args.command == "available":
+        set_availability(args.team, args.players, args.data_dir)
+        return 0
+
+    if not (args.roster or args.credentials):
+        parser.error("pass --roster or --credentials")
+    roster = roster_source(args.roster, args.credentials)
+    if args.command == "serve":
+        serve(roster, args.host, args.port, args.data_dir, args.workers)
+        return 0
+
+    base = {"data_dir": args.data_dir, "card": None if args.format == "none" else args.format, "save": args.save}
+    if args.command == "plan":
+        jobs = [{**base, "team": args.team, "date": args.date, "opponent": args.opponent, "innings": args.innings,
+                 "strategy": args.strategy,
+                 "players": [p.strip() for p in args.players.split(",") if p.strip()] if args.players else None}]
+        results = run_batch(with_rosters(jobs, roster), workers=1)
+    else:
+        results = run_batch(with_rosters([{**base, **job} for job in read_schedule(args.schedule)], roster), args.workers)
+
+    if args.out:
+        plans = write_results(results, args.out)
+        print(f"{len(plans)} game(s) planned into {args.out}", file=sys.stderr)
+    else:
+        json.dump([ApiHandler._jsonable(r) for r in results], sys.stdout, indent=2, default=str)
+        print()
+    failed = [r for r in results if "error" in r]
+    for r in failed:
+        print(f"{r['team']} {r['date']}: {r['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
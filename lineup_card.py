@@ -0,0 +1,165 @@
+"""Printable game-day lineup card: precompiled templates, cached logos, batch HTML/PDF output."""
+import base64
+import html
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from string import Template
+
+import pandas as pd
+
+from data_access import cached
+
+try:
+    from weasyprint import HTML as PdfDocument  # optional, only needed for PDF output
+except ImportError:
+    PdfDocument = None
+
+CARD_INNINGS = 6
+ORIOLES_LOGOS = ["orioles_logo.png", "CLL Orioles logo.jpg", "CLL Orioles logo.png"]
+CLL_LOGOS = ["cll_logo.png", "CLL Logo.png"]
+
+BATTING_HEAD = """<h2>Batting Order</h2><table border="1" cellpadding="8" cellspacing="0" style="width:75%; border-collapse:collapse; font-size:15px;"><tr><th style="width:6%; text-align:center;">#</th><th style="width:6%; text-align:center;">#</th><th style="width:28%;">Player</th><th style="width:8%; text-align:center;">1</th><th style="width:8%; text-align:center;">2</th><th style="width:8%; text-align:center;">3</th><th style="width:8%; text-align:center;">4</th><th style="width:8%; text-align:center;">5</th><th style="width:8%; text-align:center;">6</th></tr>"""
+BATTING_ROW = Template("""<tr><td style="text-align:center; font-weight:bold;">$spot</td><td style="text-align:center;">$jersey</td><td>$player</td><td style="text-align:center;">$p1</td><td style="text-align:center;">$p2</td><td style="text-align:center;">$p3</td><td style="text-align:center;">$p4</td><td style="text-align:center;">$p5</td><td style="text-align:center;">$p6</td></tr>""")
+SEASON_HEAD = """<br><br><br><h2>Season Stats</h2><table border="1" cellpadding="5" cellspacing="0" style="width:100%; border-collapse:collapse; font-size:6.8px;"><tr><th>Player</th><th>OBP</th><th>OPS</th><th>BABIP</th><th>C</th><th>1B</th><th>2B</th><th>3B</th><th>SS</th><th>LF</th><th>CF</th><th>RF</th><th>IP</th><th>FIP</th></tr>"""
+SEASON_ROW = Template("""<tr><td>$name</td><td>$OBP</td><td>$OPS</td><td>$BABIP</td><td>$C</td><td>$B1</td><td>$B2</td><td>$B3</td><td>$SS</td><td>$LF</td><td>$CF</td><td>$RF</td><td>$IP</td><td>$FIP</td></tr>""")
+PAGE = Template("""
+        <html><head><title>Lineup Card - $date_iso</title>
+        <style>body{font-family:Arial,sans-serif;margin:25px;color:#000;background:white;} h1{text-align:center;color:#fc4c02;font-size:32px;} table{width:100%;border-collapse:collapse;} th,td{border:1px solid #333;padding:8px;} th{background:#fc4c02;color:white;} @page{margin:15mm;}</style></head><body>
+        <div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:20px;">
+            <img src="data:image/png;base64,$left_logo" style="height:80px;">
+            <img src="data:image/png;base64,$right_logo" style="height:80px;">
+        </div>
+        <h1>Lineup Card</h1>
+        <p style="text-align:center;font-size:18px;"><strong>Date:</strong> $date_long &nbsp;&nbsp; <strong>Opponent:</strong> $opponent</p>
+        <div>$batting</div>
+        <div style="margin-top:25px;">$season</div>
+        </body></html>
+        """)
+
+
+def _read_b64(path):
+    with open(path, "rb") as img:
+        return base64.b64encode(img.read()).decode()
+
+
+def logo_b64(data_dir, names):
+    # First logo file that exists, base64-encoded once per file version
+    for name in names:
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            return cached(("logo", path), [path], lambda: _read_b64(path))
+    return ""
+
+
+def card_logos(data_dir):
+    return {"left_logo": logo_b64(data_dir, ORIOLES_LOGOS), "right_logo": logo_b64(data_dir, CLL_LOGOS)}
+
+
+def position_fills(rotation_rows, innings=CARD_INNINGS):
+    """player -> position per inning (BN for bench) from current_rotation.json rows."""
+    fills = {}
+    for row in rotation_rows or []:
+        inning = row["Inning"] - 1
+        if inning >= innings:
+            continue
+        for key, value in row.items():
+            if key == "Inning" or not value or value == "—":
+                continue
+            if key == "Bench":
+                for player in [p.strip() for p in str(value).split(',') if p.strip()]:
+                    fills.setdefault(player, [""] * innings)[inning] = "BN"
+            else:
+                fills.setdefault(value, [""] * innings)[inning] = key
+    return fills
+
+
+def _fmt(value, digits):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return "—"
+    return "—" if value != value else round(value, digits)
+
+
+def render_card(batting_order, registry, rotation_rows, game_date, logos, opponent="", fielding=None):
+    """`fielding` is {player ID: {position: innings}} for the season table (derived_stats.position_innings)."""
+    fills = position_fills(rotation_rows)
+    batting = [BATTING_HEAD]
+    for i, player in enumerate(batting_order):
+        record = registry.by_label(player)
+        jersey = record.jersey if record and record.jersey else "—"
+        pos = fills.get(player, [""] * CARD_INNINGS)
+        batting.append(BATTING_ROW.substitute(
+            spot=i + 1, jersey=html.escape(jersey), player=html.escape(str(player)),
+            **{f"p{n + 1}": pos[n] for n in range(CARD_INNINGS)}))
+    batting.append("</table>")
+
+    season = [SEASON_HEAD]
+    fielding = fielding or {}
+    for p in registry:
+        innings = fielding.get(p.id, {})
+        season.append(SEASON_ROW.substitute(
+            name=html.escape(p.label), OBP=_fmt(p.stats.get("OBP"), 3), OPS=_fmt(p.stats.get("OPS"), 3),
+            BABIP=_fmt(p.stats.get("BABIP"), 3), C=_fmt(innings.get("C"), 1), B1=_fmt(innings.get("1B"), 1),
+            B2=_fmt(innings.get("2B"), 1), B3=_fmt(innings.get("3B"), 1), SS=_fmt(innings.get("SS"), 1),
+            LF=_fmt(innings.get("LF"), 1), CF=_fmt(innings.get("CF"), 1), RF=_fmt(innings.get("RF"), 1),
+            IP=_fmt(p.stats.get("IP"), 1), FIP=_fmt(p.stats.get("FIP"), 2)))
+    season.append("</table>")
+
+    game_date = pd.Timestamp(game_date)
+    return PAGE.substitute(
+        date_iso=game_date.date().isoformat(), date_long=game_date.strftime('%B %d, %Y'),
+        opponent=html.escape(opponent) if opponent else "________________________",
+        batting="".join(batting), season="".join(season), **logos)
+
+
+def html_to_pdf(card_html):
+    if PdfDocument is None:
+        raise RuntimeError("PDF output needs the weasyprint package (pip install weasyprint)")
+    return PdfDocument(string=card_html).write_pdf()
+
+
+def _render_job(args):
+    job, fmt = args
+    card = render_card(**job)
+    return html_to_pdf(card) if fmt == "pdf" else card.encode()
+
+
+def card_filename(job, fmt):
+    opponent = "".join(c if c.isalnum() else "_" for c in job.get("opponent", "")).strip("_")
+    date = pd.Timestamp(job["game_date"]).date().isoformat()
+    return f"lineup_card_{date}{'_' + opponent if opponent else ''}.{fmt}"
+
+
+def render_cards(jobs, fmt="html", workers=None):
+    """Render many cards (each job = render_card kwargs); returns [(filename, bytes)].
+
+    HTML is a template fill, so it renders in-process; PDF layout is slow enough to spread over a
+    process pool. The pool spawns fresh interpreters rather than forking the (threaded) server.
+    """
+    if fmt == "pdf" and PdfDocument is None:
+        raise RuntimeError("PDF output needs the weasyprint package (pip install weasyprint)")
+    jobs = list(jobs)
+    args = [(job, fmt) for job in jobs]
+    if fmt == "html" or workers == 1 or len(jobs) < 2:
+        outputs = list(map(_render_job, args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            outputs = list(pool.map(_render_job, args))
+    names, seen = [], {}
+    for job in jobs:
+        name = card_filename(job, fmt)
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else name.replace(f".{fmt}", f"_{seen[name]}.{fmt}"))
+    return list(zip(names, outputs))
+
+
+def zip_cards(cards):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in cards:
+            zf.writestr(name, data)
+    return buf.getvalue()
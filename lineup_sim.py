@@ -0,0 +1,155 @@
+"""Monte Carlo batting-order optimizer.
+
+Innings are simulated for thousands of games at once with NumPy; candidate orders are scored on a
+process pool with common random numbers so differences between orders aren't drowned in noise.
+The pool spawns its workers: forking a threaded process such as the Streamlit server can deadlock.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+OUTCOMES = ("BB", "1B", "2B", "HR", "K", "OUT")
+BB, SINGLE, DOUBLE, HR, K, OUT = range(len(OUTCOMES))
+
+# Used when a player has no imported stats
+DEFAULT_RATES = {"AVG": 0.280, "OBP": 0.400, "SLG": 0.380, "K_RATE": 0.20}
+MAX_BATTERS_PER_INNING = 20  # guards against endless innings when a lineup never makes outs
+
+
+def _num(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value
+
+
+def outcome_probs(stats):
+    """Per-plate-appearance outcome probabilities (rows follow OUTCOMES) from H/AB/K/AVG/OBP/SLG."""
+    probs = np.zeros((len(stats), len(OUTCOMES)))
+    for i, row in enumerate(stats):
+        row = row or {}
+        h, ab, k = _num(row.get("H")), _num(row.get("AB")), _num(row.get("K"))
+        avg = h / ab if h is not None and ab else _num(row.get("AVG"))
+        avg = DEFAULT_RATES["AVG"] if avg is None else min(max(avg, 0.0), 1.0)
+        obp = _num(row.get("OBP"))
+        obp = max(avg, DEFAULT_RATES["OBP"] if obp is None else obp)
+        slg = _num(row.get("SLG"))
+        slg = max(avg, DEFAULT_RATES["SLG"] if slg is None else slg)
+        k_rate = k / ab if k is not None and ab else DEFAULT_RATES["K_RATE"]
+
+        walks = (obp - avg) / (1 - obp) if obp < 1 else 1.0  # walks per AB, from OBP = (H + BB) / (AB + BB)
+        pa = 1 + walks
+        p_bb, p_hit = walks / pa, avg / pa
+        p_k = min(k_rate / pa, 1 - p_bb - p_hit)
+        extra = min(max((slg - avg) / avg, 0.0), 3.0) if avg > 0 else 0.0  # extra bases per hit
+        hr_share = max(0.0, (extra - 1) / 2)
+        double_share = extra if extra <= 1 else 1 - hr_share
+        probs[i] = [p_bb, p_hit * (1 - double_share - hr_share), p_hit * double_share, p_hit * hr_share,
+                    p_k, 1 - p_bb - p_hit - p_k]
+    return probs
+
+
+def advance(outcome, outs, on1, on2, on3):
+    """Runs scored and the new (on1, on2, on3) after one plate appearance in each game.
+
+    All arguments are per-game arrays; outcome -1 (inning already over) leaves the bases alone.
+    """
+    walk, single, double, homer = outcome == BB, outcome == SINGLE, outcome == DOUBLE, outcome == HR
+    # Productive out: with fewer than two outs, a runner on third tags up and the others move up a base
+    productive = (outcome == OUT) & (outs < 2)
+    scored = (walk & on1 & on2 & on3) * 1 + (single & on3) + double * (on2.astype(int) + on3) \
+        + homer * (1 + on1.astype(int) + on2 + on3) + (productive & on3)
+    moved = walk | single | double | homer | productive
+    up = single | productive  # every runner moves up one base
+    new1 = walk | single | (on1 & ~moved)
+    new2 = double | (walk & (on1 | on2)) | (up & on1) | (on2 & ~moved)
+    new3 = (walk & (on3 | (on1 & on2))) | (up & on2) | (double & on1) | (on3 & ~moved)
+    return scored, new1, new2, new3
+
+
+def simulate_runs(probs, order, n_games=2000, n_innings=6, seed=0):
+    """Runs scored in each of n_games simulated games for one batting order (indices into probs)."""
+    rng = np.random.default_rng(seed)
+    cum = np.cumsum(probs[np.asarray(order)], axis=1)
+    cum[:, -1] = 1.0
+    lineup_size = len(order)
+    runs = np.zeros(n_games, dtype=np.int64)
+    batter = np.zeros(n_games, dtype=np.int64)
+    for _ in range(n_innings):
+        outs = np.zeros(n_games, dtype=np.int64)
+        on1 = np.zeros(n_games, dtype=bool)
+        on2 = np.zeros(n_games, dtype=bool)
+        on3 = np.zeros(n_games, dtype=bool)
+        for _ in range(MAX_BATTERS_PER_INNING):
+            live = outs < 3
+            if not live.any():
+                break
+            outcome = (rng.random(n_games)[:, None] > cum[batter]).sum(axis=1)
+            outcome = np.where(live, outcome, -1)
+            scored, on1, on2, on3 = advance(outcome, outs, on1, on2, on3)
+            runs += scored
+            outs += (outcome == K) | (outcome == OUT)
+            batter = np.where(live, (batter + 1) % lineup_size, batter)
+    return runs
+
+
+def _score(args):
+    probs, order, n_games, n_innings, seed = args
+    runs = simulate_runs(probs, order, n_games, n_innings, seed)
+    return tuple(order), float(runs.mean()), float(runs.std(ddof=1))
+
+
+def optimize_order(stats, n_innings=6, n_games=2000, time_budget=5.0, starts=(), workers=None, seed=0):
+    """Search for the batting order with the most expected runs.
+
+    `stats` is one stats dict per player (index = player); `starts` are seed orders (e.g. the OPS
+    heuristic). Hill-climbs over pairwise swaps until no swap helps or time_budget seconds pass.
+    Returns {"order", "expected_runs", "ci" (95%), "evaluated"}.
+    """
+    deadline = time.monotonic() + time_budget
+    probs = outcome_probs(stats)
+    n = len(stats)
+    starts = [tuple(s) for s in starts] or [tuple(range(n))]
+    workers = os.cpu_count() or 1 if workers is None else workers
+    seen = {}
+
+    def evaluate(orders, pool):
+        batch = [(probs, o, n_games, n_innings, seed) for o in orders if o not in seen]
+        results = pool.map(_score, batch) if pool else map(_score, batch)
+        for order, mean, std in results:
+            seen[order] = (mean, std)
+
+    def search(pool):
+        evaluate(starts, pool)
+        best = max(starts, key=lambda o: seen[o][0])
+        improved = True
+        while improved and time.monotonic() < deadline:
+            improved = False
+            neighbours = []
+            for i in range(n):
+                for j in range(i + 1, n):
+                    o = list(best)
+                    o[i], o[j] = o[j], o[i]
+                    neighbours.append(tuple(o))
+            chunk = max(1, workers) * 4
+            for start in range(0, len(neighbours), chunk):
+                if time.monotonic() >= deadline:
+                    break
+                evaluate(neighbours[start:start + chunk], pool)
+            candidate = max((o for o in neighbours if o in seen), key=lambda o: seen[o][0], default=best)
+            if seen[candidate][0] > seen[best][0]:
+                best, improved = candidate, True
+        return best
+
+    if workers > 1 and n > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            best = search(pool)
+    else:
+        best = search(None)
+    mean, std = seen[best]
+    half = 1.96 * std / float(np.sqrt(n_games))
+    return {"order": list(best), "expected_runs": mean, "ci": (mean - half, mean + half), "evaluated": len(seen)}
@@ -0,0 +1,199 @@
+"""Per-rerun timing spans, I/O counters and peak memory for the sidebar debug panel.
+
+Streamlit runs each session's script on its own thread, so the active Recorder is
+thread-local. Calls from other threads (background roster refreshes, the write queue)
+have no recorder; their counts still land in the process-wide `totals`.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_local = threading.local()
+_totals_lock = threading.Lock()
+totals = Counter()
+_tracing_lock = threading.Lock()
+_tracing_owner = None  # the Recorder that started tracemalloc and has to stop it
+
+
+class Recorder:
+    def __init__(self, label="", memory=False):
+        self.label = label
+        self.started = time.time()
+        self.thread = threading.get_ident()
+        self._thread = threading.current_thread()
+        self.spans = []
+        self.counters = Counter()
+        self.elapsed = None
+        self.peak_bytes = None
+        self._t0 = time.perf_counter()
+        self._depth = 0
+        self._section = None
+        self._owns_tracing = False
+        if memory:
+            # tracemalloc is process-wide: with several sessions profiling at once the peak is shared
+            global _tracing_owner
+            with _tracing_lock:
+                if tracemalloc.is_tracing():
+                    tracemalloc.reset_peak()
+                else:
+                    tracemalloc.start()
+                    self._owns_tracing = True
+                    _tracing_owner = self
+        self.memory = memory
+
+    def _add(self, name, cat, start, args=None):
+        self.spans.append({"name": name, "cat": cat, "start": start - self._t0,
+                           "dur": time.perf_counter() - start, "depth": self._depth, "args": args or {}})
+
+    @contextmanager
+    def span(self, name, cat="section", **args):
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self._add(name, cat, start, args)
+
+    def section(self, name):
+        """End the running top-level section (if any) and start `name`; no re-indenting needed."""
+        if self._section:
+            self._add(self._section[0], "section", self._section[1])
+        self._section = (name, time.perf_counter())
+
+    def finish(self):
+        self.section(None)
+        self._section = None
+        self.elapsed = time.perf_counter() - self._t0
+        if self.memory and tracemalloc.is_tracing():
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+        self._stop_tracing()
+        return self
+
+    def _stop_tracing(self):
+        global _tracing_owner
+        with _tracing_lock:
+            if self._owns_tracing:
+                self._owns_tracing = False
+                _tracing_owner = None
+                tracemalloc.stop()
+
+    def table(self):
+        """Spans grouped by name: calls, total and max milliseconds, slowest first."""
+        rows = {}
+        for s in self.spans:
+            row = rows.setdefault(s["name"], {"name": s["name"], "cat": s["cat"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            row["calls"] += 1
+            row["total_ms"] += s["dur"] * 1000
+            row["max_ms"] = max(row["max_ms"], s["dur"] * 1000)
+        return sorted(rows.values(), key=lambda r: r["total_ms"], reverse=True)
+
+    def as_dict(self):
+        return {"label": self.label, "started": self.started, "thread": self.thread, "elapsed_s": self.elapsed,
+                "peak_bytes": self.peak_bytes, "max_rss_kb": max_rss_kb(),
+                "counters": dict(self.counters), "spans": list(self.spans)}
+
+
+def begin(label="", memory=False):
+    """Start recording this thread's rerun; replaces whatever the last rerun left behind."""
+    # A rerun cut short (st.rerun(), an exception) never reaches finish(): stop the tracing it
+    # started once it is over, or tracemalloc would slow every later rerun of the process
+    owner = _tracing_owner
+    if owner is not None and (owner._thread is threading.current_thread() or not owner._thread.is_alive()):
+        owner._stop_tracing()
+    _local.recorder = Recorder(label, memory)
+    return _local.recorder
+
+
+def current():
+    return getattr(_local, "recorder", None)
+
+
+def count(name, n=1):
+    with _totals_lock:
+        totals[name] += n
+    rec = current()
+    if rec is not None:
+        rec.counters[name] += n
+
+
+@contextmanager
+def span(name, cat="section", **args):
+    rec = current()
+    if rec is None:
+        yield
+        return
+    with rec.span(name, cat, **args):
+        yield
+
+
+def traced(name, cat="io", counter=None):
+    """Decorator form of span(); also bumps `counter` once per call."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            if counter:
+                count(counter)
+            with span(name, cat):
+                return fn(*args, **kwargs)
+        return call
+    return wrap
+
+
+class Instrumented:
+    """Proxy that counts and times every public method call on `target` (e.g. a gspread worksheet).
+
+    Attribute reads pass straight through, so callers don't notice the wrapper, except the ones
+    named in `nested` (e.g. a worksheet's "spreadsheet"), which come back instrumented too.
+    """
+
+    def __init__(self, target, cat, nested=()):
+        self._target = target
+        self._cat = cat
+        self._nested = nested
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name in self._nested:
+            return Instrumented(attr, self._cat)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        return traced(f"{self._cat}.{name}", self._cat, counter=f"{self._cat}.calls")(attr)
+
+
+def max_rss_kb():
+    # Process high-water mark; ru_maxrss is KB on Linux, bytes on macOS
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if os.uname().sysname == "Darwin" else rss
+
+
+def to_json(records):
+    return json.dumps(records, indent=2, default=str)
+
+
+def chrome_trace(records):
+    """Recorded reruns in Chrome's trace-event format (chrome://tracing, Perfetto)."""
+    events, pid = [], os.getpid()
+    for rec in records:
+        base = rec["started"] * 1e6
+        events.append({"name": rec["label"] or "rerun", "cat": "rerun", "ph": "X", "pid": pid, "tid": rec["thread"],
+                       "ts": base, "dur": (rec["elapsed_s"] or 0) * 1e6, "args": rec["counters"]})
+        for s in rec["spans"]:
+            events.append({"name": s["name"], "cat": s["cat"], "ph": "X", "pid": pid, "tid": rec["thread"],
+                           "ts": base + s["start"] * 1e6, "dur": s["dur"] * 1e6, "args": s["args"]})
+        if rec["counters"]:
+            events.append({"name": "counters", "ph": "C", "pid": pid, "tid": rec["thread"],
+                           "ts": base + (rec["elapsed_s"] or 0) * 1e6, "args": rec["counters"]})
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
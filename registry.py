@@ -0,0 +1,159 @@
+"""ID-keyed player registry: one slotted record per roster player, built once per roster and stats version.
+
+Pages pick players by label (the name, or "name #jersey" when two kids share a name) and
+look everything else up here in O(1) instead of filtering the roster frame per player.
+"""
+import difflib
+import re
+from collections import Counter
+
+from roster_sync import ROSTER_COLS
+
+
+def name_key(name):
+    # Case, punctuation and spacing don't matter: " smith, JOHN " and "Smith John" share tokens
+    return " ".join(re.sub(r"[^\w\s]", " ", str(name).lower()).split())
+
+
+# Plain-Python conversions: at roster sizes, pandas' per-column overhead costs more than the loop
+def _text(column):
+    return ["" if v is None or v != v else str(v).strip() for v in column.tolist()]
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value
+
+
+class Player:
+    __slots__ = ("id", "name", "label", "jersey", "b_t", "age", "positions", "stats")
+
+    def __init__(self, id, name, label, jersey, b_t, age, positions, stats):
+        self.id, self.name, self.label = id, name, label
+        self.jersey, self.b_t, self.age, self.positions = jersey, b_t, age, positions
+        self.stats = stats
+
+    def __repr__(self):
+        return f"Player({self.id!r}, {self.label!r})"
+
+
+class PlayerRegistry:
+    def __init__(self, roster, season_stats=None):
+        self.by_id = {}
+        self._labels = {}
+        columns = [_text(roster[c]) if c in roster.columns else [""] * len(roster) for c in ROSTER_COLS]
+        rows = [r for r in zip(*columns) if r[1]]
+        shared = Counter(r[1] for r in rows)
+        for n, (pid, name, jersey, b_t, age, positions) in enumerate(rows):
+            pid = pid or name
+            if pid in self.by_id:
+                pid = f"{pid}~{n}"  # a duplicated ID must not hide a player
+            label = name if shared[name] == 1 else f"{name} #{jersey}" if jersey else f"{name} ({pid})"
+            if label in self._labels:
+                label = f"{name} ({pid})"
+            self.by_id[pid] = self._labels[label] = Player(pid, name, label, jersey, b_t, age, positions, {})
+
+        # Resolver index: exact key, token-sorted key, and token -> keys for fuzzy candidates
+        self._keys, self._sorted, self._tokens = {}, {}, {}
+        for p in self.by_id.values():
+            key = name_key(p.name)
+            self._keys.setdefault(key, []).append(p.id)
+            self._sorted.setdefault(" ".join(sorted(key.split())), []).append(p.id)
+            for token in key.split():
+                self._tokens.setdefault(token, set()).add(key)
+
+        if season_stats is not None and not season_stats.empty:
+            self._attach_stats(season_stats)
+
+    def _attach_stats(self, season_stats):
+        cols = [c for c in season_stats.columns if c not in ("ID", "name")]
+        if "ID" in season_stats.columns:
+            owners = [self.by_id.get(i) for i in _text(season_stats["ID"])]
+        elif "name" in season_stats.columns:  # stats saved before the import matched on IDs
+            owners = [self._labels.get(n) for n in _text(season_stats["name"])]
+        else:
+            return
+        for player, row in zip(owners, zip(*(season_stats[c].tolist() for c in cols))):
+            if player is not None and not player.stats:  # first row wins
+                player.stats = {c: v for c, v in zip(cols, map(_number, row)) if v is not None}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __contains__(self, label):
+        return label in self._labels
+
+    def __getitem__(self, pid):
+        return self.by_id[pid]
+
+    def by_label(self, label):
+        return self._labels.get(label)
+
+    def labels(self):
+        return list(self._labels)
+
+    def ids(self):
+        return list(self.by_id)
+
+    def eligibility(self):
+        """(label, positions) pairs for EligibilityIndex; hashable, so it can key a cache."""
+        return tuple((p.label, p.positions) for p in self)
+
+    def ages(self):
+        return {p.id: p.age for p in self}
+
+    def ids_by_label(self):
+        return {p.label: p.id for p in self}
+
+    def label(self, pid, default=None):
+        # History keyed by ID can name players who have since left the roster
+        player = self.by_id.get(pid)
+        return player.label if player else default if default is not None else pid
+
+    def relabel(self, by_id):
+        """An ID-keyed dict (season totals, rest dates) keyed by today's labels, for pickers and the solver."""
+        return {self.by_id[pid].label: value for pid, value in by_id.items() if pid in self.by_id}
+
+    @property
+    def has_stats(self):
+        return any(p.stats for p in self)
+
+    def stats(self, label):
+        player = self._labels.get(label)
+        return player.stats if player else {}
+
+    def get(self, label, stat, default=0.0):
+        # The lookup batting-order strategies score players with
+        player = self._labels.get(label)
+        return player.stats.get(stat, default) if player else default
+
+    def resolve(self, name, jersey=None, cutoff=0.85):
+        """Roster ID for a name from another system (e.g. a GameChanger export), or None.
+
+        Exact match ignoring case/punctuation first, then the same tokens in any order
+        ("Smith, John"), then the closest spelling among names sharing a token (or all names) with
+        the same numbers in them. A name shared by several players needs a matching jersey; ties
+        are left unresolved.
+        """
+        key = name_key(name)
+        if not key:
+            return None
+        ids = self._keys.get(key) or self._sorted.get(" ".join(sorted(key.split())))
+        if not ids:
+            candidates = set().union(*(self._tokens.get(t, ()) for t in key.split())) or self._keys.keys()
+            digits = [t for t in key.split() if t.isdigit()]
+            candidates = [k for k in candidates if [t for t in k.split() if t.isdigit()] == digits]
+            scored = sorted(((difflib.SequenceMatcher(None, key, k).ratio(), k) for k in candidates), reverse=True)
+            if not scored or scored[0][0] < cutoff or (len(scored) > 1 and scored[1][0] == scored[0][0]):
+                return None
+            ids = self._keys[scored[0][1]]
+        jersey = "" if jersey is None or jersey != jersey else str(jersey).strip().removesuffix(".0")
+        if len(ids) > 1 and jersey:
+            ids = [i for i in ids if self.by_id[i].jersey == jersey]
+        return ids[0] if len(ids) == 1 else None
@@ -0,0 +1,264 @@
+"""Diff-based roster writes to the Google Sheet.
+
+Save Roster used to clear() and rewrite the whole sheet. RosterSync matches the edited frame to the
+last known sheet rows by ID and sends only the changed cells, new rows and row deletions in a single
+spreadsheet batch_update, so the sheet is never empty for other readers. FakeWorksheet lets the
+diffing and batching run offline.
+"""
+import re
+import time
+from collections import Counter
+
+from team_store import DEFAULT_TEAM
+
+ROSTER_COLS = ["ID", "name", "jersey", "b_t", "age", "positions"]
+
+
+def cell_text(value):
+    if value is None or value != value:  # None or NaN
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def normalize_roster(roster):
+    """A sheet read or file export in ROSTER_COLS order, without blanked rows and with ages as text."""
+    for col in ROSTER_COLS:
+        if col not in roster.columns:
+            roster[col] = ""
+    roster = roster[ROSTER_COLS].fillna("")
+    roster = roster[(roster["ID"].astype(str) != "") | (roster["name"].astype(str) != "")]  # skip blanked rows
+    roster['age'] = roster['age'].astype(str).str.split('.').str[0]
+    return roster
+
+
+def frame_to_grid(frame, cols=ROSTER_COLS):
+    return [list(cols)] + [[cell_text(v) for v in row] for row in frame[cols].itertuples(index=False)]
+
+
+def cell_data(text):
+    # USER_ENTERED-style: numbers go in as numbers, blanks clear the cell
+    if not text:
+        return {}
+    if re.fullmatch(r"-?\d+(\.\d+)?", text):
+        return {"userEnteredValue": {"numberValue": float(text)}}
+    return {"userEnteredValue": {"stringValue": text}}
+
+
+def _row_keys(rows):
+    # (ID, occurrence) so a duplicated ID still pairs rows one to one
+    seen = Counter()
+    keys = []
+    for row in rows:
+        pid = row[0] if row else ""
+        keys.append((pid, seen[pid]))
+        seen[pid] += 1
+    return keys
+
+
+def diff_grid(old, new, sheet_id=0):
+    """spreadsheets.batchUpdate requests turning sheet grid `old` into roster grid `new`.
+
+    Rows are matched by ID (column A), not position, so re-sorting the roster writes nothing. A kept
+    player's changed cells are rewritten in place as per-row runs, new players are appended and
+    removed players' rows are deleted bottom-up. Returns (requests, summary, grid): summary has the
+    "updated", "added" and "deleted" IDs and "cells" sent; grid is the sheet after the update.
+    """
+    grid = [list(r) for r in old] or [[]]
+    requests, summary = [], {"updated": [], "added": [], "deleted": []}
+    cells = 0
+
+    def patch(r, after):
+        nonlocal cells
+        before = grid[r]
+        run_start, run = None, []
+        for c in range(len(after) + 1):
+            if c < len(after) and (before[c] if c < len(before) else "") != after[c]:
+                if run_start is None:
+                    run_start = c
+                run.append(after[c])
+            elif run_start is not None:
+                requests.append({"updateCells": {
+                    "start": {"sheetId": sheet_id, "rowIndex": r, "columnIndex": run_start},
+                    "rows": [{"values": [cell_data(v) for v in run]}], "fields": "userEnteredValue"}})
+                cells += len(run)
+                run_start, run = None, []
+        changed = before[:len(after)] + [""] * (len(after) - len(before)) != after
+        grid[r] = after + before[len(after):]
+        return changed
+
+    if new:
+        patch(0, new[0])
+    rows = [r for r in range(1, len(grid)) if any(grid[r])]  # blank rows are left alone
+    old_rows = dict(zip(_row_keys([grid[r] for r in rows]), rows))
+    new_keys = _row_keys(new[1:])
+    added = []
+    for key, row in zip(new_keys, new[1:]):
+        if key not in old_rows:
+            added.append(row)
+            summary["added"].append(key[0])
+        elif patch(old_rows[key], row):
+            summary["updated"].append(key[0])
+    if added:
+        requests.append({"appendCells": {"sheetId": sheet_id, "fields": "userEnteredValue",
+                                         "rows": [{"values": [cell_data(v) for v in row]} for row in added]}})
+        cells += sum(len(row) for row in added)
+        grid += [list(row) for row in added]
+
+    kept = set(new_keys)
+    gone = sorted((r for key, r in old_rows.items() if key not in kept), reverse=True)
+    summary["deleted"] = [grid[r][0] for r in sorted(gone)]
+    for r in gone:  # bottom-up, so the row indexes still to delete don't shift
+        requests.append({"deleteDimension": {"range": {"sheetId": sheet_id, "dimension": "ROWS",
+                                                       "startIndex": r, "endIndex": r + 1}}})
+        del grid[r]
+    summary["cells"] = cells
+    return requests, summary, grid
+
+
+def team_worksheet(book, team, create=True):
+    """A team's roster tab in the shared spreadsheet: the first sheet for the default team, else the tab titled with its slug."""
+    if team == DEFAULT_TEAM:
+        return book.sheet1
+    for worksheet in book.worksheets():
+        if worksheet.title == team:
+            return worksheet
+    if not create:
+        raise ValueError(f"The roster spreadsheet has no tab for team {team!r}")
+    worksheet = book.add_worksheet(title=team, rows=100, cols=len(ROSTER_COLS))
+    worksheet.append_row(ROSTER_COLS)
+    return worksheet
+
+
+class RosterSync:
+    def __init__(self, worksheet, max_age=30):
+        self.worksheet = worksheet
+        self.max_age = max_age  # re-read the sheet before diffing if our copy is older than this
+        self.known = None
+        self.fetched_at = 0.0
+
+    def refresh(self):
+        self.known = [[cell_text(v) for v in row] for row in self.worksheet.get_all_values()]
+        self.fetched_at = time.time()
+        return self.known
+
+    def _current(self):
+        if self.known is None or time.time() - self.fetched_at > self.max_age:
+            self.refresh()
+        return self.known
+
+    def sync(self, frame):
+        """Write `frame` (roster columns) to the sheet in one batch_update.
+
+        Returns {"updated", "added", "deleted"} lists of IDs and "cells", the number of cells sent.
+        """
+        requests, summary, grid = diff_grid(self._current(), frame_to_grid(frame), self.worksheet.id)
+        if requests:
+            self.worksheet.spreadsheet.batch_update({"requests": requests})
+        self.known = grid
+        self.fetched_at = time.time()
+        return summary
+
+    def add_players(self, rows):
+        """Append many new players (lists in ROSTER_COLS order) with one append_rows call."""
+        rows = [[cell_text(v) for v in row] for row in rows]
+        if not rows:
+            return 0
+        self.worksheet.append_rows(rows, value_input_option="USER_ENTERED")
+        if self.known is not None:
+            self.known = self.known + rows
+        return len(rows)
+
+
+class FakeSpreadsheet:
+    """The parent spreadsheet of a FakeWorksheet: applies the batchUpdate requests RosterSync sends."""
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+
+    def batch_update(self, body):
+        ws = self.worksheet
+        ws.requests += 1
+        for request in body["requests"]:
+            if "updateCells" in request:
+                start = request["updateCells"]["start"]
+                for dr, row in enumerate(request["updateCells"]["rows"]):
+                    for dc, cell in enumerate(row["values"]):
+                        ws._set(start["rowIndex"] + dr + 1, start["columnIndex"] + dc + 1, _cell_text(cell))
+            elif "appendCells" in request:
+                while ws.values and not any(ws.values[-1]):
+                    ws.values.pop()
+                for row in request["appendCells"]["rows"]:
+                    ws.values.append([_cell_text(cell) for cell in row["values"]])
+                    ws.cells_written += len(row["values"])
+            elif "deleteDimension" in request:
+                span = request["deleteDimension"]["range"]
+                del ws.values[span["startIndex"]:span["endIndex"]]
+        while ws.values and not any(ws.values[-1]):
+            ws.values.pop()
+
+
+def _cell_text(cell):
+    value = cell.get("userEnteredValue", {})
+    return cell_text(value.get("numberValue", value.get("stringValue", "")))
+
+
+class FakeWorksheet:
+    """In-memory stand-in for a gspread Worksheet; counts API requests and cells written."""
+
+    def __init__(self, values=None):
+        self.values = [list(r) for r in (values or [])]
+        self.requests = 0
+        self.cells_written = 0
+        self.id = 0
+        self.spreadsheet = FakeSpreadsheet(self)
+
+    def get_all_values(self):
+        self.requests += 1
+        return [list(r) for r in self.values]
+
+    def get_all_records(self):
+        self.requests += 1
+        header, *rows = self.values or [[]]
+        return [dict(zip(header, r + [""] * (len(header) - len(r)))) for r in rows if any(r)]
+
+    def _set(self, row, col, value):
+        while len(self.values) < row:
+            self.values.append([])
+        line = self.values[row - 1]
+        while len(line) < col:
+            line.append("")
+        line[col - 1] = value
+        self.cells_written += 1
+
+    def batch_update(self, data, **kwargs):
+        self.requests += 1
+        for item in data:
+            start = item["range"].split(":")[0]
+            letters = start.rstrip("0123456789")
+            row = int(start[len(letters):])
+            col = 0
+            for ch in letters:
+                col = col * 26 + ord(ch) - 64
+            for dr, values in enumerate(item["values"]):
+                for dc, value in enumerate(values):
+                    self._set(row + dr, col + dc, value)
+        while self.values and not any(self.values[-1]):
+            self.values.pop()
+
+    def append_rows(self, rows, **kwargs):
+        self.requests += 1
+        for row in rows:
+            self.values.append(list(row))
+            self.cells_written += len(row)
+
+    def clear(self):
+        self.requests += 1
+        self.values = []
+
+    def update(self, values, *args, **kwargs):
+        self.requests += 1
+        for r, row in enumerate(values, start=1):
+            for c, value in enumerate(row, start=1):
+                self._set(r, c, cell_text(value))
@@ -0,0 +1,608 @@
+"""Defense rotation helpers that don't depend on Streamlit."""
+
+POOL_PLAYER = "Pool Player"
+MIN_PLAYERS = 8  # fewest team players a game is planned with; pool players fill in up to nine
+POSITIONS = ["P", "C", "1B", "2B", "3B", "SS", "LF", "CF", "RF"]
+FIELD_POSITIONS = ["1B", "SS", "2B", "CF", "3B", "LF", "RF"]  # planner order for the non-battery spots
+
+POSITION_BITS = {pos: 1 << i for i, pos in enumerate(POSITIONS)}
+INF_MASK = POSITION_BITS["2B"] | POSITION_BITS["3B"] | POSITION_BITS["SS"]
+OF_MASK = POSITION_BITS["LF"] | POSITION_BITS["CF"] | POSITION_BITS["RF"]
+
+# Roster tags -> positions they unlock. INF deliberately leaves out 1B.
+TAG_MASKS = {
+    "P": POSITION_BITS["P"], "PITCHER": POSITION_BITS["P"],
+    "C": POSITION_BITS["C"], "CATCHER": POSITION_BITS["C"],
+    "1B": POSITION_BITS["1B"],
+    "2B": POSITION_BITS["2B"], "3B": POSITION_BITS["3B"], "SS": POSITION_BITS["SS"], "INF": INF_MASK,
+    "LF": POSITION_BITS["LF"], "CF": POSITION_BITS["CF"], "RF": POSITION_BITS["RF"], "OF": OF_MASK,
+}
+POSITION_ALIASES = {"PITCHER": "P", "CATCHER": "C"}
+# Buckets the season balancer evens out playing time across
+POSITION_GROUPS = {"P": "P", "C": "C", "1B": "IF", "2B": "IF", "3B": "IF", "SS": "IF", "LF": "OF", "CF": "OF", "RF": "OF"}
+
+
+def position_mask(positions):
+    if not positions or positions != positions:  # empty, None or NaN
+        return 0
+    mask = 0
+    for tag in str(positions).split(','):
+        mask |= TAG_MASKS.get(tag.strip().upper(), 0)
+    return mask
+
+
+def can_play(positions, position):
+    pos = position.upper()
+    bit = POSITION_BITS.get(POSITION_ALIASES.get(pos, pos), 0)
+    return bool(position_mask(positions) & bit)
+
+
+class EligibilityIndex:
+    """Player x position bitmasks for one roster version."""
+
+    def __init__(self, players):
+        self.masks = {}
+        for name, positions in players:
+            self.masks.setdefault(name, position_mask(positions))  # first row wins, like .iloc[0]
+        self.by_position = {
+            pos: frozenset(name for name, mask in self.masks.items() if mask & bit)
+            for pos, bit in POSITION_BITS.items()
+        }
+
+    def can_play(self, name, position):
+        return name == POOL_PLAYER or name in self.by_position[position]
+
+    def options(self, candidates, position, exclude=()):
+        eligible = self.by_position[position]
+        exclude = set(exclude)
+        return [p for p in candidates if (p == POOL_PLAYER or p in eligible) and p not in exclude]
+
+    def without(self, position, players):
+        """A copy where `players` can't take `position`, e.g. pitchers who still need rest."""
+        players = set(players)
+        index = EligibilityIndex(())
+        index.masks = {name: mask & ~POSITION_BITS[position] if name in players else mask
+                       for name, mask in self.masks.items()}
+        index.by_position = {**self.by_position, position: self.by_position[position] - players}
+        return index
+
+    def invalid_assignments(self, row):
+        # (position, player) pairs in a saved rotation row the player isn't tagged for
+        return [(pos, row[pos]) for pos in POSITIONS if row.get(pos) and not self.can_play(row[pos], pos)]
+
+
+# ====================== AUTO ROTATION ======================
+class RotationError(ValueError):
+    pass
+
+
+def bench_eligible(team_players, bench_history, last_bench):
+    # The planner's bench rules: no back-to-back, and nobody sits twice until everyone has sat once
+    all_have_sat_once = all(bench_history[p] >= 1 for p in team_players)
+    return [p for p in team_players if p not in last_bench and (bench_history[p] == 0 or all_have_sat_once)]
+
+
+def bench_options(team_players, benches, inning):
+    """Who may sit in `inning`, given the benches already picked ({inning: [players]})."""
+    history = dict.fromkeys(team_players, 0)
+    for prev in range(1, inning):
+        for p in benches.get(prev, []):
+            if p in history:
+                history[p] += 1
+    return bench_eligible(team_players, history, benches.get(inning - 1, []) if inning > 1 else [])
+
+
+class BenchLedger:
+    """The planner's bench picks with each inning's prior sit counts kept incrementally.
+
+    Counts are cached per inning; changing inning i's bench drops only the entries for
+    innings after i, so a pick late in the game never recomputes the innings before it.
+    """
+
+    def __init__(self, team_players):
+        self.team_players = list(team_players)
+        self.benches = {}
+        self._before = {1: dict.fromkeys(self.team_players, 0)}
+
+    def set_bench(self, inning, players):
+        """Record inning's bench; returns False (and keeps every cache) if it didn't change."""
+        players = list(players)
+        if self.benches.get(inning, []) == players:
+            return False
+        self.benches[inning] = players
+        for i in [i for i in self._before if i > inning]:
+            del self._before[i]
+        return True
+
+    def counts_before(self, inning):
+        start = max(i for i in self._before if i <= inning)
+        for i in range(start + 1, inning + 1):
+            counts = dict(self._before[i - 1])
+            for p in self.benches.get(i - 1, []):
+                if p in counts:
+                    counts[p] += 1
+            self._before[i] = counts
+        return self._before[inning]
+
+    def options(self, inning):
+        """Same answer as bench_options(team_players, benches, inning)."""
+        return bench_eligible(self.team_players, self.counts_before(inning),
+                              self.benches.get(inning - 1, []) if inning > 1 else [])
+
+
+def match_positions(players, positions, elig, preference=None):
+    """Assign every player a distinct position (Kuhn's augmenting paths).
+
+    Returns {position: player}, or None if some player can't be placed.
+    `preference(player, position)` orders each player's candidate positions.
+    """
+    adjacency = {}
+    for p in players:
+        options = [pos for pos in positions if elig.can_play(p, pos)]
+        if preference:
+            options.sort(key=lambda pos: preference(p, pos))
+        adjacency[p] = options
+    owner = {}
+
+    def augment(p, seen):
+        for pos in adjacency[p]:
+            if pos in seen:
+                continue
+            seen.add(pos)
+            if pos not in owner or augment(owner[pos], seen):
+                owner[pos] = p
+                return True
+        return False
+
+    for p in sorted(players, key=lambda p: len(adjacency[p])):  # most constrained first
+        if not augment(p, set()):
+            return None
+    return owner
+
+
+class InningPitchers:
+    """Eligibility shim so match_positions can pair innings (as "players") with pitchers (as "positions")."""
+
+    def __init__(self, options):
+        self.options = [set(ps) for ps in options]
+
+    def can_play(self, inning, pitcher):
+        return pitcher in self.options[inning]
+
+
+def max_matching(players, positions, elig):
+    """{position: player} for as many players as can be placed at once."""
+    # On the position bitmasks: the solver's search calls this thousands of times per plan
+    open_mask = 0
+    for pos in positions:
+        open_mask |= POSITION_BITS[pos]
+    masks = {p: open_mask if p == POOL_PLAYER else elig.masks.get(p, 0) & open_mask for p in players}
+    owner = {}  # position bit -> player
+
+    def augment(p, seen):
+        free = masks[p] & ~seen[0]
+        while free:
+            bit = free & -free
+            seen[0] |= bit
+            if bit not in owner or augment(owner[bit], seen):
+                owner[bit] = p
+                return True
+            free &= ~seen[0]
+        return False
+
+    for p in players:
+        augment(p, [0])
+    return {POSITIONS[bit.bit_length() - 1]: p for bit, p in owner.items()}
+
+
+def max_matching_size(players, positions, elig):
+    return len(max_matching(players, positions, elig))
+
+
+def alternating_halves(team_players, elig, num_innings, pins, budget=2000):
+    """Split the team into the half that plays the odd innings and the half that plays the even ones.
+
+    With half the team sitting every inning the bench rules force the halves to alternate, and
+    every pitcher sits the inning after, so each inning needs a pitcher of its own. `pins` maps
+    inning -> (bench, {position: player}). Returns (odd, even), or None if no split works; raises
+    RotationError if `budget` splits are tried first.
+    """
+    innings = [list(range(1, num_innings + 1, 2)), list(range(2, num_innings + 1, 2))]
+    side = {}  # player -> half their pins put them in
+    for inning, (bench, field) in pins.items():
+        for p, h in [(p, inning % 2) for p in bench] + [(p, 1 - inning % 2) for p in field.values()]:
+            if side.setdefault(p, h) != h:
+                raise RotationError(f"{p} is pinned into both halves, but with half the team sitting every "
+                                    "inning the bench alternates between the same two halves")
+    # Pinned cells count as eligible, like they do in the search
+    masks = {p: elig.masks.get(p, 0) for p in team_players}
+    for bench, field in pins.values():
+        for pos, p in field.items():
+            masks[p] |= POSITION_BITS[pos]
+    every = sum(POSITION_BITS.values())
+    fielders = every & ~POSITION_BITS["P"]
+    pitches = {p for p in team_players if masks[p] & POSITION_BITS["P"]}
+    size = len(team_players) // 2
+
+    def placed(players, open_mask):
+        # Which of players a maximum matching to the positions in open_mask places (max_matching on bare masks)
+        owner = {}
+        spots = bin(open_mask).count("1")
+
+        def augment(p, seen):
+            free = masks[p] & open_mask & ~seen[0]
+            while free:
+                bit = free & -free
+                seen[0] |= bit
+                if bit not in owner or augment(owner[bit], seen):
+                    owner[bit] = p
+                    return True
+                free &= ~seen[0]
+            return False
+
+        for p in players:
+            if len(owner) == spots:
+                break
+            augment(p, [0])
+        return set(owner.values())
+
+    def could_pitch(members, rest):
+        # Who might still pitch one of a half's innings: the members left fielding have to fit the
+        # other positions, and without the pitcher whoever could join has to cover them all.
+        # None if the half can't fill every position at all. Only someone a matching placed can be
+        # the one a position can't do without, so only they are rechecked
+        pool = members + rest
+        if len(placed(pool, every)) < len(POSITIONS):
+            return None
+        covering = placed(pool, fielders)
+        fielding = placed(members, fielders)
+        fits = len(fielding) == len(members)
+        pitching = set()
+        for p in pitches.intersection(pool):
+            if p in rest:
+                ok = fits
+            else:
+                ok = fits or len(fielding) == len(members) - 1 and \
+                    (p not in fielding or len(placed([q for q in members if q != p], fielders)) == len(members) - 1)
+            if ok and (p not in covering or len(placed([q for q in pool if q != p], fielders)) == len(POSITIONS) - 1):
+                pitching.add(p)
+        return pitching
+
+    def usable(half, h):
+        # Match the half's innings to distinct pitchers who leave the rest covering the field
+        options = []
+        for inning in innings[h]:
+            field = pins[inning][1]
+            open_positions = [pos for pos in POSITIONS if pos not in field and pos != "P"]
+            unplaced = [p for p in half if p not in field.values()]
+            candidates = [field["P"]] if field.get("P") else elig.options(unplaced, "P")
+            options.append([p for p in candidates if max_matching_size([q for q in unplaced if q != p], open_positions, elig)
+                            == len(unplaced) - (p in unplaced)])
+        return match_positions(list(range(len(options))), sorted(set().union(*options), key=team_players.index),
+                               InningPitchers(options)) is not None
+
+    halves = ([p for p in team_players if side.get(p) == 0], [p for p in team_players if side.get(p) == 1])
+    if max(map(len, halves)) > size:
+        return None
+    # Whoever plays the fewest positions first, but ahead of them the few who can cover a position
+    # (a half's only catcher can't pitch, so where they go settles who can)
+    scarce = 0
+    for bit in POSITION_BITS.values():
+        if sum(1 for p in team_players if masks[p] & bit) <= 3:
+            scarce |= bit
+    free = sorted((p for p in team_players if p not in side), key=lambda p: (not masks[p] & scarce, bin(masks[p]).count("1")))
+    tries = [budget]
+
+    def split(k):
+        if k == len(free):
+            return usable(halves[0], 0) and usable(halves[1], 1)
+        tries[0] -= 1
+        if tries[0] < 0:
+            raise RotationError("The search gave up before finding a plan; pin a few cells and try again")
+        rest = free[k:]
+        options = [could_pitch(halves[h], rest) for h in (0, 1)]
+        if None in options:
+            return False
+        # Enough possible pitchers for an inning each, counting anyone still free only once
+        own = [len(options[h].difference(rest)) for h in (0, 1)]
+        shared = (options[0] | options[1]).intersection(rest)
+        if own[0] + own[1] + len(shared) < num_innings or \
+                any(own[h] + min(size - len(halves[h]), len(options[h].intersection(rest))) < len(innings[h]) for h in (0, 1)):
+            return False
+        p = free[k]
+        # Toward the half shorter of pitchers, or with more room
+        if p in shared:
+            order = sorted((0, 1), key=lambda h: own[h] - len(innings[h]))
+        else:
+            order = sorted((0, 1), key=lambda h: len(halves[h]))
+        for h in order:
+            if len(halves[h]) < size:
+                halves[h].append(p)
+                if split(k + 1):
+                    return True
+                halves[h].pop()
+        return False
+
+    if not split(0):
+        return None
+    return tuple(sorted(half, key=team_players.index) for half in halves)
+
+
+def rotation_row(inning, bench, assignment):
+    return {
+        "Inning": inning,
+        "Bench": ", ".join(bench) or "—",
+        "P": assignment.get("P", ""),
+        "C": assignment.get("C", ""),
+        **{pos: assignment.get(pos, "") for pos in FIELD_POSITIONS},
+    }
+
+
+def solve_rotation(team_players, elig, num_innings, required_bench=None, pinned=None, season=None):
+    """Fill P, C, the field and the bench for every inning.
+
+    `pinned` maps inning -> {"Bench": [...], "P": name, "1B": name, ...} for cells the coach already
+    chose; empty values are ignored. `season` maps player -> season-to-date innings by "Bench" and
+    POSITION_GROUPS bucket; when given, ties go to whoever has sat or played that bucket least. Returns (rows, notes): rows use the current_rotation.json format,
+    notes explain any inning where the bench rules had to be relaxed to bench the required count.
+    A pitcher who leaves the mound doesn't pitch again that game. Raises RotationError when no valid plan is found.
+    """
+    team_players = list(dict.fromkeys(team_players))
+    pinned = pinned or {}
+    season = season or {}
+    if required_bench is None:
+        required_bench = max(0, len(team_players) - 9)
+    pool_count = max(0, 9 - (len(team_players) - required_bench))
+    if len(team_players) - required_bench > 9:
+        raise RotationError(f"{len(team_players)} players with {required_bench} on the bench leaves more than 9 in the field")
+
+    def pins_for(inning):
+        cells = pinned.get(inning, {})
+        bench = [p for p in cells.get("Bench", []) if p]
+        field = {pos: cells[pos] for pos in POSITIONS if cells.get(pos)}
+        team_on_field = [p for p in field.values() if p != POOL_PLAYER]
+        unknown = [p for p in bench + team_on_field if p not in team_players]
+        if unknown:
+            raise RotationError(f"Inning {inning}: {', '.join(unknown)} is not on today's team")
+        if len(set(bench + team_on_field)) != len(bench) + len(team_on_field):
+            raise RotationError(f"Inning {inning}: a player is pinned to more than one spot")
+        if len(bench) > required_bench:
+            raise RotationError(f"Inning {inning}: {len(bench)} pinned to the bench but only {required_bench} sit")
+        if sum(1 for p in field.values() if p == POOL_PLAYER) > pool_count:
+            raise RotationError(f"Inning {inning}: more Pool Player slots pinned than pool players available")
+        return bench, field
+
+    pins = {inning: pins_for(inning) for inning in range(1, num_innings + 1)}
+    # Someone tagged only P sits whenever they aren't pitching; once relieved they'd sit back-to-back,
+    # so they have to pitch from the 2nd inning through the next-to-last, and only one player can
+    pitch_only = [p for p in team_players if elig.masks.get(p) == POSITION_BITS["P"]]
+    if len(pitch_only) > 1 and num_innings >= 3:
+        raise RotationError(f"{', '.join(pitch_only)} can only pitch, and a pitcher who leaves the mound can't return; "
+                            "tag another position for all but one of them")
+    if pool_count == 0 and 2 * required_bench == len(team_players) and num_innings >= 2:
+        # Half the team sits every inning, so the halves alternate and nobody pitches two innings
+        pitchers = elig.by_position["P"] | {pins[i][1]["P"] for i in pins if pins[i][1].get("P")}
+        if len(pitchers & set(team_players)) < num_innings:
+            raise RotationError(f"With {required_bench} of {len(team_players)} sitting every inning each pitcher throws "
+                                f"one inning, so {num_innings} players tagged P are needed")
+        if any(len(pins[i][0]) < required_bench for i in pins):
+            # Pick the halves up front, then plan with every bench pinned
+            halves = alternating_halves(team_players, elig, num_innings, pins)
+            if halves is None:
+                raise RotationError(f"No way to split the team into two halves of {required_bench} that each cover "
+                                    "every position with a fresh pitcher every inning they play")
+            benches = {i: {**pinned.get(i, {}), "Bench": halves[i % 2]} for i in pins}
+            return solve_rotation(team_players, elig, num_innings, required_bench, benches, season)
+
+    def open_slots(inning):
+        # (positions left to fill, how many of them team players must take)
+        field = pins[inning][1]
+        open_positions = [pos for pos in POSITIONS if pos not in field]
+        free_pool = pool_count - sum(1 for p in field.values() if p == POOL_PLAYER)
+        return open_positions, len(open_positions) - free_pool
+
+    # Lookahead inputs per inning: open positions, how many team players fill them, who is
+    # already placed by pins, and who is pinned to sit the inning after (so can't sit this one)
+    ahead = {}
+    for inning in range(2, num_innings + 1):
+        bench, field = pins[inning]
+        placed = set(bench) | set(field.values())
+        after = [p for p in pins[inning + 1][0] if p not in placed] if inning < num_innings else []
+        ahead[inning] = (*open_slots(inning), placed, after)
+
+    def next_inning_ok(inning, bench, pitch_elig, pitcher):
+        # Whoever sits now can't sit next inning, so they must still fit into its open positions
+        # (a pitcher sitting now is done pitching)
+        if inning == num_innings:
+            return True
+        if pitcher in bench:
+            pitch_elig = pitch_elig.without("P", [pitcher])
+        open_positions, need, placed, after = ahead[inning + 1]
+        must_play = [p for p in bench if p not in placed] + [p for p in after if p not in bench]
+        return len(must_play) <= need and max_matching_size(must_play, open_positions, pitch_elig) == len(must_play)
+
+    def pitching_ok(inning, bench, field, retired, pitcher):
+        # While the bench rules leave no choice about who plays (a 9/9 split alternates halves),
+        # the fields are known ahead, so check a pitcher can take each without a relieved one returning
+        chain = []
+        while True:
+            open_positions = open_slots(inning)[0]
+            if len(field) < len(open_positions):
+                break  # a Pool Player can pitch
+            chain.append((open_positions, field, pins[inning][1].get("P"), later_pitchers[inning]))
+            if inning == num_innings:
+                break
+            open_positions, need, placed, after = ahead[inning + 1]
+            must_play = [p for p in bench if p not in placed] + [p for p in after if p not in bench]
+            if len(must_play) != need:
+                break
+            bench = [p for p in team_players if p not in placed and p not in must_play] + pins[inning + 1][0]
+            inning, field = inning + 1, must_play
+
+        # Who can pitch each inning with the rest of that field still covering the other positions
+        can_pitch = []
+        for open_positions, field, pinned_p, _ in chain:
+            key = (frozenset(field), tuple(open_positions))
+            if key not in coverable:
+                rest_positions = [pos for pos in open_positions if pos != "P"]
+                coverable[key] = [p for p in elig.options(field, "P")
+                                  if max_matching_size([q for q in field if q != p], rest_positions, elig) == len(field) - 1]
+            can_pitch.append([pinned_p] if pinned_p else coverable[key])
+        if all(not set(a[1]) & set(b[1]) for a, b in zip(chain, chain[1:])):
+            # Nobody plays two of these innings in a row (the halves alternate), so every inning
+            # needs its own pitcher: a matching of innings to pitchers
+            options = [[p for p in ps if chain[k][2] or p not in retired and p not in chain[k][3]]
+                       for k, ps in enumerate(can_pitch)]
+            innings = InningPitchers(options)
+            return match_positions(list(range(len(chain))), sorted(set().union(*options), key=order.get), innings) is not None
+        stuck = set()
+
+        def fits(k, retired, current):
+            if k == len(chain):
+                return True
+            if (k, retired, current) in stuck:
+                return False
+            for p in sorted(can_pitch[k], key=lambda p: p != current):
+                if (chain[k][2] or p not in retired and (p == current or p not in chain[k][3])) and \
+                        fits(k + 1, retired | {current} if current and p != current else retired, p):
+                    return True
+            stuck.add((k, retired, current))
+            return False
+
+        return fits(0, frozenset(retired), pitcher)
+
+    order = {p: i for i, p in enumerate(team_players)}
+    # Someone pinned to pitch later can't start pitching before then: they'd have to be relieved and return
+    later_pitchers = {inning: {pins[i][1]["P"] for i in range(inning + 1, num_innings + 1) if pins[i][1].get("P")}
+                      for inning in range(1, num_innings + 1)}
+    sits_after = {}  # inning -> pinned sits still to come after it
+    for inning in range(1, num_innings + 1):
+        sits_after[inning] = {p: sum(p in pins[i][0] for i in range(inning + 1, num_innings + 1)) for p in team_players}
+    budget = [10000]  # bench/assignment tries before the search gives up
+    failure = [0, None]  # deepest inning that failed, and why
+    dead = set()  # (inning, last bench, retired, pitcher) states with no way to finish the game
+    coverable = {}  # (field, open positions) -> who can pitch with the rest covering the other spots
+
+    def fail(inning, message):
+        if inning >= failure[0]:
+            failure[:] = [inning, message]
+
+    def bench_choices(inning, candidates, bench, remaining, open_positions, need_matched, pitch_elig, pitcher, start=0):
+        # Bench sets in preference order; the first one is the greedy pick
+        if len(bench) == required_bench:
+            yield bench, remaining
+            return
+        if len(candidates) - start == required_bench - len(bench):
+            # Everyone left has to sit, e.g. when the bench alternates between two halves of the team
+            budget[0] -= 1
+            rest = [q for q in remaining if q not in candidates[start:]]
+            if max_matching_size(rest, open_positions, pitch_elig) >= need_matched and \
+                    next_inning_ok(inning, bench + candidates[start:], pitch_elig, pitcher):
+                yield bench + candidates[start:], rest
+            return
+        matched = set(max_matching(remaining, open_positions, pitch_elig).values())
+        for k in range(start, len(candidates) - (required_bench - len(bench)) + 1):
+            if budget[0] <= 0:
+                return
+            p = candidates[k]
+            rest = [q for q in remaining if q != p]
+            # Propagate: only bench p if the players left can still cover the open positions
+            # (sitting someone the matching left out never uncovers one) and everyone sitting
+            # can still be placed next inning
+            budget[0] -= 1
+            if (p not in matched or max_matching_size(rest, open_positions, pitch_elig) >= need_matched) and \
+                    next_inning_ok(inning, bench + [p], pitch_elig, pitcher):
+                yield from bench_choices(inning, candidates, bench + [p], rest, open_positions, need_matched,
+                                         pitch_elig, pitcher, k + 1)
+
+    def assignments(remaining, open_positions, pitch_elig, preference):
+        # The preferred matching, then the same field with each other possible pitcher
+        owner = match_positions(remaining, open_positions, pitch_elig, preference)
+        if owner is None:
+            return
+        yield owner
+        if "P" not in open_positions:
+            return
+        others = [p for p in pitch_elig.options(remaining, "P") if p != owner.get("P")]
+        others.sort(key=lambda p: preference(p, "P"))
+        for p in others:
+            budget[0] -= 1
+            rest = match_positions([q for q in remaining if q != p], [pos for pos in open_positions if pos != "P"],
+                                   pitch_elig, preference)
+            if rest is not None:
+                yield {"P": p, **rest}
+
+    def plan(inning, bench_history, last_sat, played, last_bench, last_assignment, retired):
+        if inning > num_innings:
+            return [], []
+        pitcher = last_assignment.get("P")
+        state = (inning, frozenset(last_bench), retired, pitcher)
+        if state in dead:
+            return None
+        pinned_bench, pinned_field = pins[inning]
+        open_positions, need_matched = open_slots(inning)
+        on_field_pins = set(pinned_field.values())
+        barred = retired | (later_pitchers[inning] - {pitcher})
+        pitch_elig = elig.without("P", barred) if barred else elig
+        next_bench = set(pins[inning + 1][0]) if inning < num_innings else set()
+        future_sits = sits_after[inning]
+
+        remaining = [p for p in team_players if p not in on_field_pins and p not in pinned_bench]
+        strict = set(bench_eligible(team_players, bench_history, last_bench))
+        candidates = [p for p in remaining if p not in last_bench and p not in next_bench]
+        # Sitting the pitcher ends their outing, so they go last, even after a second sit for someone
+        candidates.sort(key=lambda p: (p == pitcher, p not in strict, bench_history[p] + future_sits[p],
+                                       season.get(p, {}).get("Bench", 0), last_sat[p], order[p]))
+
+        def preference(p, pos):
+            keep_battery = pos in ("P", "C") and last_assignment.get(pos) == p
+            return (not keep_battery, played[p][pos], season.get(p, {}).get(POSITION_GROUPS[pos], 0), POSITIONS.index(pos))
+
+        benched = pitched = covered = False
+        for bench, field in bench_choices(inning, candidates, list(pinned_bench), remaining, open_positions,
+                                          need_matched, pitch_elig, pitcher):
+            benched = True
+            budget[0] -= 1
+            if not pitching_ok(inning, bench, field, retired, pitcher):
+                continue
+            pitched = True
+            for owner in assignments(field, open_positions, pitch_elig, preference):
+                covered = True
+                assignment = dict(pinned_field)
+                assignment.update(owner)
+                for pos in open_positions:
+                    assignment.setdefault(pos, POOL_PLAYER)
+                history, sat = dict(bench_history), dict(last_sat)
+                for p in bench:
+                    history[p] += 1
+                    sat[p] = inning
+                counts = {p: dict(c) for p, c in played.items()}
+                for pos, p in assignment.items():
+                    if p in counts:
+                        counts[p][pos] += 1
+                gone = retired | {pitcher} if pitcher and assignment["P"] != pitcher else retired
+                result = plan(inning + 1, history, sat, counts, set(bench), assignment, gone)
+                if result is not None:
+                    rows, notes = result
+                    notes = [f"Inning {inning}: {p} sits a second time before everyone has sat once"
+                             for p in bench if p not in pinned_bench and p not in strict] + notes
+                    return [rotation_row(inning, bench, assignment)] + rows, notes
+                if budget[0] <= 0:
+                    return None
+        if not benched:
+            fail(inning, f"Inning {inning}: can't bench {required_bench} without a back-to-back bench or leaving a position uncovered")
+        elif not pitched:
+            fail(inning, f"Inning {inning}: not enough pitchers to finish the game without a relieved pitcher returning")
+        elif not covered:
+            fail(inning, f"Inning {inning}: the unpinned players can't cover {', '.join(open_positions)}; clear some picks in that inning")
+        if budget[0] > 0:
+            dead.add(state)
+        return None
+
+    result = plan(1, {p: 0 for p in team_players}, {p: 0 for p in team_players},
+                  {p: {pos: 0 for pos in POSITIONS} for p in team_players}, set(), {}, frozenset())
+    if result is None:
+        if budget[0] <= 0:
+            raise RotationError("The search gave up before finding a plan; pin a few cells and try again")
+        raise RotationError(failure[1] or "No rotation satisfies the bench and pitching rules; clear some picks")
+    return result
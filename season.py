@@ -0,0 +1,76 @@
+"""Multi-game planning that evens out playing time across the season."""
+from game_store import player_ids
+from rotation import POOL_PLAYER, POSITION_GROUPS, POSITIONS, RotationError, solve_rotation
+
+GROUPS = ("Bench", "P", "C", "IF", "OF")
+
+
+def season_totals(games):
+    """Per-player innings by bucket from the logged games, aggregated once and keyed by roster ID."""
+    totals = {}
+    if games is None or games.empty or "Player" not in games.columns:
+        return totals
+    cols = {f"{pos}_innings": POSITION_GROUPS[pos] for pos in POSITIONS if f"{pos}_innings" in games.columns}
+    if "Bench_innings" in games.columns:
+        cols["Bench_innings"] = "Bench"
+    sums = games.groupby(player_ids(games))[list(cols)].sum()
+    for player, row in sums.iterrows():
+        buckets = dict.fromkeys(GROUPS, 0.0)
+        for col, group in cols.items():
+            buckets[group] += float(row[col] or 0)
+        totals[player] = buckets
+    return totals
+
+
+def apply_rotation(totals, rows):
+    # Fold one planned game into the running totals in place
+    for row in rows:
+        for p in [b.strip() for b in row["Bench"].split(",") if b.strip() and b.strip() != "—"]:
+            totals.setdefault(p, dict.fromkeys(GROUPS, 0.0))["Bench"] += 1
+        for pos in POSITIONS:
+            p = row.get(pos)
+            if p and p != POOL_PLAYER:
+                totals.setdefault(p, dict.fromkeys(GROUPS, 0.0))[POSITION_GROUPS[pos]] += 1
+    return totals
+
+
+def imbalance(totals, players):
+    # Sum over buckets of the spread (max - min) among the given players
+    score = 0.0
+    for group in GROUPS:
+        values = [totals.get(p, {}).get(group, 0.0) for p in players]
+        if values:
+            score += max(values) - min(values)
+    return score
+
+
+def plan_season(upcoming, elig, totals=None, candidates=4):
+    """Plan rotations for each upcoming game in order.
+
+    `upcoming` is a list of {"players": [...], "innings": n} dicts, optionally with "required_bench"
+    and "pinned" as for solve_rotation. Each game tries `candidates` tie-break orders and keeps the
+    one that leaves the season totals most even. Returns (plans, totals) where plans is a list of
+    (rows, notes) per game and totals are the projected end-of-plan innings by bucket.
+    """
+    totals = {p: dict(buckets) for p, buckets in (totals or {}).items()}
+    plans = []
+    for number, game in enumerate(upcoming, start=1):
+        players = list(game["players"])
+        best = None
+        for shift in range(max(1, min(candidates, len(players)))):
+            order = players[shift:] + players[:shift]
+            try:
+                rows, notes = solve_rotation(order, elig, game["innings"], game.get("required_bench"),
+                                             game.get("pinned"), season=totals)
+            except RotationError:
+                continue
+            projected = apply_rotation({p: {**dict.fromkeys(GROUPS, 0.0), **totals.get(p, {})} for p in players}, rows)
+            score = imbalance(projected, players)
+            if best is None or score < best[0]:
+                best = (score, rows, notes, projected)
+        if best is None:
+            raise RotationError(f"Game {number}: no valid rotation for this lineup")
+        _, rows, notes, projected = best
+        totals.update(projected)
+        plans.append((rows, notes))
+    return plans, totals
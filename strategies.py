@@ -0,0 +1,70 @@
+"""Batting-order strategies for the Create Lineup auto-fill buttons.
+
+Every strategy takes the players available today and the PlayerRegistry (anything with
+get(player, stat)) and returns them in batting order. Add a strategy with @register (or register_weighted) and it shows up on the page.
+"""
+
+STRATEGIES = {}
+
+
+def register(key, label):
+    def wrap(fn):
+        STRATEGIES[key] = (label, fn)
+        return fn
+    return wrap
+
+
+def register_weighted(key, label, weights):
+    # Order by a linear formula over the indexed stats, e.g. {"OBP": 2, "SLG": 1}
+    def weighted(players, index):
+        return by_score(players, lambda p: sum(w * index.get(p, stat) for stat, w in weights.items()))
+    STRATEGIES[key] = (label, weighted)
+    return weighted
+
+
+def by_score(players, score):
+    return sorted(players, key=score, reverse=True)
+
+
+def build_order(key, players, index):
+    return STRATEGIES[key][1](list(players), index)
+
+
+@register("value", "Value Strategy")
+def value_strategy(players, index):
+    # Best OBP among players with a hit leads off, then the top 3 OPS, the best remaining SLG, and OPS after that
+    order, players = [], list(players)
+    with_hits = [p for p in players if index.get(p, "H") >= 1]
+    if with_hits:
+        leadoff = max(with_hits, key=lambda p: index.get(p, "OBP"))
+        order.append(leadoff)
+        players.remove(leadoff)
+    rest = by_score(players, lambda p: index.get(p, "OPS"))
+    order += rest[:3]
+    rest = rest[3:]
+    if rest:
+        rest.sort(key=lambda p: index.get(p, "SLG"), reverse=True)
+        order.append(rest.pop(0))
+        rest.sort(key=lambda p: index.get(p, "OPS"), reverse=True)
+    return order + rest
+
+
+@register("ops", "OPS")
+def ops_strategy(players, index):
+    return by_score(players, lambda p: index.get(p, "OPS"))
+
+
+@register("ba", "BA")
+def ba_strategy(players, index):
+    return by_score(players, lambda p: index.get(p, "AVG"))
+
+
+@register("obp_leadoff", "OBP Leadoff")
+def obp_leadoff_strategy(players, index):
+    if not players:
+        return []
+    leadoff = max(players, key=lambda p: index.get(p, "OBP"))
+    return [leadoff] + by_score([p for p in players if p != leadoff], lambda p: index.get(p, "OPS"))
+
+
+register_weighted("weighted_obp_slg", "2×OBP + SLG", {"OBP": 2, "SLG": 1})
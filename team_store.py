@@ -0,0 +1,132 @@
+"""Team-scoped document storage for shared deployments.
+
+Each team's saved rotation, availability, lineup and season stats live as JSON documents in one
+SQLite database (WAL mode, pooled connections). Every save is a single-row upsert inside its own
+transaction, so concurrent saves from different coaches never clobber each other or leave
+half-written JSON behind, and readers are never blocked by writers.
+"""
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_TEAM = "default"
+
+
+def team_slug(name):
+    slug = re.sub(r"[^a-z0-9]+", "-", str(name).strip().lower()).strip("-")
+    return slug or DEFAULT_TEAM
+
+
+class ConnectionPool:
+    def __init__(self, path, size=8):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if self._idle.qsize() < self.size:
+                self._idle.put(conn)
+            else:
+                conn.close()
+
+    def close(self):
+        # Must run before forking worker processes: SQLite connections can't cross a fork
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class TeamStore:
+    def __init__(self, path, pool_size=8):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        with self.pool.connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS documents (
+                team TEXT NOT NULL, name TEXT NOT NULL, body TEXT NOT NULL,
+                version INTEGER NOT NULL, updated REAL NOT NULL,
+                PRIMARY KEY (team, name))""")
+
+    def close(self):
+        self.pool.close()
+
+    def lock(self, team):
+        # Serializes read-modify-write sequences for one team; other teams never wait on it
+        with self._locks_guard:
+            return self._locks.setdefault(team, threading.RLock())
+
+    def get(self, team, name, default=None):
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT body FROM documents WHERE team = ? AND name = ?", (team, name)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def version(self, team, name):
+        """Bumps on every save; 0 if the document doesn't exist. Cheap enough to check every rerun."""
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT version FROM documents WHERE team = ? AND name = ?", (team, name)).fetchone()
+        return row[0] if row else 0
+
+    def put(self, team, name, value):
+        body = json.dumps(value, default=str)
+        with self.lock(team), self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("""INSERT INTO documents (team, name, body, version, updated) VALUES (?, ?, ?, 1, ?)
+                    ON CONFLICT (team, name) DO UPDATE SET body = excluded.body,
+                    version = documents.version + 1, updated = excluded.updated""",
+                             (team, name, body, time.time()))
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    def update(self, team, name, fn, default=None):
+        """put(fn(current value)) with no other save for this team in between."""
+        with self.lock(team):
+            value = fn(self.get(team, name, default))
+            self.put(team, name, value)
+            return value
+
+    def delete(self, team, name):
+        with self.lock(team), self.pool.connection() as conn:
+            conn.execute("DELETE FROM documents WHERE team = ? AND name = ?", (team, name))
+
+    def teams(self):
+        with self.pool.connection() as conn:
+            return [r[0] for r in conn.execute("SELECT DISTINCT team FROM documents ORDER BY team")]
+
+    def import_legacy_json(self, team, name, path):
+        """Seed a document from one of the old global data/*.json files, once."""
+        if self.version(team, name) or not os.path.exists(path):
+            return False
+        try:
+            with open(path, "r") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.put(team, name, value)
+        return True
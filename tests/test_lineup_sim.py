@@ -0,0 +1,47 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from lineup_sim import BB, DOUBLE, HR, K, OUT, OUTCOMES, SINGLE, advance, simulate_runs
+
+BASES = list(itertools.product((False, True), repeat=3))
+
+
+def expected(outcome, outs, on1, on2, on3):
+    # (runs, on1, on2, on3) by the rules as a scorer would state them
+    if outcome == BB:  # forced runners only
+        return int(on1 and on2 and on3), True, on1 or on2, on3 or (on1 and on2)
+    if outcome == SINGLE:
+        return int(on3), True, on1, on2
+    if outcome == DOUBLE:
+        return int(on2) + int(on3), False, True, on1
+    if outcome == HR:
+        return 1 + on1 + on2 + on3, False, False, False
+    if outcome == OUT and outs < 2:  # runner on third tags up, everyone moves up a base
+        return int(on3), False, on1, on2
+    return 0, on1, on2, on3
+
+
+@pytest.mark.parametrize("outs", [0, 1, 2])
+@pytest.mark.parametrize("on1,on2,on3", BASES)
+def test_advance_every_base_out_state(outs, on1, on2, on3):
+    n = len(OUTCOMES)
+    scored, new1, new2, new3 = advance(np.arange(n), np.full(n, outs), np.full(n, on1), np.full(n, on2), np.full(n, on3))
+    for outcome in range(n):
+        got = (int(scored[outcome]), bool(new1[outcome]), bool(new2[outcome]), bool(new3[outcome]))
+        assert got == expected(outcome, outs, on1, on2, on3), OUTCOMES[outcome]
+
+
+@pytest.mark.parametrize("outs", [0, 1, 2, 3])
+def test_finished_inning_leaves_bases_alone(outs):
+    for on1, on2, on3 in BASES:
+        scored, *bases = advance(np.array([-1]), np.array([outs]), np.array([on1]), np.array([on2]), np.array([on3]))
+        assert scored[0] == 0 and [bool(b[0]) for b in bases] == [on1, on2, on3]
+
+
+def test_simulated_innings_follow_the_lineup():
+    # Every batter always gets the same outcome: single, double, double (2 runs), then three strikeouts
+    probs = np.eye(len(OUTCOMES))[[SINGLE, DOUBLE, DOUBLE, K, K, K]]
+    runs = simulate_runs(probs, range(6), n_games=5, n_innings=4)
+    assert runs.tolist() == [8] * 5
@@ -0,0 +1,99 @@
+import pandas as pd
+
+import profiling
+from profiling import Instrumented
+from roster_sync import ROSTER_COLS, FakeWorksheet, RosterSync, diff_grid
+
+HEADER = list(ROSTER_COLS)
+ROWS = [
+    ["1", "Ava", "7", "R/R", "10", "P, C"],
+    ["2", "Ben", "12", "L/L", "11", "INF"],
+    ["3", "Cal", "3", "R/R", "9", "OF"],
+    ["4", "Dee", "21", "S/R", "10", "1B, OF"],
+]
+
+
+def apply(old, new):
+    # Diff old -> new, send the requests to a fake sheet holding old, and return what it ends up holding
+    sheet = FakeWorksheet(old)
+    requests, summary, grid = diff_grid(sheet.get_all_values(), new, sheet.id)
+    if requests:
+        sheet.spreadsheet.batch_update({"requests": requests})
+    assert sheet.values == grid
+    return sheet.values, summary, requests
+
+
+def players(values):
+    return sorted(tuple(row) for row in values[1:] if any(row))
+
+
+def test_resorting_writes_nothing():
+    new = [HEADER] + sorted(ROWS, key=lambda row: row[1], reverse=True)
+    values, summary, requests = apply([HEADER] + ROWS, new)
+    assert requests == [] and summary["cells"] == 0
+    assert values == [HEADER] + ROWS
+
+
+def test_changed_cells_are_rewritten_in_place():
+    new = [HEADER] + [row[:] for row in ROWS]
+    new[3][2], new[3][5] = "30", "OF, P"
+    values, summary, requests = apply([HEADER] + ROWS, new)
+    assert summary["updated"] == ["3"] and summary["cells"] == 2
+    assert values == new
+
+
+def test_duplicate_ids_pair_up_in_order():
+    old = [HEADER] + ROWS + [["2", "Bea", "14", "R/R", "9", "OF"]]
+    new = [HEADER] + ROWS + [["2", "Bea", "15", "R/R", "9", "OF"]]
+    values, summary, requests = apply(old, new)
+    assert summary == {"updated": ["2"], "added": [], "deleted": [], "cells": 1}
+    assert values[2] == ROWS[1] and values[5][2] == "15"
+
+
+def test_blank_rows_are_left_alone():
+    old = [HEADER, ROWS[0], [], ROWS[1], ["", "", "", "", "", ""], ROWS[2]]
+    new = [HEADER, ROWS[2], ROWS[0], ROWS[3]]
+    values, summary, requests = apply(old, new)
+    assert summary["added"] == ["4"] and summary["deleted"] == ["2"]
+    assert players(values) == players(new)
+    assert values[2] == [] and values[3] == [""] * len(HEADER)
+
+
+def test_delete_and_append_in_one_batch():
+    new = [HEADER, ROWS[0], ROWS[2], ["5", "Eli", "8", "R/R", "12", "SS"], ["6", "Fay", "2", "L/L", "11", "C"]]
+    values, summary, requests = apply([HEADER] + ROWS, new)
+    assert summary["added"] == ["5", "6"] and summary["deleted"] == ["2", "4"]
+    assert len(requests) == 3  # one append, then the two deletes bottom-up
+    assert [r["deleteDimension"]["range"]["startIndex"] for r in requests[1:]] == [4, 2]
+    assert players(values) == players(new)
+
+
+def test_header_changes_are_written():
+    header = HEADER[:5] + ["Positions"]
+    values, summary, requests = apply([HEADER] + ROWS, [header] + ROWS)
+    assert summary["updated"] == [] and summary["cells"] == 1
+    assert values[0] == header
+    values, summary, requests = apply([HEADER[:4]] + [row[:4] for row in ROWS], [HEADER] + ROWS)
+    assert values == [HEADER] + ROWS
+
+
+def test_sync_after_refresh_keeps_another_writers_rows():
+    sheet = FakeWorksheet([HEADER] + ROWS)
+    sync = RosterSync(sheet, max_age=60)
+    sync.refresh()
+    sheet.append_rows([["5", "Eli", "8", "R/R", "12", "SS"]])  # someone else adds a player
+    frame = pd.DataFrame(ROWS[:3] + [["5", "Eli", "8", "R/R", "12", "SS"]], columns=ROSTER_COLS)
+    sync.refresh()
+    summary = sync.sync(frame)
+    assert summary["deleted"] == ["4"] and summary["added"] == []
+    assert players(sheet.values) == sorted(map(tuple, frame.values.tolist()))
+
+
+def test_instrumented_sync_counts_the_batch_update():
+    sheet = Instrumented(FakeWorksheet([HEADER] + ROWS), "gspread", nested=("spreadsheet",))
+    sync = RosterSync(sheet, max_age=60)
+    sync.refresh()
+    rec = profiling.begin("sync")
+    sync.sync(pd.DataFrame(ROWS[:3], columns=ROSTER_COLS))
+    assert rec.counters["gspread.calls"] == 1
+    assert [s["name"] for s in rec.spans] == ["gspread.batch_update"]
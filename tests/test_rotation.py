@@ -0,0 +1,111 @@
+import pytest
+
+from benchmarks import make_roster
+from rotation import POOL_PLAYER, POSITIONS, EligibilityIndex, RotationError, alternating_halves, solve_rotation
+
+
+def team(roster):
+    return roster["name"].tolist(), EligibilityIndex(zip(roster["name"], roster["positions"]))
+
+
+def check_plan(rows, notes, players, elig, num_innings, pinned=None):
+    # The planner's rules, checked on the finished plan rather than trusted from the search.
+    # A coach's pins win over the sit-twice and no-return rules
+    pinned = pinned or {}
+    required_bench = max(0, len(players) - 9)
+    assert [row["Inning"] for row in rows] == list(range(1, num_innings + 1))
+    sat = dict.fromkeys(players, 0)
+    last_bench, retired, pitcher = set(), set(), None
+    for row in rows:
+        inning = row["Inning"]
+        bench = [] if row["Bench"] == "—" else row["Bench"].split(", ")
+        field = [row[pos] for pos in POSITIONS]
+        assert len(bench) == required_bench, row
+        assert sorted(bench + [p for p in field if p != POOL_PLAYER]) == sorted(players), row
+        assert not set(bench) & last_bench, f"back-to-back bench in inning {inning}"
+        cells = pinned.get(inning, {})
+        for p in bench:
+            if sat[p] and not all(sat.values()) and p not in cells.get("Bench", []):
+                assert any(n.startswith(f"Inning {inning}: {p} sits a second time") for n in notes), row
+        for pos in POSITIONS:
+            assert elig.can_play(row[pos], pos), (inning, pos, row[pos])
+        if row["P"] != pitcher:
+            assert row["P"] not in retired or cells.get("P") == row["P"], f"{row['P']} returns to pitch in inning {inning}"
+            if pitcher:
+                retired.add(pitcher)
+        for cell, value in cells.items():
+            if cell == "Bench":
+                assert set(value) <= set(bench), row
+            else:
+                assert row[cell] == value, row
+        for p in bench:
+            sat[p] += 1
+        last_bench, pitcher = set(bench), row["P"]
+
+
+@pytest.mark.parametrize("n_players,seed,battery", [(9, 0, 2), (10, 1, 2), (12, 3, 2), (13, 257, 0), (15, 4, 3), (16, 5, 3)])
+def test_solved_plans_follow_the_rules(n_players, seed, battery):
+    players, elig = team(make_roster(n_players, seed=seed, battery=battery))
+    rows, notes = solve_rotation(players, elig, 6)
+    check_plan(rows, notes, players, elig, 6)
+
+
+def test_pool_players_fill_a_short_team():
+    players, elig = team(make_roster(8, seed=0, battery=2))
+    rows, notes = solve_rotation(players, elig, 6)
+    assert all(sum(row[pos] == POOL_PLAYER for pos in POSITIONS) == 1 for row in rows)
+    check_plan(rows, notes, players, elig, 6)
+
+
+@pytest.mark.parametrize("num_innings", [6, 9])
+def test_half_the_team_sitting_alternates_halves(num_innings):
+    # Nine of eighteen sit every inning, so every inning needs its own pitcher
+    players, elig = team(make_roster(18, seed=2, battery=4, pitchers=9))
+    rows, notes = solve_rotation(players, elig, num_innings)
+    check_plan(rows, notes, players, elig, num_innings)
+    assert len({row["P"] for row in rows}) == num_innings
+    assert all(row["Bench"] == rows[(row["Inning"] - 1) % 2]["Bench"] for row in rows)
+
+
+def test_pins_are_kept():
+    players, elig = team(make_roster(12, seed=3, battery=2))
+    pinned = {1: {"Bench": ["Player 1", "Player 2"]}, 2: {"P": "Player 8", "C": "Player 10"}, 4: {"SS": "Player 12"},
+              5: {"P": "Player 7"}}
+    rows, notes = solve_rotation(players, elig, 6, pinned=pinned)
+    check_plan(rows, notes, players, elig, 6, pinned)
+
+
+def test_pins_pick_the_halves():
+    players, elig = team(make_roster(18, seed=2, battery=4, pitchers=9))
+    pinned = {1: {"Bench": ["Player 1"], "P": "Player 5"}, 4: {"P": "Player 2", "1B": "Player 10"}}
+    rows, notes = solve_rotation(players, elig, 9, pinned=pinned)
+    check_plan(rows, notes, players, elig, 9, pinned)
+
+
+def test_pins_in_both_halves_are_refused():
+    players, elig = team(make_roster(18, seed=2, battery=4, pitchers=9))
+    with pytest.raises(RotationError, match="both halves"):
+        solve_rotation(players, elig, 6, pinned={1: {"Bench": ["Player 10"]}, 2: {"Bench": ["Player 10"]}})
+
+
+@pytest.mark.parametrize("roster,num_innings,message", [
+    # Two players tagged only P: a relieved pitcher would sit back-to-back
+    (make_roster(12, seed=3, battery=2).assign(positions=lambda r: ["P", "P"] + r["positions"].tolist()[2:]), 6,
+     "can only pitch"),
+    # Half the team sits every inning, so each of the 9 innings needs its own player tagged P
+    (make_roster(18, seed=2, battery=4, pitchers=8), 9, "players tagged P are needed"),
+    # Both catchers have to pitch, but each half's only catcher can't leave the plate
+    (make_roster(18, seed=2, battery=2, pitchers=9), 9, "No way to split the team"),
+])
+def test_infeasible_rosters(roster, num_innings, message):
+    players, elig = team(roster)
+    with pytest.raises(RotationError, match=message):
+        solve_rotation(players, elig, num_innings)
+
+
+def test_running_out_of_budget_says_so():
+    players, elig = team(make_roster(18, seed=2, battery=4, pitchers=9))
+    pins = {inning: ([], {}) for inning in range(1, 10)}
+    assert alternating_halves(players, elig, 9, pins) is not None
+    with pytest.raises(RotationError, match="gave up"):
+        alternating_halves(players, elig, 9, pins, budget=0)
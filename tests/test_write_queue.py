@@ -0,0 +1,62 @@
+import pytest
+
+import write_queue
+from write_queue import MAX_ATTEMPTS, WriteQueue
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_queue, "RETRY_BASE", 0)  # every retry is due straight away
+    return WriteQueue(str(tmp_path / "journal.sqlite"))
+
+
+def broken(payload):
+    raise RuntimeError("tab gone")
+
+
+def test_a_failing_job_is_parked_and_stops_blocking_its_lane(queue):
+    flushed = []
+    queue.register("roster_sync", broken)
+    queue.register("add_players", flushed.append)
+    queue.enqueue("roster_sync", {"team": "a"}, lane="sheets:a")
+    queue.enqueue("add_players", {"team": "a"}, lane="sheets:a")
+    queue.flush_once()
+    assert flushed == [] and queue.status("sheets:a")["retrying"] == 1
+    for _ in range(MAX_ATTEMPTS):
+        queue.flush_once()
+    assert flushed == [{"team": "a"}]
+    assert queue.status()["failed"] == 1 and queue.status()["pending"] == 0
+    assert queue.failed()[0]["error"] == "RuntimeError: tab gone"
+
+
+def test_lanes_are_independent(queue):
+    flushed = []
+    queue.register("roster_sync", broken)
+    queue.register("add_players", flushed.append)
+    queue.enqueue("roster_sync", {"team": "a"}, lane="sheets:a")
+    queue.enqueue("add_players", {"team": "b"}, lane="sheets:b")
+    queue.flush_once()
+    assert flushed == [{"team": "b"}]
+    assert queue.status("sheets:a")["pending"] == 1 and queue.status("sheets:b")["pending"] == 0
+
+
+def test_retry_and_discard(queue):
+    queue.register("roster_sync", broken)
+    first = queue.enqueue("roster_sync", {"team": "a"})
+    second = queue.enqueue("roster_sync", {"team": "b"})
+    for _ in range(2 * MAX_ATTEMPTS):  # one lane: the second starts failing once the first is parked
+        queue.flush_once()
+    assert [job["id"] for job in queue.failed()] == [second, first]
+    queue.retry(first)
+    queue.discard(second)
+    assert queue.failed() == []
+    assert queue.status() == {"pending": 1, "retrying": 0, "failed": 0, "last_flushed": None, "last_error": None}
+
+
+def test_a_newer_save_supersedes_a_failed_one(queue):
+    queue.register("roster_sync", broken)
+    queue.enqueue("roster_sync", {"team": "a"}, coalesce_key="roster:a")
+    for _ in range(MAX_ATTEMPTS):
+        queue.flush_once()
+    queue.enqueue("roster_sync", {"team": "a"}, coalesce_key="roster:a")
+    assert queue.status()["failed"] == 0 and queue.status()["pending"] == 1
@@ -0,0 +1,116 @@
+"""Pitch-count rest rules: required rest, next-eligible dates and rolling pitch totals.
+
+Everything works on whole arrays over the (ID, date) pitching log, so a multi-season
+history costs a sort and a few NumPy passes, not a loop per game.
+"""
+import numpy as np
+import pandas as pd
+
+# (minimum pitches thrown in a day, calendar days of rest required), ascending
+LITTLE_LEAGUE_REST = [(1, 0), (21, 1), (36, 2), (51, 3), (66, 4)]
+LITTLE_LEAGUE_REST_17_18 = [(1, 0), (31, 1), (46, 2), (61, 3), (76, 4)]
+# (minimum league age, pitches allowed in a day), ascending
+LITTLE_LEAGUE_DAILY_MAX = [(0, 50), (9, 75), (11, 85), (13, 95), (17, 105)]
+
+RULES = {
+    "Little League (ages 7-16)": {"rest": LITTLE_LEAGUE_REST, "daily_max": LITTLE_LEAGUE_DAILY_MAX},
+    "Little League (ages 17-18)": {"rest": LITTLE_LEAGUE_REST_17_18, "daily_max": LITTLE_LEAGUE_DAILY_MAX},
+}
+DEFAULT_RULES = "Little League (ages 7-16)"
+WINDOWS = (7, 30)  # trailing pitch-total windows, in days
+
+REPORT_COLS = ["last_pitched", "last_pitches", "rest_days", "next_eligible", "available", "daily_max"] + \
+              [f"pitches_{w}d" for w in WINDOWS]
+
+
+def _lookup(table, values):
+    # Step-function lookup: the value paired with the largest threshold <= each value, else 0
+    table = sorted(table)
+    thresholds = np.array([t for t, _ in table], dtype=float)
+    results = np.array([r for _, r in table], dtype=float)
+    idx = np.searchsorted(thresholds, np.asarray(values, dtype=float), side="right") - 1
+    return np.where(idx >= 0, results[np.clip(idx, 0, None)], 0)
+
+
+def rest_days(pitches, rest_table=LITTLE_LEAGUE_REST):
+    """Days of rest required after each day's pitch count."""
+    return _lookup(rest_table, pitches).astype(int)
+
+
+def lookback(rules):
+    # Days of history that can still affect eligibility or the rolling totals
+    return max(max(WINDOWS), max((d for _, d in rules["rest"]), default=0) + 1)
+
+
+def daily_log(pitches):
+    """One row per (ID, date) with that day's pitches, sorted by player ID then date."""
+    if pitches.empty:
+        return pd.DataFrame({"ID": pd.Series(dtype=str), "date": pd.Series(dtype="datetime64[ns]"),
+                             "Pitches_Thrown": pd.Series(dtype=int)})
+    days = pd.to_datetime(pitches["date"]).dt.normalize().rename("date")
+    return pitches.groupby([pitches["ID"], days], sort=True)["Pitches_Thrown"].sum().reset_index()
+
+
+def _keys(daily):
+    # Player code in the high bits, day number in the low bits: sorted keys keep each
+    # player's days contiguous, so one searchsorted handles every trailing window at once
+    codes = pd.factorize(daily["ID"], sort=True)[0].astype(np.int64)
+    day_numbers = daily["date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    return (codes << 32) + day_numbers
+
+
+def rolling_totals(pitches, windows=WINDOWS):
+    """The daily log plus each player's trailing pitch total over every window, ending that day."""
+    daily = daily_log(pitches)
+    keys = _keys(daily)
+    csum = np.concatenate(([0], np.cumsum(daily["Pitches_Thrown"].to_numpy())))
+    for w in windows:
+        start = np.searchsorted(keys, keys - (w - 1), side="left")
+        daily[f"pitches_{w}d"] = csum[1:] - csum[start]
+    return daily
+
+
+def workload(pitches, as_of, rules=None, ages=None):
+    """Per-pitcher rest status on `as_of`.
+
+    `pitches` has ID, date, Pitches_Thrown (any number of rows per day); games after
+    `as_of` are ignored. `ages` maps player ID -> league age for the daily maximum.
+    """
+    rules = rules or RULES[DEFAULT_RULES]
+    as_of = pd.Timestamp(as_of).normalize()
+    daily = daily_log(pitches)
+    daily = daily[(daily["date"] <= as_of) & (daily["Pitches_Thrown"] > 0)].reset_index(drop=True)
+    if daily.empty:
+        return pd.DataFrame(columns=REPORT_COLS, index=pd.Index([], name="ID"))
+
+    counts = daily["Pitches_Thrown"].to_numpy()
+    rest = rest_days(counts, rules["rest"])
+    eligible_from = daily["date"].to_numpy().astype("datetime64[D]") + (rest + 1).astype("timedelta64[D]")
+    players, starts = np.unique(daily["ID"].to_numpy(), return_index=True)
+    last = np.append(starts[1:], len(daily)) - 1
+    next_eligible = np.maximum.reduceat(eligible_from, starts)
+
+    report = pd.DataFrame({
+        "last_pitched": daily["date"].to_numpy()[last],
+        "last_pitches": counts[last],
+        "rest_days": rest[last],
+        "next_eligible": pd.to_datetime(next_eligible),
+    }, index=pd.Index(players, name="ID"))
+    report["available"] = report["next_eligible"] <= as_of
+    age_values = pd.to_numeric(pd.Series(ages or {}, dtype=object).reindex(report.index), errors="coerce")
+    report["daily_max"] = np.where(age_values.notna(), _lookup(rules["daily_max"], age_values.fillna(0)), np.nan)
+
+    codes = np.repeat(np.arange(len(players)), np.diff(np.append(starts, len(daily))))
+    age_days = (as_of - daily["date"]).dt.days.to_numpy()
+    for w in WINDOWS:
+        report[f"pitches_{w}d"] = np.bincount(codes, weights=np.where(age_days < w, counts, 0),
+                                              minlength=len(players)).astype(int)
+    return report[REPORT_COLS]
+
+
+def resting(report, players=None):
+    """{player ID: next eligible date} for pitchers who can't pitch on the report's date."""
+    out = report.loc[~report["available"].astype(bool), "next_eligible"]
+    if players is not None:
+        out = out[out.index.isin(list(players))]
+    return out.to_dict()
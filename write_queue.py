@@ -0,0 +1,166 @@
+"""Local-first write-behind queue.
+
+Saves go into a SQLite journal and return right away; a background thread flushes them to Google
+Sheets or disk, retrying with exponential backoff. Jobs stay in the journal until their handler
+succeeds, so a dropped connection (or a restart) mid-flush loses nothing. A job that keeps failing
+is parked as 'failed' after MAX_ATTEMPTS so it stops holding back its lane; retry() or discard() it.
+"""
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+RETRY_BASE = 2.0     # seconds before the first retry, doubled on each failure
+RETRY_MAX = 300.0
+MAX_ATTEMPTS = 10    # failures before a job is parked as 'failed' (about 20 minutes of retrying)
+PRUNE_EVERY = 3600   # polls between journal prunes (about an hour at the default poll)
+
+
+class WriteQueue:
+    def __init__(self, path):
+        self.path = path
+        self.handlers = {}
+        self._wake = threading.Event()
+        self._thread = None
+        with closing(self.connect()) as conn, conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                coalesce_key TEXT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                flushed REAL,
+                error TEXT,
+                lane TEXT)""")
+            if "lane" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN lane TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, next_attempt)")
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def register(self, kind, handler, lane="default"):
+        # Jobs in one lane flush strictly in order; a failing job holds back later jobs in its lane only.
+        # `lane` is the default for the kind's jobs (and for any journaled before jobs carried one)
+        self.handlers[kind] = (handler, lane)
+        with closing(self.connect()) as conn, conn:
+            conn.execute("UPDATE jobs SET lane = ? WHERE kind = ? AND lane IS NULL", (lane, kind))
+
+    def enqueue(self, kind, payload, coalesce_key=None, lane=None):
+        """Journal a write and return its job id. A newer job with the same coalesce_key
+        replaces any older one that hasn't flushed yet (e.g. two roster saves in a row)."""
+        if lane is None:
+            lane = self.handlers[kind][1] if kind in self.handlers else "default"
+        with closing(self.connect()) as conn, conn:
+            if coalesce_key is not None:
+                conn.execute("UPDATE jobs SET status = 'superseded' WHERE coalesce_key = ? "
+                             "AND status IN ('pending', 'failed')", (coalesce_key,))
+            job_id = conn.execute(
+                "INSERT INTO jobs (kind, coalesce_key, payload, created, lane) VALUES (?, ?, ?, ?, ?)",
+                (kind, coalesce_key, json.dumps(payload, default=str), time.time(), lane)).lastrowid
+        self._wake.set()
+        return job_id
+
+    def flush_once(self):
+        """Run every due job once, oldest first. Returns how many succeeded."""
+        now = time.time()
+        with closing(self.connect()) as conn:
+            jobs = conn.execute("SELECT id, kind, payload, attempts, next_attempt, lane FROM jobs "
+                                "WHERE status = 'pending' ORDER BY id").fetchall()
+        done, blocked = 0, set()
+        for job_id, kind, payload, attempts, next_attempt, lane in jobs:
+            if kind not in self.handlers:
+                continue
+            handler, default_lane = self.handlers[kind]
+            lane = lane or default_lane
+            if lane in blocked:
+                continue
+            if next_attempt > now:
+                blocked.add(lane)
+                continue
+            try:
+                handler(json.loads(payload))
+            except Exception as e:
+                failed = attempts + 1 >= MAX_ATTEMPTS
+                if not failed:
+                    blocked.add(lane)
+                delay = min(RETRY_BASE * 2 ** attempts, RETRY_MAX)
+                with closing(self.connect()) as conn, conn:
+                    conn.execute("UPDATE jobs SET attempts = attempts + 1, next_attempt = ?, error = ?, status = ? "
+                                 "WHERE id = ?", (time.time() + delay, f"{type(e).__name__}: {e}",
+                                                  "failed" if failed else "pending", job_id))
+                continue
+            with closing(self.connect()) as conn, conn:
+                conn.execute("UPDATE jobs SET status = 'done', flushed = ?, error = NULL WHERE id = ?",
+                             (time.time(), job_id))
+            done += 1
+        return done
+
+    def _run(self, poll):
+        polls = 0
+        while True:
+            try:
+                self.flush_once()
+                if polls % PRUNE_EVERY == 0:
+                    self.prune()
+            except Exception:
+                pass  # journal unreadable for a moment; try again next poll
+            polls += 1
+            self._wake.wait(poll)
+            self._wake.clear()
+
+    def start(self, poll=1.0):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, args=(poll,), daemon=True, name="write-queue")
+            self._thread.start()
+        return self
+
+    def pending(self, *kinds):
+        sql = "SELECT COUNT(*) FROM jobs WHERE status = 'pending'"
+        if kinds:
+            sql += f" AND kind IN ({', '.join('?' * len(kinds))})"
+        with closing(self.connect()) as conn:
+            return conn.execute(sql, kinds).fetchone()[0]
+
+    def status(self, lane=None):
+        """{"pending", "retrying", "failed", "last_flushed", "last_error"} for the sidebar, or for one lane."""
+        where, args = ("lane = ?", (lane,)) if lane is not None else ("1", ())
+        with closing(self.connect()) as conn:
+            pending, retrying, failed = conn.execute(
+                "SELECT COALESCE(SUM(status = 'pending'), 0), COALESCE(SUM(status = 'pending' AND attempts > 0), 0), "
+                f"COALESCE(SUM(status = 'failed'), 0) FROM jobs WHERE {where}", args).fetchone()
+            last_flushed = conn.execute(f"SELECT MAX(flushed) FROM jobs WHERE status = 'done' AND {where}", args).fetchone()[0]
+            last_error = conn.execute(f"SELECT error FROM jobs WHERE status = 'pending' AND error IS NOT NULL AND {where} "
+                                      "ORDER BY id DESC LIMIT 1", args).fetchone()
+        return {"pending": pending, "retrying": retrying, "failed": failed, "last_flushed": last_flushed,
+                "last_error": last_error[0] if last_error else None}
+
+    def failed(self):
+        """Parked jobs, newest first, as {"id", "kind", "lane", "attempts", "error", "created"}."""
+        with closing(self.connect()) as conn:
+            rows = conn.execute("SELECT id, kind, lane, attempts, error, created FROM jobs "
+                                "WHERE status = 'failed' ORDER BY id DESC").fetchall()
+        return [dict(zip(("id", "kind", "lane", "attempts", "error", "created"), row)) for row in rows]
+
+    def retry(self, job_id):
+        # Back in line with a fresh set of attempts
+        with closing(self.connect()) as conn, conn:
+            conn.execute("UPDATE jobs SET status = 'pending', attempts = 0, next_attempt = 0, error = NULL "
+                         "WHERE id = ? AND status = 'failed'", (job_id,))
+        self._wake.set()
+
+    def discard(self, job_id):
+        with closing(self.connect()) as conn, conn:
+            conn.execute("UPDATE jobs SET status = 'discarded' WHERE id = ? AND status = 'failed'", (job_id,))
+
+    def prune(self, older_than=7 * 24 * 3600):
+        # Drop flushed, superseded and discarded jobs once they're old; pending and failed ones are never pruned
+        with closing(self.connect()) as conn, conn:
+            conn.execute("DELETE FROM jobs WHERE status IN ('done', 'superseded', 'discarded') AND created < ?",
+                         (time.time() - older_than,))